@@ -0,0 +1,21 @@
+from uagents import Context, Protocol
+from Backend.models import CodecHello
+from Backend.utils import PROCESS_ID, CODECS, peer_codecs
+
+# Included by agents exchanging large payloads, so each can learn which codecs the other reads
+# and whether it runs in the same process (then large values are passed by id)
+codec_protocol = Protocol(name="codec", version="0.1.0")
+
+def codec_hello(reply: bool = False) -> CodecHello:
+    return CodecHello(process=PROCESS_ID, codecs=CODECS, reply=reply)
+
+async def introduce(ctx: Context, address: str):
+    """Send our CodecHello to a peer we have not heard from yet; until it answers, it gets JSON."""
+    if peer_codecs.needs_hello(address):
+        await ctx.send(address, codec_hello(reply=True))
+
+@codec_protocol.on_message(model=CodecHello)
+async def handle_codec_hello(ctx: Context, sender: str, msg: CodecHello):
+    peer_codecs.learn(sender, msg.process, msg.codecs)
+    if msg.reply:
+        await ctx.send(sender, codec_hello())
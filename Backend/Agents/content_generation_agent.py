@@ -1,19 +1,30 @@
 import sys
 import os
+import asyncio
 
 from Backend.config import Config  # Import Config
 
-from uagents import Agent, Context
-from uagents.setup import fund_agent_if_low
-from Backend.models import ContentRequest, GeneratedContent
-import google.generativeai as genai
-from dotenv import load_dotenv
+from uagents import Agent, Context, Protocol
+from Backend.models import ContentRequest, GeneratedContent, ContentChunk, ContentBatchRequest, GeneratedContentBatch, AgentError, LeaseRenewal
+from typing import Awaitable, Callable, List, Optional
+from Backend.utils import get_llm_client, get_response_cache, make_cache_key, run_in_background, fund_agent, is_retryable, StructuredOutputError, parse_json_list, text_item, get_prompt, truncate_to_tokens, instrument, get_similarity_index, get_metrics
+from Backend.Agents.metrics_protocol import metrics_protocol
 
-# Load environment variables
-load_dotenv()
+# Shared non-blocking LLM client
+llm_client = get_llm_client("content_generation_agent")
+response_cache = get_response_cache()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Posts already written, by topic, so a near-identical topic can reuse one instead of calling the LLM
+similarity_index = get_similarity_index()
+posts_reused = get_metrics().counter("content_posts_reused_total", "Posts served from a near-identical topic instead of the LLM")
+
+# Compiled prompt templates; their versions key the response cache
+content_prompt = get_prompt("content")
+content_batch_prompt = get_prompt("content_batch")
+
+# Upper bound on content requests generated at the same time; workers run in
+# the same process share it, workers in their own processes each get one
+generation_slots = asyncio.Semaphore(Config.CONTENT_GENERATION_CONCURRENCY)
 
 # Content Generation Agent
 content_generation_agent = Agent(
@@ -23,46 +34,309 @@ content_generation_agent = Agent(
     endpoint=[f"http://127.0.0.1:{Config.CONTENT_GENERATION_AGENT_PORT}/submit"]
 )
 
-# Fund the agent if needed
-fund_agent_if_low(content_generation_agent.wallet.address())
-
-async def generate_content_with_gemini(request: ContentRequest) -> str:
-    prompt = f"""
-    Generate content for a {request.content_type} post about {request.topic} in the area of {request.area_of_interest}.
-    Incorporate the following keywords: {', '.join(request.keywords)}.
-    The content should be suitable for posting on {request.day}.
-    
-    Please provide a well-structured post with:
-    1. An engaging title
-    2. An introduction
-    3. Main content (2-3 paragraphs)
-    4. A conclusion or call-to-action
-    
-    Ensure the content is informative, engaging, and relevant to the topic and keywords.
+# Message handlers shared by every content worker
+content_protocol = Protocol(name="content_generation", version="0.1.0")
+
+def content_cache_key(request, topic: str, day: str) -> str:
+    """Response cache key of the post for one topic and day of a ContentRequest or ContentBatchRequest."""
+    return make_cache_key(
+        "content", llm_client.model_name, content_prompt.version,
+        keywords=request.keywords,
+        topic=topic,
+        day=day,
+        area_of_interest=request.area_of_interest,
+        content_type=request.content_type
+    )
+
+def similarity_namespace(request, day: str) -> tuple:
+    # Posts are only interchangeable for the same area, format and day
+    return request.area_of_interest.strip().lower(), request.content_type.strip().lower(), day
+
+async def find_similar_post(request, topic: str, day: str) -> Optional[str]:
+    """A cached post another campaign got for a near-identical topic, if any."""
+    if not Config.SIMILARITY_REUSE_CONTENT:
+        return None
+    # Never reuse within a campaign, where it would just repeat a post
+    match = similarity_index.find(similarity_namespace(request, day), topic, exclude_owner=request.session_id)
+    if match is None:
+        return None
+    post = await response_cache.get(match.ref)
+    if post is not None:
+        posts_reused.inc()
+    return post
+
+def remember_post(request, topic: str, day: str, cache_key: str):
+    similarity_index.add(similarity_namespace(request, day), topic, ref=cache_key, owner=request.session_id)
+
+async def generate_content_with_gemini(request: ContentRequest, on_chunk: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+    cache_key = content_cache_key(request, request.topic, request.day)
+
+    async def call_llm() -> str:
+        post = await find_similar_post(request, request.topic, request.day)
+        if post is not None:
+            if on_chunk is not None:
+                await on_chunk(post)
+            return post
+
+        # Rendered only on a cache miss
+        prompt = content_prompt.render(
+            content_type=request.content_type,
+            topic=request.topic,
+            area_of_interest=request.area_of_interest,
+            keywords=request.keywords,
+            day=request.day
+        )
+        if on_chunk is None:
+            post = await llm_client.generate(prompt, session=request.session_id, priority=request.priority)
+        else:
+            # Pass each chunk on as soon as it arrives, then return the whole post for caching
+            chunks = []
+            async for chunk in llm_client.stream(prompt, session=request.session_id, priority=request.priority):
+                chunks.append(chunk)
+                await on_chunk(chunk)
+            post = "".join(chunks)
+        remember_post(request, request.topic, request.day, cache_key)
+        return post
+
+    return await response_cache.get_or_generate(cache_key, call_llm)
+
+async def generate_content_batch_with_gemini(request: ContentBatchRequest) -> List[Optional[GeneratedContent]]:
+    async def call_llm() -> List[Optional[str]]:
+        contents = [await find_similar_post(request, topic, day) for day, topic in zip(request.days, request.topics)]
+        missing = [index for index, content in enumerate(contents) if content is None]
+        if not missing:
+            return contents
+
+        # Only the posts no other campaign has written go to the LLM
+        pending = request.copy(update={
+            "days": [request.days[index] for index in missing],
+            "topics": [request.topics[index] for index in missing]
+        })
+        posts = "\n".join(
+            f"{index}. Day: {day} - Topic: {truncate_to_tokens(topic, content_batch_prompt.text_budget)}"
+            for index, (day, topic) in enumerate(zip(pending.days, pending.topics), start=1)
+        )
+        prompt = content_batch_prompt.render(
+            count=len(pending.days),
+            content_type=request.content_type,
+            area_of_interest=request.area_of_interest,
+            keywords=request.keywords,
+            posts=posts
+        )
+        response_text = await llm_client.generate(prompt, session=request.session_id)
+        for index, day, topic, content in zip(missing, pending.days, pending.topics, parse_content_batch(response_text, pending)):
+            contents[index] = content
+            if content is not None:
+                # Cached under the single post's key too, so later campaigns can reuse it on its own
+                cache_key = content_cache_key(request, topic, day)
+                await response_cache.set(cache_key, content)
+                remember_post(request, topic, day, cache_key)
+        return contents
+
+    cache_key = make_cache_key(
+        "content_batch", llm_client.model_name, content_batch_prompt.version,
+        keywords=request.keywords,
+        topics=request.topics,
+        days=request.days,
+        area_of_interest=request.area_of_interest,
+        content_type=request.content_type
+    )
+    contents = await response_cache.get_or_generate(cache_key, call_llm)
+    return [
+        GeneratedContent(topic=topic, content=content, day=day, batch_id=request.batch_id, session_id=request.session_id)
+        if content is not None else None
+        for day, topic, content in zip(request.days, request.topics, contents)
+    ]
+
+def parse_content_batch(response_text: str, request: ContentBatchRequest) -> List[Optional[str]]:
     """
-    
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(prompt)
-    return response.text
+    Split a batch response into the post for each requested day, None where the response has none.
 
-@content_generation_agent.on_event("startup")
-async def initialize(ctx: Context):
-    ctx.logger.info(f"Content Generation Agent started. Address: {content_generation_agent.address}")
+    Raises ValueError (StructuredOutputError) if it holds no usable post at all.
+    """
+    posts = [post for post in parse_json_list(response_text) if isinstance(post, dict)]
+    by_day = {post.get("day"): post for post in posts}
+    read_content = text_item("content")
+
+    contents = []
+    for index, day in enumerate(request.days):
+        # Match on the day the model echoed back, falling back to the position in the list
+        post = by_day.get(day) or (posts[index] if index < len(posts) else None)
+        contents.append(read_content(post) if post is not None else None)
+    if not any(contents):
+        raise StructuredOutputError("No posts in the batch response")
+    return contents
+
+def add_startup_handler(agent: Agent):
+    @agent.on_event("startup")
+    async def initialize(ctx: Context):
+        await fund_agent(agent)
+        ctx.logger.info(f"Content Generation Agent started. Address: {agent.address}")
+
+def create_content_worker(index: int) -> Agent:
+    """
+    Build one content generation worker.
 
-@content_generation_agent.on_message(model=ContentRequest)
+    Args:
+    index (int): Worker number; 0 is content_generation_agent, the others get their own seed and port.
+
+    Returns:
+    Agent: The worker, with the content handlers included.
+    """
+    if index == 0:
+        return content_generation_agent
+    port = Config.CONTENT_WORKER_BASE_PORT + index
+    worker = Agent(
+        name=f"content_generation_agent_{index}",
+        seed=f"{Config.CONTENT_GENERATION_AGENT_SEED}_{index}",
+        port=port,
+        endpoint=[f"http://127.0.0.1:{port}/submit"]
+    )
+    add_startup_handler(worker)
+    worker.include(content_protocol)
+    worker.include(metrics_protocol)
+    return worker
+
+@content_protocol.on_message(model=ContentRequest)
+@instrument()
 async def handle_content_request(ctx: Context, sender: str, msg: ContentRequest):
-    ctx.logger.info(f"Received content request from {sender}: {msg}")
-    
+    # Generate in the background so the other days of the week run concurrently
+    run_in_background(renewing_lease(ctx, sender, msg.request_id, generate_and_reply(ctx, sender, msg)))
+
+async def renewing_lease(ctx: Context, sender: str, request_id: Optional[str], work: Awaitable[None]):
+    """Run `work`, renewing the coordinator's lease on its request meanwhile so a slow LLM call is not redelivered."""
+    async def renew():
+        while True:
+            await asyncio.sleep(Config.CONTENT_LEASE_RENEW_INTERVAL)
+            await ctx.send(sender, LeaseRenewal(request_id=request_id))
+
+    renewer = asyncio.ensure_future(renew()) if request_id else None
     try:
-        content = await generate_content_with_gemini(msg)
+        await work
+    finally:
+        if renewer is not None:
+            renewer.cancel()
+
+async def generate_and_reply(ctx: Context, sender: str, msg: ContentRequest):
+    try:
+        on_chunk = None
+        if Config.STREAM_CONTENT:
+            chunk_index = 0
+
+            async def send_chunk(text: str):
+                nonlocal chunk_index
+                await ctx.send(sender, ContentChunk(
+                    day=msg.day,
+                    topic=msg.topic,
+                    index=chunk_index,
+                    text=text,
+                    batch_id=msg.batch_id,
+                    session_id=msg.session_id
+                ))
+                chunk_index += 1
+
+            on_chunk = send_chunk
+
+        generated_content = await generate_single(msg, on_chunk)
         ctx.logger.info(f"Generated content for topic: {msg.topic}")
         
         # Send the generated content back to the Main Coordinator Agent
-        generated_content = GeneratedContent(topic=msg.topic, content=content, day=msg.day)
         await ctx.send(sender, generated_content)
     except Exception as e:
         ctx.logger.error(f"Error generating content: {str(e)}")
-        # You might want to send an error message back to the Main Coordinator Agent here
+        # Also acks the work item, so the coordinator neither waits for nor redelivers it
+        await ctx.send(sender, AgentError(
+            stage="content",
+            error=str(e),
+            retryable=is_retryable(e),
+            days=[msg.day],
+            batch_id=msg.batch_id,
+            session_id=msg.session_id,
+            request_id=msg.request_id
+        ))
+
+@content_protocol.on_message(model=ContentBatchRequest)
+@instrument()
+async def handle_content_batch_request(ctx: Context, sender: str, msg: ContentBatchRequest):
+    run_in_background(renewing_lease(ctx, sender, msg.request_id, generate_batch_and_reply(ctx, sender, msg)))
+
+async def generate_batch_and_reply(ctx: Context, sender: str, msg: ContentBatchRequest):
+    try:
+        try:
+            async with generation_slots:
+                batch_contents = await generate_content_batch_with_gemini(msg)
+        except ValueError as e:
+            # The single structured call failed; fall back to one call per post
+            ctx.logger.warning(f"Batch generation failed ({str(e)}), falling back to per-post generation")
+            batch_contents = [None] * len(msg.days)
+
+        # Days the batch response left out get a call of their own
+        requests = [
+            ContentRequest(
+                topic=topic,
+                day=day,
+                area_of_interest=msg.area_of_interest,
+                content_type=msg.content_type,
+                keywords=msg.keywords,
+                batch_id=msg.batch_id,
+                session_id=msg.session_id
+            )
+            for day, topic, content in zip(msg.days, msg.topics, batch_contents)
+            if content is None
+        ]
+        contents = [content for content in batch_contents if content is not None]
+        if requests:
+            if contents:
+                ctx.logger.warning(f"Batch response had no post for {[request.day for request in requests]}, generating them separately")
+            results = await asyncio.gather(*(generate_single(request) for request in requests), return_exceptions=True)
+            contents.extend(result for result in results if isinstance(result, GeneratedContent))
+            contents.sort(key=lambda content: msg.days.index(content.day))
+            failures = [(request.day, result) for request, result in zip(requests, results) if isinstance(result, Exception)]
+            if failures:
+                # Report the days that failed and still deliver the ones that were written
+                error = failures[0][1]
+                ctx.logger.error(f"Error generating content for days {[day for day, _ in failures]}: {str(error)}")
+                await ctx.send(sender, AgentError(
+                    stage="content",
+                    error=str(error),
+                    retryable=is_retryable(error),
+                    days=[day for day, _ in failures],
+                    batch_id=msg.batch_id,
+                    session_id=msg.session_id,
+                    request_id=None if contents else msg.request_id
+                ))
+                if not contents:
+                    return
+        ctx.logger.info(f"Generated batch content for days: {[content.day for content in contents]}")
+
+        await ctx.send(sender, GeneratedContentBatch(contents=contents, batch_id=msg.batch_id, session_id=msg.session_id, request_id=msg.request_id))
+    except Exception as e:
+        ctx.logger.error(f"Error generating batch content: {str(e)}")
+        await ctx.send(sender, AgentError(
+            stage="content",
+            error=str(e),
+            retryable=is_retryable(e),
+            days=list(msg.days),
+            batch_id=msg.batch_id,
+            session_id=msg.session_id,
+            request_id=msg.request_id
+        ))
+
+async def generate_single(request: ContentRequest, on_chunk: Optional[Callable[[str], Awaitable[None]]] = None) -> GeneratedContent:
+    async with generation_slots:
+        content = await generate_content_with_gemini(request, on_chunk)
+    return GeneratedContent(
+        topic=request.topic,
+        content=content,
+        day=request.day,
+        batch_id=request.batch_id,
+        session_id=request.session_id,
+        request_id=request.request_id
+    )
+
+add_startup_handler(content_generation_agent)
+content_generation_agent.include(content_protocol)
+content_generation_agent.include(metrics_protocol)
 
 if __name__ == "__main__":
-    content_generation_agent.run()
\ No newline at end of file
+    create_content_worker(Config.CONTENT_WORKER_INDEX).run()
\ No newline at end of file
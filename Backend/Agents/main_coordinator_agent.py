@@ -1,14 +1,14 @@
 from uagents import Agent, Context, Model
-from uagents.setup import fund_agent_if_low
-from uagents.query import query
-from Backend.models import UserInput, Schedule, ContentRequest, GeneratedContent, TopicSuggestion, TopicRequest, StoreData, Feedback, DataResponse, StateResponse, StateRequest
+from Backend.models import UserInput, Schedule, ContentRequest, GeneratedContent, ContentChunk, ContentBatchRequest, GeneratedContentBatch, TopicSuggestion, TopicRequest, AgentError, LeaseRenewal, StoreData, Feedback, DataResponse, StateResponse, StateRequest
 from typing import List, Optional, Dict
+import asyncio
 import os
+import time
+import uuid
 from Backend.config import Config
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from Backend.utils import SessionStore, create_coordinator_storage, publish_event, fund_agent, WorkDispatcher, create_work_queue, project_state, state_etag, etag_matches, instrument, get_metrics, label_key, INTERACTIVE, BACKGROUND, outgoing_payload, CampaignWorkflow, post_step, step_day, SCHEDULE_STEP, TOPICS_STEP, PENDING, ISSUED, DONE, FAILED, COMPLETE
+from Backend.Agents.metrics_protocol import metrics_protocol
+from Backend.Agents.codec_protocol import codec_protocol, introduce
 
 # Main Coordinator Agent
 main_agent = Agent(
@@ -18,181 +18,480 @@ main_agent = Agent(
     endpoint=[f"http://127.0.0.1:{Config.MAIN_COORDINATOR_PORT}/submit"]
 )
 
-# Fund the agent if needed
-fund_agent_if_low(main_agent.wallet.address())
-
-# Define agent endpoints and addresses
-SCHEDULING_AGENT_ENDPOINT = Config.SCHEDULING_AGENT_ENDPOINT
-CONTENT_GENERATION_AGENT_ENDPOINT = Config.CONTENT_GENERATION_AGENT_ENDPOINT
-TOPIC_SUGGESTION_AGENT_ENDPOINT = Config.TOPIC_SUGGESTION_AGENT_ENDPOINT
-STORAGE_AGENT_ENDPOINT = Config.STORAGE_AGENT_ENDPOINT
+# Campaign state, one entry per session id, backed by an append-only store
+sessions = SessionStore(storage=create_coordinator_storage())
+# The steps of each campaign, checkpointed with its session so a restart re-sends only what was outstanding
+workflow = CampaignWorkflow(sessions)
 
-SCHEDULING_AGENT_ADDRESS = Config.SCHEDULING_AGENT_ADDRESS
-CONTENT_GENERATION_AGENT_ADDRESS = Config.CONTENT_GENERATION_AGENT_ADDRESS
-TOPIC_SUGGESTION_AGENT_ADDRESS = Config.TOPIC_SUGGESTION_AGENT_ADDRESS
-STORAGE_AGENT_ADDRESS = Config.STORAGE_AGENT_ADDRESS
+# Content requests queued for the pool of content generation workers
+content_dispatcher = WorkDispatcher(create_work_queue())
+CONTENT_REQUEST_MODELS = {"single": ContentRequest, "batch": ContentBatchRequest}
 
-# Define Models for State Request and Response
-class StateRequest(Model):
-    request_type: str = "get_state"
+metrics = get_metrics()
+metrics.gauge("coordinator_sessions", "Campaigns held by the coordinator", callback=lambda: len(sessions))
+RESUME_SECONDS = metrics.histogram("coordinator_resume_seconds", "Time from coordinator startup until restored campaigns were resumed")
+REISSUED_REQUESTS = metrics.counter("coordinator_requests_reissued_total", "Requests sent again after a restart, by step")
+metrics.gauge("content_queue_pending", "Content requests waiting for a worker", callback=lambda: content_dispatcher.queue.pending_count())
+metrics.gauge("content_queue_inflight", "Content requests leased to a worker", callback=lambda: content_dispatcher.queue.inflight_count())
+metrics.gauge("content_worker_inflight", "Content requests in flight, by worker", callback=lambda: {
+    label_key({"worker": worker}): stats["inflight"] for worker, stats in content_dispatcher.stats()["workers"].items()
+})
+metrics.gauge("content_worker_completed", "Content requests completed, by worker", callback=lambda: {
+    label_key({"worker": worker}): stats["completed"] for worker, stats in content_dispatcher.stats()["workers"].items()
+})
 
-class StateResponse(Model):
-    user_input: Optional[dict]
-    schedule: Optional[dict]
-    generated_content: List[dict]
-    suggested_topics: Optional[List[str]]
+def content_worker_addresses() -> List[str]:
+    return Config.CONTENT_GENERATION_AGENT_ADDRESSES or [Config.CONTENT_GENERATION_AGENT_ADDRESS]
 
 @main_agent.on_event("startup")
 async def initialize(ctx: Context):
-    ctx.storage.set("user_input", None)
-    ctx.storage.set("schedule", None)
-    ctx.storage.set("generated_content", [])
-    ctx.storage.set("suggested_topics", [])
+    await fund_agent(main_agent)
+    started = time.perf_counter()
+    restored = sessions.restore()
+    ctx.logger.info(f"Restored {restored} sessions in {(time.perf_counter() - started) * 1000:.1f}ms")
+    content_dispatcher.set_workers(content_worker_addresses())
+    ctx.logger.info(f"Dispatching content to {len(content_dispatcher.workers)} workers ({content_dispatcher.strategy})")
+    await introduce(ctx, Config.STORAGE_AGENT_ADDRESS)
+    reissued = await resume_campaigns(ctx)
+    RESUME_SECONDS.observe(time.perf_counter() - started)
+    ctx.logger.info(
+        f"Resumed {restored} campaigns in {(time.perf_counter() - started) * 1000:.1f}ms, "
+        f"sending {reissued} outstanding requests again"
+    )
     ctx.logger.info(f"Main Coordinator Agent started. Address: {main_agent.address}")
 
+@main_agent.on_event("shutdown")
+async def shutdown(ctx: Context):
+    sessions.storage.close()
+
+@main_agent.on_interval(period=Config.COORDINATOR_COMPACTION_INTERVAL)
+async def compact_storage(ctx: Context):
+    if sessions.compact():
+        ctx.logger.info(f"Compacted coordinator storage for {len(sessions)} sessions")
+
+@main_agent.on_interval(period=Config.SESSION_EVICTION_INTERVAL)
+async def evict_idle_sessions(ctx: Context):
+    evicted = sessions.evict_idle()
+    if evicted:
+        ctx.logger.info(f"Evicted {len(evicted)} idle sessions, {len(sessions)} active")
+
+@main_agent.on_interval(period=Config.CONTENT_LEASE_CHECK_INTERVAL)
+async def redeliver_expired_content(ctx: Context):
+    redelivered, abandoned = content_dispatcher.reap_expired()
+    for item in redelivered:
+        ctx.logger.warning(f"No reply for content request {item['id']}, redelivering (attempt {item['attempts'] + 1})")
+    for item in abandoned:
+        ctx.logger.error(f"Giving up on content request {item['id']} after {item['attempts']} attempts")
+        message = item["payload"]["message"]
+        session = sessions.get(message["session_id"])
+        if session is not None:
+            fail_days(ctx, session, message["batch_id"], message.get("days") or [message["day"]])
+    await send_content_assignments(ctx)
+    ctx.logger.debug(f"Content worker stats: {content_dispatcher.stats()}")
+
+def get_session(ctx: Context, session_id: Optional[str], message_type: str, batch_id: Optional[str] = None) -> Optional[dict]:
+    session = sessions.get(session_id) or sessions.get_by_batch(batch_id)
+    if session is None:
+        ctx.logger.warning(f"Ignoring {message_type} for unknown session: {session_id}")
+    return session
+
 @main_agent.on_message(model=UserInput)
+@instrument()
 async def handle_user_input(ctx: Context, sender: str, msg: UserInput):
-    ctx.storage.set("user_input", msg.dict())
-    ctx.logger.info(f"Received user input: {msg}")
+    if not msg.session_id:
+        msg.session_id = str(uuid.uuid4())
+    existing = sessions.get(msg.session_id)
+    if msg.idempotency_key and existing and (existing["user_input"] or {}).get("idempotency_key") == msg.idempotency_key:
+        # A retry of a submission already under way, e.g. after the API gave up waiting for the first reply
+        ctx.logger.info(f"User input for session {msg.session_id} already received")
+        await ctx.send(sender, DataResponse(success=True, data={"session_id": msg.session_id}, message="User input received"))
+        return
+    session = sessions.create(msg.session_id)
+    sessions.set_field(session, "user_input", msg.dict())
     
     # Store user input
     await store_user_input(ctx, msg)
     
-    # Send user input to Scheduling Agent
-    await ctx.send(SCHEDULING_AGENT_ADDRESS, msg)
-    
-    # Request topic suggestions
-    await request_topic_suggestions(ctx)
+    # Scheduling and topic suggestion do not depend on each other, so both start now
+    workflow.advance(session, [SCHEDULE_STEP], ISSUED)
+    await ctx.send(Config.SCHEDULING_AGENT_ADDRESS, msg)
+    await request_topic_suggestions(ctx, session)
+
+    await ctx.send(sender, DataResponse(success=True, data={"session_id": msg.session_id}, message="User input received"))
 
 @main_agent.on_message(model=Schedule)
+@instrument()
 async def handle_schedule(ctx: Context, sender: str, msg: Schedule):
-    ctx.storage.set("schedule", msg.dict())
-    ctx.logger.info(f"Received schedule: {msg}")
+    session = get_session(ctx, msg.session_id, "schedule")
+    if session is None:
+        return
+    if workflow.status(session, SCHEDULE_STEP) in (DONE, FAILED):
+        ctx.logger.info(f"Ignoring duplicate schedule for session {msg.session_id}")
+        return
+    sessions.set_field(session, "schedule", msg.dict())
+    publish_event(msg.session_id, "schedule", msg.dict())
 
     # Store schedule
     await store_schedule(ctx, msg)
 
-    # Generate initial content request for the first scheduled day
-    user_input = ctx.storage.get("user_input")
-    first_day = msg.posting_days[0]
+    # Track the week's content as one batch so we know when it is fully generated
+    batch = start_content_batch(session, msg.posting_days)
+    sessions.set_field(session, "remaining_days", msg.posting_days[1:])
+    workflow.advance(session, [SCHEDULE_STEP], DONE)
 
-    # Create an initial topic using user input
-    initial_topic = f"{user_input['area_of_interest']} - {user_input['content_type']} Update"
+    # The first day uses an initial topic from the user input; the user is waiting for it before giving feedback
+    await request_posts(ctx, session, msg.posting_days[:1], priority=INTERACTIVE)
 
-    content_request = ContentRequest(
-        topic=initial_topic,
-        day=first_day,
-        area_of_interest=user_input["area_of_interest"],
-        content_type=user_input["content_type"],
-        keywords=user_input["keywords"]
-    )
-    await ctx.send(CONTENT_GENERATION_AGENT_ADDRESS, content_request)
-
-    # Store the remaining days for later content generation
-    remaining_days = msg.posting_days[1:]
-    ctx.storage.set("remaining_days", remaining_days)
+    # Start on any remaining days whose topics are already here
+    await release_ready_days(ctx, session)
+    if any(error["stage"] == "topics" for error in session["errors"]):
+        fail_days(ctx, session, batch["batch_id"], session["remaining_days"][len(session["suggested_topics"]):])
 
 @main_agent.on_message(model=GeneratedContent)
+@instrument()
 async def handle_generated_content(ctx: Context, sender: str, msg: GeneratedContent):
-    generated_content = ctx.storage.get("generated_content")
-    generated_content.append(msg.dict())
-    ctx.storage.set("generated_content", generated_content)
-    ctx.logger.info(f"Received generated content: {msg}")
+    # Ack first so a reply for an evicted session still frees its worker slot
+    if not acknowledge_content(ctx, msg.request_id):
+        return
+    await send_content_assignments(ctx)
+    session = get_session(ctx, msg.session_id, "generated content", msg.batch_id)
+    if session is None:
+        return
+    await record_generated_content(ctx, session, msg)
+
+@main_agent.on_message(model=GeneratedContentBatch)
+@instrument()
+async def handle_generated_content_batch(ctx: Context, sender: str, msg: GeneratedContentBatch):
+    # Ack first so a reply for an evicted session still frees its worker slot
+    if not acknowledge_content(ctx, msg.request_id):
+        return
+    await send_content_assignments(ctx)
+    session = get_session(ctx, msg.session_id, "generated content batch", msg.batch_id)
+    if session is None:
+        return
+    for content in msg.contents:
+        await record_generated_content(ctx, session, content)
+
+@main_agent.on_message(model=ContentChunk)
+@instrument()
+async def handle_content_chunk(ctx: Context, sender: str, msg: ContentChunk):
+    # Chunks only feed live streams; the full post still arrives as GeneratedContent
+    if msg.session_id:
+        publish_event(msg.session_id, "content_chunk", msg.dict(), retain=False)
+
+@main_agent.on_message(model=LeaseRenewal)
+@instrument()
+async def handle_lease_renewal(ctx: Context, sender: str, msg: LeaseRenewal):
+    # The worker is alive and still generating; without this a slow LLM call would be redelivered to another worker
+    if not content_dispatcher.renew(msg.request_id):
+        ctx.logger.debug(f"Lease renewal for content request {msg.request_id}, which is no longer in flight")
+
+async def dispatch_content(ctx: Context, request: Model):
+    """Queue a ContentRequest or ContentBatchRequest for the worker pool."""
+    request.request_id = request.request_id or str(uuid.uuid4())
+    kind = "batch" if isinstance(request, ContentBatchRequest) else "single"
+    interactive = getattr(request, "priority", BACKGROUND) == INTERACTIVE
+    content_dispatcher.submit(request.request_id, {"kind": kind, "message": request.dict()}, front=interactive)
+    await send_content_assignments(ctx)
+
+async def send_content_assignments(ctx: Context):
+    assignments = content_dispatcher.assign()
+    await asyncio.gather(*(
+        ctx.send(worker, CONTENT_REQUEST_MODELS[item["payload"]["kind"]](**item["payload"]["message"]))
+        for worker, item in assignments
+    ))
+
+def acknowledge_content(ctx: Context, request_id: Optional[str]) -> bool:
+    """Ack a worker's reply; False for a second reply to a redelivered request, which must not be recorded twice."""
+    if request_id is None or content_dispatcher.ack(request_id):
+        return True
+    ctx.logger.info(f"Ignoring duplicate reply for content request {request_id}")
+    return False
+
+async def record_generated_content(ctx: Context, session: dict, msg: GeneratedContent):
+    sessions.append_item(session, "generated_content", msg.dict())
+    publish_event(session["session_id"], "content", msg.dict())
     
     # Store generated content
     await store_generated_content(ctx, msg)
 
+    workflow.advance(session, [post_step(msg.day)], DONE)
+    if msg.batch_id:
+        record_batch_completion(ctx, session, msg.batch_id, msg.day)
+
+def start_content_batch(session: dict, days: List[str]) -> dict:
+    batch = {
+        "batch_id": str(uuid.uuid4()),
+        "days": list(days),
+        "completed_days": [],
+        "failed_days": [],
+        "started_at": time.time(),
+        "finished_at": None,
+        "elapsed_seconds": None
+    }
+    session["content_batches"][batch["batch_id"]] = batch
+    sessions.set_field(session, "content_batches", session["content_batches"])
+    sessions.set_field(session, "current_batch_id", batch["batch_id"])
+    sessions.index_batch(batch["batch_id"], session["session_id"])
+    return batch
+
+def record_batch_completion(ctx: Context, session: dict, batch_id: str, day: str, failed: bool = False):
+    batch = session["content_batches"].get(batch_id)
+    if batch is None:
+        return
+    failed_days = batch.setdefault("failed_days", [])
+    if day in batch["completed_days"] or day in failed_days:
+        return
+
+    (failed_days if failed else batch["completed_days"]).append(day)
+    if len(batch["completed_days"]) + len(failed_days) == len(batch["days"]):
+        batch["finished_at"] = time.time()
+        batch["elapsed_seconds"] = batch["finished_at"] - batch["started_at"]
+        ctx.logger.info(
+            f"Content batch {batch_id} finished: {len(batch['completed_days'])} posts, {len(failed_days)} failed "
+            f"in {batch['elapsed_seconds']:.2f}s"
+        )
+        publish_event(session["session_id"], "batch_complete", batch)
+    sessions.set_field(session, "content_batches", session["content_batches"])
+
+def fail_days(ctx: Context, session: dict, batch_id: Optional[str], days: List[str]):
+    """Give up on posting days: their steps fail and their batch counts them as finished."""
+    workflow.advance(session, [post_step(day) for day in days], FAILED)
+    if batch_id:
+        for day in days:
+            record_batch_completion(ctx, session, batch_id, day, failed=True)
+
+@main_agent.on_message(model=AgentError)
+@instrument()
+async def handle_agent_error(ctx: Context, sender: str, msg: AgentError):
+    if msg.request_id and acknowledge_content(ctx, msg.request_id):
+        await send_content_assignments(ctx)
+    session = get_session(ctx, msg.session_id, f"{msg.stage} error", msg.batch_id)
+    if session is None:
+        return
+    ctx.logger.error(f"{msg.stage.capitalize()} failed for session {msg.session_id}: {msg.error}")
+
+    # Days left without a topic cannot be generated; if the schedule is not here yet, handle_schedule fails them
+    days = msg.days
+    if msg.stage == "topics":
+        days = session["remaining_days"][len(session["suggested_topics"]):]
+    error = {**msg.dict(), "days": list(days), "failed_at": time.time()}
+    sessions.append_item(session, "errors", error)
+    publish_event(session["session_id"], "failure", error)
+
+    if msg.stage in (SCHEDULE_STEP, TOPICS_STEP):
+        workflow.advance(session, [msg.stage], FAILED)
+    fail_days(ctx, session, msg.batch_id or session["current_batch_id"], days)
+
 @main_agent.on_message(model=TopicSuggestion)
+@instrument()
 async def handle_topic_suggestion(ctx: Context, sender: str, msg: TopicSuggestion):
-    ctx.storage.set("suggested_topics", msg.topics)
-    ctx.logger.info(f"Received topic suggestions: {msg}")
-
-    # Store suggested topics
-    await store_suggested_topics(ctx, msg)
-
-    # Proceed to create content requests for remaining days
-    await create_content_requests_for_remaining_days(ctx)
-
-async def create_content_requests_for_remaining_days(ctx: Context):
-    user_input = ctx.storage.get("user_input")
-    remaining_days = ctx.storage.get("remaining_days")
-    suggested_topics = ctx.storage.get("suggested_topics")
-
-    if user_input and remaining_days and suggested_topics:
-        for day, topic in zip(remaining_days, suggested_topics):
-            content_request = ContentRequest(
-                topic=topic,
-                day=day,
-                area_of_interest=user_input["area_of_interest"],
-                content_type=user_input["content_type"],
-                keywords=user_input["keywords"]
-            )
-            await ctx.send(CONTENT_GENERATION_AGENT_ADDRESS, content_request)
+    session = get_session(ctx, msg.session_id, "topic suggestions")
+    if session is None:
+        return
+    if workflow.status(session, TOPICS_STEP) in (DONE, FAILED):
+        ctx.logger.info(f"Ignoring duplicate topic suggestions for session {msg.session_id}")
+        return
+
+    if msg.final:
+        workflow.advance(session, [TOPICS_STEP], DONE)
+        topics = msg.topics
+        publish_event(msg.session_id, "topics", {"topics": topics})
+        await store_suggested_topics(ctx, msg)
+    else:
+        # One part of a streamed list (STREAM_TOPICS); parts arrive in order
+        topics = session["suggested_topics"][:msg.offset] + msg.topics
+    sessions.set_field(session, "suggested_topics", topics)
+
+    # Final lists may go out as one batch; streamed topics are released one day at a time
+    await release_ready_days(ctx, session, allow_batch=msg.final)
+
+async def release_ready_days(ctx: Context, session: dict, allow_batch: bool = True):
+    """
+    Request content for every remaining day that has both its slot and its topic and was not requested yet.
+
+    Called whenever the schedule or topics arrive, whichever comes last, so each
+    post starts as soon as its inputs exist rather than after a fixed sequence of phases.
+    """
+    if not session["user_input"] or not session["current_batch_id"]:
+        # No schedule yet; topics wait for it
+        return
+
+    dispatched = set(session["dispatched_days"])
+    ready = [
+        day for day in session["remaining_days"][:len(session["suggested_topics"])]
+        if day not in dispatched and workflow.status(session, post_step(day)) == PENDING
+    ]
+    if not ready:
+        return
+    # One LLM call for the rest of the week instead of one per post
+    await request_posts(ctx, session, ready, batch=allow_batch and Config.CONTENT_BATCH_GENERATION and len(ready) > 1)
+    sessions.set_field(session, "dispatched_days", session["dispatched_days"] + ready)
+
+def post_topic(session: dict, day: str) -> str:
+    """The topic of a posting day: a suggested one, or for the first day one made from the user input."""
+    if day in session["remaining_days"]:
+        return session["suggested_topics"][session["remaining_days"].index(day)]
+    user_input = session["user_input"]
+    return f"{user_input['area_of_interest']} - {user_input['content_type']} Update"
+
+async def request_posts(ctx: Context, session: dict, days: List[str], batch: bool = False, priority: str = BACKGROUND,
+                        request_id: Optional[str] = None):
+    """
+    Queue content requests for posting days whose topics are known, one per day or all in one batch.
+
+    Each day's step is checkpointed as issued, with the id of the request carrying
+    it, before the request is queued; resuming after a restart sends it again
+    under the same id, so whichever reply comes first is the one recorded.
+    """
+    user_input = session["user_input"]
+    fields = {
+        "area_of_interest": user_input["area_of_interest"],
+        "content_type": user_input["content_type"],
+        "keywords": user_input["keywords"],
+        "batch_id": session["current_batch_id"],
+        "session_id": session["session_id"]
+    }
+    if batch:
+        request_id = request_id or str(uuid.uuid4())
+        workflow.advance(session, [post_step(day) for day in days], ISSUED, request_id=request_id, priority=priority)
+        await dispatch_content(ctx, ContentBatchRequest(
+            topics=[post_topic(session, day) for day in days], days=days, request_id=request_id, **fields
+        ))
+        return
+
+    # Queue every day at once; the dispatcher spreads them over the workers
+    for day in days:
+        day_request_id = request_id or str(uuid.uuid4())
+        workflow.advance(session, [post_step(day)], ISSUED, request_id=day_request_id, priority=priority)
+        await dispatch_content(ctx, ContentRequest(
+            topic=post_topic(session, day), day=day, priority=priority, request_id=day_request_id, **fields
+        ))
+
+async def resume_campaigns(ctx: Context) -> int:
+    """
+    Pick every restored campaign up where it stopped; returns how many requests were sent again.
+
+    Only steps checkpointed as issued are sent again, except content requests a
+    durable work queue still holds. Posts that had their inputs but were never
+    requested are released as usual.
+    """
+    reissued = 0
+    for session in sessions:
+        if workflow.state(session) == COMPLETE:
+            continue
+        outstanding = workflow.outstanding(session)
+        if SCHEDULE_STEP in outstanding:
+            workflow.advance(session, [SCHEDULE_STEP], ISSUED)
+            await ctx.send(Config.SCHEDULING_AGENT_ADDRESS, UserInput(**session["user_input"]))
+            REISSUED_REQUESTS.inc(step=SCHEDULE_STEP)
+            reissued += 1
+        if TOPICS_STEP in outstanding:
+            sessions.set_field(session, "topics_requested_at", None)
+            await request_topic_suggestions(ctx, session)
+            REISSUED_REQUESTS.inc(step=TOPICS_STEP)
+            reissued += 1
+
+        # Days a lost request was carrying go out again together, under its id
+        lost: Dict[str, List[str]] = {}
+        for step, entry in outstanding.items():
+            day = step_day(step)
+            if day is not None and not content_dispatcher.queue.contains(entry["request_id"]):
+                lost.setdefault(entry["request_id"], []).append(day)
+        for request_id, days in lost.items():
+            priority = outstanding[post_step(days[0])].get("priority", BACKGROUND)
+            await request_posts(ctx, session, days, batch=len(days) > 1, priority=priority, request_id=request_id)
+            REISSUED_REQUESTS.inc(len(days), step="post")
+            reissued += 1
+
+        # A stop right after the schedule arrived can leave its first post unrequested
+        schedule = session["schedule"]
+        if workflow.status(session, SCHEDULE_STEP) == DONE and schedule and session["current_batch_id"]:
+            first_day = schedule["posting_days"][0]
+            if workflow.status(session, post_step(first_day)) == PENDING and first_day not in session["dispatched_days"]:
+                await request_posts(ctx, session, [first_day], priority=INTERACTIVE)
+                reissued += 1
+        await release_ready_days(ctx, session)
+    return reissued
 
 @main_agent.on_message(model=Feedback)
+@instrument()
 async def handle_feedback(ctx: Context, sender: str, msg: Feedback):
-    ctx.logger.info(f"Received feedback: {msg}")
+    session = get_session(ctx, msg.session_id, "feedback")
+    if session is None:
+        await ctx.send(sender, DataResponse(success=False, data=None, message=f"Unknown session: {msg.session_id}"))
+        return
 
     if msg.liked:
         ctx.logger.info("User liked the initial post. Proceeding to generate topics and content for remaining days.")
-        # Request topic suggestions for remaining days
-        await request_topic_suggestions(ctx)
     else:
         ctx.logger.info("User did not like the initial post. Adjusting content generation accordingly.")
-        # Handle accordingly
-        await request_topic_suggestions(ctx)
+    # Topics were requested with the user input; this only sends a request if that never happened
+    await request_topic_suggestions(ctx, session)
+
+    await ctx.send(sender, DataResponse(success=True, data={"session_id": msg.session_id}, message="Feedback received"))
 
-async def request_topic_suggestions(ctx: Context):
-    user_input = ctx.storage.get("user_input")
-    remaining_days = ctx.storage.get("remaining_days")
+async def request_topic_suggestions(ctx: Context, session: dict):
+    user_input = session["user_input"]
+    # Every posting day but the first, which uses the initial topic; known before the schedule is
+    num_topics = user_input["post_frequency"] - 1 if user_input else 0
 
-    if user_input and remaining_days:
+    if session["topics_requested_at"] is not None:
+        # Coalesce: the topics for this session are already on their way
+        ctx.logger.info(f"Topic suggestions for session {session['session_id']} already requested")
+        return
+
+    if user_input and num_topics > 0:
         topic_request = TopicRequest(
             area_of_interest=user_input["area_of_interest"],
             content_type=user_input["content_type"],
             keywords=user_input["keywords"],
-            num_topics=len(remaining_days)
+            num_topics=num_topics,
+            session_id=session["session_id"]
         )
-        await ctx.send(TOPIC_SUGGESTION_AGENT_ADDRESS, topic_request)
+        sessions.set_field(session, "topics_requested_at", time.time())
+        workflow.advance(session, [TOPICS_STEP], ISSUED)
+        await ctx.send(Config.TOPIC_SUGGESTION_AGENT_ADDRESS, topic_request)
+
+async def store_document(ctx: Context, collection: str, data: dict):
+    # Post bodies go by id to a storage agent in this process, packed to one elsewhere that reads a compact codec
+    await introduce(ctx, Config.STORAGE_AGENT_ADDRESS)
+    store_request = StoreData(collection=collection, **outgoing_payload(data, Config.STORAGE_AGENT_ADDRESS))
+    await ctx.send(Config.STORAGE_AGENT_ADDRESS, store_request)
 
 async def store_user_input(ctx: Context, user_input: UserInput):
-    store_request = StoreData(
-        collection="user_inputs",
-        data=user_input.dict()
-    )
-    await ctx.send(STORAGE_AGENT_ADDRESS, store_request)
+    await store_document(ctx, "user_inputs", user_input.dict())
 
 async def store_schedule(ctx: Context, schedule: Schedule):
-    store_request = StoreData(
-        collection="schedules",
-        data=schedule.dict()
-    )
-    await ctx.send(STORAGE_AGENT_ADDRESS, store_request)
+    await store_document(ctx, "schedules", schedule.dict())
 
 async def store_generated_content(ctx: Context, content: GeneratedContent):
-    store_request = StoreData(
-        collection="generated_content",
-        data=content.dict()
-    )
-    await ctx.send(STORAGE_AGENT_ADDRESS, store_request)
+    await store_document(ctx, "generated_content", content.dict())
 
 async def store_suggested_topics(ctx: Context, topics: TopicSuggestion):
-    store_request = StoreData(
-        collection="suggested_topics",
-        data=topics.dict()
-    )
-    await ctx.send(STORAGE_AGENT_ADDRESS, store_request)
+    await store_document(ctx, "suggested_topics", topics.dict())
 
-@main_agent.on_query(model=StateRequest, replies={StateResponse})
+@main_agent.on_query(model=StateRequest)
+@instrument()
 async def get_current_state(ctx: Context, sender: str, msg: StateRequest):
-    state = StateResponse(
-        user_input=ctx.storage.get("user_input"),
-        schedule=ctx.storage.get("schedule"),
-        generated_content=ctx.storage.get("generated_content"),
-        suggested_topics=ctx.storage.get("suggested_topics")
-    )
+    session = sessions.get(msg.session_id)
+    if session is None:
+        state = StateResponse(generated_content=[], suggested_topics=[], content_batches=[], errors=[], session_id=msg.session_id)
+    else:
+        etag = state_etag(sessions.epoch, session, msg.fields, msg.content_view, msg.limit, msg.cursor)
+        if etag_matches(etag, msg.if_none_match):
+            # Nothing changed since the client's last poll: skip building the payload
+            state = StateResponse(session_id=msg.session_id, etag=etag, not_modified=True)
+        else:
+            try:
+                state = StateResponse(etag=etag, **project_state(session, msg.fields, msg.content_view, msg.limit, msg.cursor))
+            except ValueError as e:
+                state = StateResponse(session_id=msg.session_id, errors=[{"stage": "state", "error": str(e)}])
     # Send the state back to the requester
     await ctx.send(sender, state)
 
+main_agent.include(metrics_protocol)
+main_agent.include(codec_protocol)
+
 if __name__ == "__main__":
-    main_agent.run()
+    main_agent.run()
\ No newline at end of file
@@ -0,0 +1,16 @@
+from uagents import Context, Protocol
+from Backend.models import MetricsRequest, MetricsResponse
+from Backend.utils import PROCESS_ID, get_metrics, traces
+
+# Included by every agent so the API can gather metrics from agents running in other processes
+metrics_protocol = Protocol(name="metrics", version="0.1.0")
+
+# No replies= here: once an agent declares any replies, uagents drops every send that is not a declared
+# reply to the message being handled, which would silence the agents' own handlers
+@metrics_protocol.on_query(model=MetricsRequest)
+async def handle_metrics_request(ctx: Context, sender: str, msg: MetricsRequest):
+    await ctx.send(sender, MetricsResponse(
+        process=PROCESS_ID,
+        metrics=get_metrics().snapshot(),
+        spans=traces.get(msg.spans_for) if msg.spans_for else []
+    ))
@@ -4,18 +4,18 @@ import os
 from Backend.config import Config  # Import Config
 
 from uagents import Agent, Context
-from uagents.setup import fund_agent_if_low
-from Backend.models import UserInput, Schedule
-import google.generativeai as genai
+from Backend.models import UserInput, Schedule, AgentError
+from Backend.utils import build_schedule, get_llm_client, get_response_cache, make_cache_key, fund_agent, is_retryable, StructuredOutputError, parse_json_list, parse_weekday, fit_count, get_prompt, instrument, INTERACTIVE
+from Backend.Agents.metrics_protocol import metrics_protocol
+from Backend.utils.scheduler import WEEKDAYS
 from typing import List
-from dotenv import load_dotenv
-import json
 
-# Load environment variables
-load_dotenv()
+# Shared non-blocking LLM client
+llm_client = get_llm_client("scheduling_agent")
+response_cache = get_response_cache()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Compiled prompt template; its version keys the response cache
+schedule_prompt = get_prompt("schedule")
 
 # Scheduling Agent
 scheduling_agent = Agent(
@@ -25,50 +25,64 @@ scheduling_agent = Agent(
     endpoint=[f"http://127.0.0.1:{Config.SCHEDULING_AGENT_PORT}/submit"]
 )
 
-# Fund the agent if needed
-fund_agent_if_low(scheduling_agent.wallet.address())
-
 async def generate_schedule_with_gemini(user_input: UserInput) -> List[str]:
-    prompt = f"""
-    Generate a weekly content posting schedule based on the following preferences:
-    - Area of interest: {user_input.area_of_interest}
-    - Content type: {user_input.content_type}
-    - Keywords: {', '.join(user_input.keywords)}
-    - Post frequency: {user_input.post_frequency} times per week
+    def top_up(days: List[str], missing: int) -> List[str]:
+        # Fill a short answer from the algorithmic schedule rather than discarding it
+        fallback = build_schedule(user_input.post_frequency, content_type=user_input.content_type, preferred_days=user_input.preferred_days)
+        return [day for day in dict.fromkeys(fallback + WEEKDAYS) if day not in days]
 
-    Provide the schedule as a JSON array of days (e.g., ["Monday", "Wednesday", "Friday"]).
-    Ensure the number of days matches the post frequency.
-    """
-    
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(prompt)
-    
-    try:
-        schedule = json.loads(response.text)
-        if isinstance(schedule, list) and len(schedule) == user_input.post_frequency:
-            return schedule
-        else:
-            raise ValueError("Invalid schedule format")
-    except json.JSONDecodeError:
-        raise ValueError("Failed to parse Gemini response as JSON")
+    async def call_llm() -> List[str]:
+        prompt = schedule_prompt.render(
+            area_of_interest=user_input.area_of_interest,
+            content_type=user_input.content_type,
+            keywords=user_input.keywords,
+            post_frequency=user_input.post_frequency
+        )
+        # The first post waits on the schedule, and the user waits on the first post
+        response_text = await llm_client.generate(prompt, session=user_input.session_id, priority=INTERACTIVE)
+        days = list(dict.fromkeys(parse_json_list(response_text, parse_weekday)))
+        if not days:
+            raise StructuredOutputError("No weekdays in the schedule response")
+        return fit_count(days, user_input.post_frequency, fill=top_up)
+
+    cache_key = make_cache_key(
+        "schedule", llm_client.model_name, schedule_prompt.version,
+        keywords=user_input.keywords,
+        area_of_interest=user_input.area_of_interest,
+        content_type=user_input.content_type,
+        post_frequency=user_input.post_frequency
+    )
+    return await response_cache.get_or_generate(cache_key, call_llm)
 
 @scheduling_agent.on_event("startup")
 async def initialize(ctx: Context):
+    await fund_agent(scheduling_agent)
     ctx.logger.info(f"Scheduling Agent started. Address: {scheduling_agent.address}")
 
 @scheduling_agent.on_message(model=UserInput)
+@instrument()
 async def handle_user_input(ctx: Context, sender: str, msg: UserInput):
-    ctx.logger.info(f"Received user input from {sender}: {msg}")
     
     try:
-        schedule = await generate_schedule_with_gemini(msg)
+        if Config.SCHEDULING_MODE == "llm":
+            schedule = await generate_schedule_with_gemini(msg)
+        else:
+            schedule = build_schedule(
+                msg.post_frequency,
+                content_type=msg.content_type,
+                preferred_days=msg.preferred_days,
+                timezone=msg.timezone
+            )
         ctx.logger.info(f"Generated schedule: {schedule}")
         
         # Send the generated schedule back to the Main Coordinator Agent
-        await ctx.send(sender, Schedule(posting_days=schedule))
+        await ctx.send(sender, Schedule(posting_days=schedule, session_id=msg.session_id))
     except Exception as e:
         ctx.logger.error(f"Error generating schedule: {str(e)}")
-        # You might want to send an error message back to the Main Coordinator Agent here
+        # Tell the coordinator so the campaign fails instead of waiting for a schedule
+        await ctx.send(sender, AgentError(stage="schedule", error=str(e), retryable=is_retryable(e), session_id=msg.session_id))
+
+scheduling_agent.include(metrics_protocol)
 
 if __name__ == "__main__":
     scheduling_agent.run()
\ No newline at end of file
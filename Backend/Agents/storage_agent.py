@@ -3,19 +3,13 @@ import os
     
 from Backend.config import Config
 from uagents import Agent, Context
-from uagents.setup import fund_agent_if_low
-from dotenv import load_dotenv
-from pymongo import MongoClient
-from bson import ObjectId
-from Backend.models import StoreData, RetrieveData, UpdateData, DeleteData, DataResponse
+from Backend.models import StoreData, RetrieveData, UpdateData, DeleteData, QueryData, BulkWrite, DataResponse
+from Backend.utils import AsyncMongoStore, create_mongo_client, run_in_background, fund_agent, instrument, incoming_payload
+from Backend.Agents.metrics_protocol import metrics_protocol
+from Backend.Agents.codec_protocol import codec_protocol
 
-# Load environment variables
-load_dotenv()
-
-# MongoDB setup
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGO_URI)
-db = client["createmate"]
+# MongoDB setup: pooled client behind an async, batching store
+store = AsyncMongoStore(create_mongo_client(), Config.DATABASE_NAME)
 
 # Storage Agent
 storage_agent = Agent(
@@ -25,22 +19,31 @@ storage_agent = Agent(
     endpoint=[f"http://127.0.0.1:{Config.STORAGE_AGENT_PORT}/submit"]
 )
 
-# Fund the agent if needed
-fund_agent_if_low(storage_agent.wallet.address())
-
 @storage_agent.on_event("startup")
 async def initialize(ctx: Context):
+    await fund_agent(storage_agent)
+    try:
+        await store.ensure_indexes()
+    except Exception as e:
+        ctx.logger.error(f"Error creating indexes: {str(e)}")
     ctx.logger.info(f"Storage Agent started. Address: {storage_agent.address}")
 
-@storage_agent.on_message(model=StoreData, replies=DataResponse)
+@storage_agent.on_event("shutdown")
+async def shutdown(ctx: Context):
+    await store.close()
+
+@storage_agent.on_message(model=StoreData)
+@instrument()
 async def handle_store_data(ctx: Context, sender: str, msg: StoreData):
-    ctx.logger.info(f"Received store data request from {sender}: {msg}")
+    # Return right away so the next StoreData can join the same insert_many batch
+    run_in_background(store_data(ctx, sender, msg))
+
+async def store_data(ctx: Context, sender: str, msg: StoreData):
     try:
-        collection = db[msg.collection]
-        result = collection.insert_one(msg.data)
+        inserted_id = await store.insert(msg.collection, incoming_payload(msg.data, msg.packed, msg.blobs))
         response = DataResponse(
             success=True,
-            data={"inserted_id": str(result.inserted_id)},
+            data={"inserted_id": inserted_id},
             message="Data stored successfully"
         )
     except Exception as e:
@@ -48,12 +51,11 @@ async def handle_store_data(ctx: Context, sender: str, msg: StoreData):
         response = DataResponse(success=False, message=f"Error storing data: {str(e)}")
     await ctx.send(sender, response)
 
-@storage_agent.on_message(model=RetrieveData, replies=DataResponse)
+@storage_agent.on_message(model=RetrieveData)
+@instrument()
 async def handle_retrieve_data(ctx: Context, sender: str, msg: RetrieveData):
-    ctx.logger.info(f"Received retrieve data request from {sender}: {msg}")
     try:
-        collection = db[msg.collection]
-        result = collection.find_one(msg.query)
+        result = await store.find_one(msg.collection, msg.query)
         if result:
             result["_id"] = str(result["_id"])  # Convert ObjectId to string
             response = DataResponse(success=True, data=result, message="Data retrieved successfully")
@@ -64,12 +66,11 @@ async def handle_retrieve_data(ctx: Context, sender: str, msg: RetrieveData):
         response = DataResponse(success=False, message=f"Error retrieving data: {str(e)}")
     await ctx.send(sender, response)
 
-@storage_agent.on_message(model=UpdateData, replies=DataResponse)
+@storage_agent.on_message(model=UpdateData)
+@instrument()
 async def handle_update_data(ctx: Context, sender: str, msg: UpdateData):
-    ctx.logger.info(f"Received update data request from {sender}: {msg}")
     try:
-        collection = db[msg.collection]
-        result = collection.update_one(msg.query, {"$set": msg.update})
+        result = await store.update_one(msg.collection, msg.query, {"$set": msg.update})
         response = DataResponse(
             success=True,
             data={"modified_count": result.modified_count},
@@ -80,12 +81,11 @@ async def handle_update_data(ctx: Context, sender: str, msg: UpdateData):
         response = DataResponse(success=False, message=f"Error updating data: {str(e)}")
     await ctx.send(sender, response)
 
-@storage_agent.on_message(model=DeleteData, replies=DataResponse)
+@storage_agent.on_message(model=DeleteData)
+@instrument()
 async def handle_delete_data(ctx: Context, sender: str, msg: DeleteData):
-    ctx.logger.info(f"Received delete data request from {sender}: {msg}")
     try:
-        collection = db[msg.collection]
-        result = collection.delete_one(msg.query)
+        result = await store.delete_one(msg.collection, msg.query)
         response = DataResponse(
             success=True,
             data={"deleted_count": result.deleted_count},
@@ -96,5 +96,36 @@ async def handle_delete_data(ctx: Context, sender: str, msg: DeleteData):
         response = DataResponse(success=False, message=f"Error deleting data: {str(e)}")
     await ctx.send(sender, response)
 
+@storage_agent.on_message(model=QueryData)
+@instrument()
+async def handle_query_data(ctx: Context, sender: str, msg: QueryData):
+    try:
+        items, next_cursor = await store.find_page(
+            msg.collection, msg.filter, msg.projection, msg.sort, msg.limit, msg.cursor
+        )
+        response = DataResponse(
+            success=True,
+            data={"items": items, "next_cursor": next_cursor},
+            message=f"Retrieved {len(items)} documents"
+        )
+    except Exception as e:
+        ctx.logger.error(f"Error querying data: {str(e)}")
+        response = DataResponse(success=False, message=f"Error querying data: {str(e)}")
+    await ctx.send(sender, response)
+
+@storage_agent.on_message(model=BulkWrite)
+@instrument()
+async def handle_bulk_write(ctx: Context, sender: str, msg: BulkWrite):
+    try:
+        counts = await store.bulk_write(msg.collection, msg.operations, msg.ordered)
+        response = DataResponse(success=True, data=counts, message="Bulk write completed")
+    except Exception as e:
+        ctx.logger.error(f"Error in bulk write: {str(e)}")
+        response = DataResponse(success=False, message=f"Error in bulk write: {str(e)}")
+    await ctx.send(sender, response)
+
+storage_agent.include(metrics_protocol)
+storage_agent.include(codec_protocol)
+
 if __name__ == "__main__":
     storage_agent.run()
\ No newline at end of file
@@ -4,18 +4,19 @@ import os
 from Backend.config import Config  # Import Config
 
 from uagents import Agent, Context
-from uagents.setup import fund_agent_if_low
-from Backend.models import TopicRequest, TopicSuggestion
-import google.generativeai as genai
-from typing import List
-from dotenv import load_dotenv
+from Backend.models import TopicRequest, TopicSuggestion, AgentError
+from Backend.utils import get_llm_client, get_response_cache, make_cache_key, fund_agent, is_retryable, JsonArrayStreamParser, parse_json_list, text_item, fit_count, get_prompt, instrument, is_near_duplicate, get_metrics
+from Backend.Agents.metrics_protocol import metrics_protocol
+from typing import Awaitable, Callable, List, Optional
 import json
 
-# Load environment variables
-load_dotenv()
+# Shared non-blocking LLM client
+llm_client = get_llm_client("topic_suggestion_agent")
+response_cache = get_response_cache()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Compiled prompt templates; their versions key the response cache
+topics_prompt = get_prompt("topics")
+topics_top_up_prompt = get_prompt("topics_top_up")
 
 # Topic Suggestion Agent
 topic_suggestion_agent = Agent(
@@ -26,51 +27,126 @@ topic_suggestion_agent = Agent(
 
 )
 
-# Fund the agent if needed
-fund_agent_if_low(topic_suggestion_agent.wallet.address())
+# Topics come back as strings, or as objects with a "topic" key
+read_topic = text_item("topic")
 
-async def generate_topics_with_gemini(request: TopicRequest) -> List[str]:
-    prompt = f"""
-    Generate a list of {request.num_topics} engaging and trending topic suggestions for content creation based on the following:
-    - Area of interest: {request.area_of_interest}
-    - Content type: {request.content_type}
-    - Keywords: {', '.join(request.keywords)}
+topics_rejected = get_metrics().counter("topics_rejected_total", "Suggested topics dropped as near-duplicates of another in the batch")
 
-    Consider current trends and popular discussions in this area. Each topic should be specific, interesting, and relevant to the given parameters.
+def add_new_topics(topics: List[str], candidates: List[str], limit: int) -> List[str]:
+    """Append the candidates not already in `topics` (or reworded from one), up to `limit` in total; returns the ones added."""
+    added = []
+    for topic in candidates:
+        if len(topics) >= limit:
+            break
+        if topic in topics:
+            continue
+        if is_near_duplicate(topic, topics):
+            topics_rejected.inc()
+            continue
+        topics.append(topic)
+        added.append(topic)
+    return added
 
-    Provide the topics as a JSON array of strings.
-    """
+def fallback_topics(request: TopicRequest, topics: List[str], missing: int) -> List[str]:
+    """Topics built from the keywords, for when the LLM still came up short."""
+    candidates = [f"{keyword.strip().title()} in {request.area_of_interest}" for keyword in request.keywords if keyword.strip()]
+    candidates += [f"{request.area_of_interest}: {request.content_type} idea {index}" for index in range(1, request.num_topics + 1)]
+    return [topic for topic in dict.fromkeys(candidates) if topic not in topics][:missing]
 
-    
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(prompt)
-    
-    try:
-        topics = json.loads(response.text)
-        if isinstance(topics, list) and len(topics) == 10:
-            return topics
+async def top_up_topics(request: TopicRequest, topics: List[str]) -> List[str]:
+    """Ask once more for the topics a short response was missing."""
+    prompt = topics_top_up_prompt.render(
+        missing=request.num_topics - len(topics),
+        content_type=request.content_type,
+        area_of_interest=request.area_of_interest,
+        keywords=request.keywords,
+        existing=json.dumps(topics)
+    )
+    return add_new_topics(topics, parse_json_list(await llm_client.generate(prompt, session=request.session_id), read_topic), request.num_topics)
+
+async def generate_topics_with_gemini(request: TopicRequest, on_topics: Optional[Callable[[List[str]], Awaitable[None]]] = None) -> List[str]:
+    async def call_llm() -> List[str]:
+        nonlocal on_topics
+        prompt = topics_prompt.render(
+            num_topics=request.num_topics,
+            area_of_interest=request.area_of_interest,
+            content_type=request.content_type,
+            keywords=request.keywords
+        )
+        topics: List[str] = []
+        if on_topics is None:
+            add_new_topics(topics, parse_json_list(await llm_client.generate(prompt, session=request.session_id), read_topic), request.num_topics)
         else:
-            raise ValueError("Invalid topic list format")
-    except json.JSONDecodeError:
-        raise ValueError("Failed to parse Gemini response as JSON")
+            # Pass each topic on as soon as it is complete, so content for it can start early
+            parser = JsonArrayStreamParser(read_topic)
+            async for chunk in llm_client.stream(prompt, session=request.session_id):
+                added = add_new_topics(topics, parser.feed(chunk), request.num_topics)
+                if added:
+                    await on_topics(added)
+            remaining = parser.close()
+            if parser.diverged:
+                # The streamed array was not the answer: start over from the one parse_json_list picks;
+                # the final TopicSuggestion replaces the parts already sent
+                topics = []
+                on_topics = None
+            added = add_new_topics(topics, remaining, request.num_topics)
+            if added and on_topics is not None:
+                await on_topics(added)
+
+        if len(topics) < request.num_topics:
+            try:
+                added = await top_up_topics(request, topics)
+            except Exception:
+                # Keep what the first response gave us; the keyword topics below fill the gap
+                added = []
+            if added and on_topics is not None:
+                await on_topics(added)
+        missing = request.num_topics - len(topics)
+        topics = fit_count(topics, request.num_topics, fill=lambda chosen, count: fallback_topics(request, chosen, count))
+        if missing > 0 and on_topics is not None:
+            await on_topics(topics[-missing:])
+        return topics
+
+    cache_key = make_cache_key(
+        "topics", llm_client.model_name, topics_prompt.version,
+        keywords=request.keywords,
+        area_of_interest=request.area_of_interest,
+        content_type=request.content_type,
+        num_topics=request.num_topics
+    )
+    return await response_cache.get_or_generate(cache_key, call_llm)
 
 @topic_suggestion_agent.on_event("startup")
 async def initialize(ctx: Context):
+    await fund_agent(topic_suggestion_agent)
     ctx.logger.info(f"Topic Suggestion Agent started. Address: {topic_suggestion_agent.address}")
 
 @topic_suggestion_agent.on_message(model=TopicRequest)
+@instrument()
 async def handle_topic_request(ctx: Context, sender: str, msg: TopicRequest):
-    ctx.logger.info(f"Received topic request from {sender}: {msg}")
     
     try:
-        topics = await generate_topics_with_gemini(msg)
+        on_topics = None
+        if Config.STREAM_TOPICS:
+            sent = 0
+
+            async def send_topics(topics: List[str]):
+                nonlocal sent
+                await ctx.send(sender, TopicSuggestion(topics=topics, offset=sent, final=False, session_id=msg.session_id))
+                sent += len(topics)
+
+            on_topics = send_topics
+
+        topics = await generate_topics_with_gemini(msg, on_topics)
         ctx.logger.info(f"Generated topic suggestions: {topics}")
         
         # Send the generated topics back to the Main Coordinator Agent
-        await ctx.send(sender, TopicSuggestion(topics=topics))
+        await ctx.send(sender, TopicSuggestion(topics=topics, session_id=msg.session_id))
     except Exception as e:
         ctx.logger.error(f"Error generating topic suggestions: {str(e)}")
-        # You might want to send an error message back to the Main Coordinator Agent here
+        await ctx.send(sender, AgentError(stage="topics", error=str(e), retryable=is_retryable(e), session_id=msg.session_id))
+
+topic_suggestion_agent.include(metrics_protocol)
 
 if __name__ == "__main__":
     topic_suggestion_agent.run()
\ No newline at end of file
@@ -1,6 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from Backend.config import Config
+from .gateway import create_gateway, register_local_agent
 from .routes import router
 
-app = FastAPI(title="CreateMate API", description="API for the CreateMate content scheduling and generation system")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own one gateway to the agents for the lifetime of the API process."""
+    agent_task = None
+    if Config.GATEWAY_MODE == "local" and not getattr(app.state, "agents_in_process", False):
+        # Run the coordinator on this event loop so API queries skip the HTTP hop
+        import asyncio
+        from Backend.Agents.main_coordinator_agent import main_agent
+
+        register_local_agent(main_agent)
+        agent_task = asyncio.create_task(main_agent.run_async())
+
+    gateway = create_gateway(Config.GATEWAY_MODE)
+    await gateway.start()
+    app.state.gateway = gateway
+    try:
+        yield
+    finally:
+        await gateway.close()
+        if agent_task is not None:
+            agent_task.cancel()
+
+app = FastAPI(title="CreateMate API", description="API for the CreateMate content scheduling and generation system", lifespan=lifespan)
 
 app.include_router(router)
\ No newline at end of file
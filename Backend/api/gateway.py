@@ -0,0 +1,174 @@
+# Backend/api/gateway.py
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from uagents import Agent, Model
+from uagents.crypto import Identity
+from uagents.envelope import Envelope
+
+from Backend.config import Config
+
+
+class IdentityPool:
+    """
+    Reusable signing identities for outgoing queries.
+
+    An agent matches a synchronous reply to its query by the sender address, so
+    two queries in flight must not share an identity. Identities are generated
+    on demand and returned to the pool once their query completes, so key
+    generation is paid once per concurrent slot rather than once per request.
+    """
+
+    def __init__(self):
+        self._free: List[Identity] = []
+
+    def acquire(self) -> Identity:
+        return self._free.pop() if self._free else Identity.generate()
+
+    def release(self, identity: Identity):
+        self._free.append(identity)
+
+
+class AgentGateway:
+    """Long-lived channel from the API process to the agents, owned by the app lifespan."""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def query(self, destination: str, message: Model, timeout: float = Config.GATEWAY_TIMEOUT) -> Dict[str, Any]:
+        """Send `message` to `destination` and return the decoded reply payload."""
+        raise NotImplementedError
+
+
+class HttpGateway(AgentGateway):
+    """
+    Queries agents over a pooled keep-alive HTTP session.
+
+    Endpoints are resolved once per destination and each request is tagged with
+    its own correlation id (the envelope session), so many queries can be in
+    flight over the same connection pool.
+    """
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None, max_connections: int = Config.GATEWAY_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._endpoints: Dict[str, str] = {address: endpoint for address, endpoint in (endpoints or {}).items() if address}
+        self._identities = IdentityPool()
+        self._session = None
+
+    async def start(self):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _resolve(self, destination: str) -> str:
+        endpoint = self._endpoints.get(destination)
+        if endpoint is None:
+            from uagents.resolver import GlobalResolver
+
+            _, endpoints = await GlobalResolver().resolve(destination)
+            if not endpoints:
+                raise RuntimeError(f"Unable to resolve an endpoint for {destination}")
+            endpoint = endpoints[0]
+            self._endpoints[destination] = endpoint
+        return endpoint
+
+    async def query(self, destination: str, message: Model, timeout: float = Config.GATEWAY_TIMEOUT) -> Dict[str, Any]:
+        import aiohttp
+
+        endpoint = await self._resolve(destination)
+        identity = self._identities.acquire()
+        correlation_id = uuid.uuid4()
+        try:
+            envelope = Envelope(
+                version=1,
+                sender=identity.address,
+                target=destination,
+                session=correlation_id,
+                schema_digest=Model.build_schema_digest(message),
+                expires=int(time.time() + timeout)
+            )
+            envelope.encode_payload(message.json())
+            envelope.sign(identity)
+
+            async with self._session.post(
+                endpoint,
+                data=envelope.json(),
+                headers={"content-type": "application/json", "x-uagents-connection": "sync"},
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                response.raise_for_status()
+                reply = Envelope.parse_raw(await response.text())
+        finally:
+            self._identities.release(identity)
+
+        if reply.session != correlation_id:
+            raise RuntimeError(f"Reply for {reply.session} does not match query {correlation_id}")
+        return json.loads(reply.decode_payload())
+
+
+class LocalGateway(AgentGateway):
+    """
+    Delivers queries straight into agents running on the same event loop, with no HTTP hop.
+
+    Args:
+    agents (List[Agent]): The in-process agents that can be queried.
+    """
+
+    def __init__(self, agents: List[Agent]):
+        self._agents: Dict[str, Agent] = {agent.address: agent for agent in agents}
+        self._identities = IdentityPool()
+
+    async def query(self, destination: str, message: Model, timeout: float = Config.GATEWAY_TIMEOUT) -> Dict[str, Any]:
+        agent = self._agents.get(destination)
+        if agent is None:
+            raise RuntimeError(f"No in-process agent with address {destination}")
+
+        identity = self._identities.acquire()
+        reply = asyncio.get_running_loop().create_future()
+        # The agent resolves pending queries keyed by sender when a handler replies with ctx.send
+        agent._queries[identity.address] = reply
+        try:
+            await agent.handle_message(identity.address, Model.build_schema_digest(message), message.json(), uuid.uuid4())
+            payload, _ = await asyncio.wait_for(reply, timeout)
+        finally:
+            agent._queries.pop(identity.address, None)
+            self._identities.release(identity)
+        return json.loads(payload)
+
+
+_local_agents: List[Agent] = []
+
+
+def register_local_agent(agent: Agent):
+    """Make an agent running in this process reachable through LocalGateway."""
+    _local_agents.append(agent)
+
+
+def create_gateway(mode: str = Config.GATEWAY_MODE) -> AgentGateway:
+    """
+    Build the gateway for the API process.
+
+    Args:
+    mode (str): "http" to reach agents over HTTP, "local" for agents registered in this process.
+    """
+    if mode == "local":
+        return LocalGateway(_local_agents)
+    if mode == "http":
+        return HttpGateway({
+            Config.MAIN_COORDINATOR_ADDRESS: Config.MAIN_COORDINATOR_ENDPOINT,
+            Config.STORAGE_AGENT_ADDRESS: f"{Config.STORAGE_AGENT_ENDPOINT}/submit"
+        })
+    raise ValueError(f"Unknown gateway mode: {mode}")
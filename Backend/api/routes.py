@@ -1,12 +1,16 @@
 # Backend/api/routes.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from uagents.query import query  # Correct import
+from typing import Any, List, Optional
 from Backend.config import Config  # Ensure Config is correctly imported
-from Backend.models import UserInput, Feedback, StateRequest, StateResponse
+from Backend.models import UserInput, Feedback, StateRequest, QueryData, MetricsRequest
+from Backend.utils import get_event_bus, STATE_FIELDS, CONTENT_VIEWS, PROCESS_ID, get_metrics, traces, render_snapshots, get_idempotency_cache, request_fingerprint, IdempotencyConflict
+import asyncio
+import hmac
 import json
+import uuid
 
 router = APIRouter()
 
@@ -15,80 +19,310 @@ class UserInputRequest(BaseModel):
     content_type: str
     keywords: List[str]
     post_frequency: int
+    preferred_days: Optional[List[str]] = None
+    timezone: Optional[str] = None
+    session_id: Optional[str] = None
 
 class UserInputResponse(BaseModel):
     message: str
+    session_id: Optional[str] = None
 
 class FeedbackRequest(BaseModel):
     liked: bool
     comments: Optional[str]
+    session_id: str
 
-class StateResponse(BaseModel):
-    user_input: Optional[dict]
-    schedule: Optional[dict]
-    generated_content: List[dict]
-    suggested_topics: Optional[List[str]]
+class PageResponse(BaseModel):
+    items: List[dict]
+    next_cursor: Optional[str] = None
 
-class StateRequest(BaseModel):
-    request_type: str = "get_state"
+class EventRequest(BaseModel):
+    session_id: str
+    event: str
+    data: Any
+    retain: bool = True
 
-@router.post("/user-input", response_model=UserInputResponse)
-async def submit_user_input(user_input: UserInputRequest):
+def get_gateway(request: Request):
+    """The agent gateway created in the app lifespan."""
+    return request.app.state.gateway
+
+def request_trace_id(request: Request) -> str:
+    """The caller's X-Trace-Id, or a new one; it follows the request through every agent."""
+    return request.headers.get("x-trace-id") or uuid.uuid4().hex
+
+async def run_idempotent(request: Request, idempotency_key: Optional[str], payload: dict, call) -> JSONResponse:
+    """
+    Run `call` once for every request carrying the same Idempotency-Key and body.
+
+    Requests with the same key share one run while it is in flight, and get its
+    response replayed for IDEMPOTENCY_TTL seconds after. Requests without a key
+    always run on their own: identical bodies may come from different users.
+    `call` returns the response body and headers.
+    """
+    if not idempotency_key:
+        content, headers = await call()
+        return JSONResponse(content=content, headers=headers)
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+    key = f"{request.url.path}:key:{idempotency_key}"
     try:
+        (content, headers), replayed = await get_idempotency_cache().run(key, request_fingerprint(request.url.path, payload), call)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if replayed:
+        headers = {**headers, "Idempotent-Replayed": "true"}
+    return JSONResponse(content=content, headers=headers)
+
+@router.post("/user-input", response_model=UserInputResponse)
+async def submit_user_input(user_input: UserInputRequest, request: Request, idempotency_key: Optional[str] = Header(None)):
+    payload = user_input.dict()
+
+    async def submit():
         # Convert Pydantic model to uAgents Model
-        agent_user_input = UserInput(**user_input.dict())
-        
+        agent_user_input = UserInput(**payload, idempotency_key=idempotency_key)
+        # Every submission starts its own campaign unless the client continues one
+        if agent_user_input.session_id:
+            pass
+        elif idempotency_key:
+            # A retried submission gets the same campaign, so the coordinator can tell it is not a new one
+            agent_user_input.session_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"idempotency:{idempotency_key}:{request_fingerprint(payload)}"))
+        else:
+            agent_user_input.session_id = str(uuid.uuid4())
+        agent_user_input.trace_id = request_trace_id(request)
+
         # Send user input to main coordinator agent
-        response = await query(
-            destination=Config.MAIN_COORDINATOR_ADDRESS,
-            message=agent_user_input,
-            timeout=30.0  # Adjust timeout as needed
-        )
-        
-        # Decode the response
-        data = json.loads(response.decode_payload())
-        return {"message": data.get("message", "User input submitted successfully")}
+        data = await get_gateway(request).query(Config.MAIN_COORDINATOR_ADDRESS, agent_user_input)
+        content = {
+            "message": data.get("message", "User input submitted successfully"),
+            "session_id": agent_user_input.session_id
+        }
+        return content, {"X-Trace-Id": agent_user_input.trace_id}
+
+    try:
+        return await run_idempotent(request, idempotency_key, payload, submit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/feedback", response_model=UserInputResponse)
-async def submit_feedback(feedback: FeedbackRequest):
-    try:
+async def submit_feedback(feedback: FeedbackRequest, request: Request, idempotency_key: Optional[str] = Header(None)):
+    payload = feedback.dict()
+
+    async def submit():
         # Convert Pydantic model to uAgents Model
-        agent_feedback = Feedback(**feedback.dict())
-        
+        agent_feedback = Feedback(**payload, trace_id=request_trace_id(request))
+
         # Send feedback to main coordinator agent
-        response = await query(
-            destination=Config.MAIN_COORDINATOR_ADDRESS,
-            message=agent_feedback,
-            timeout=30.0  # Adjust timeout as needed
-        )
-        
-        # Decode the response
-        data = json.loads(response.decode_payload())
-        return {"message": data.get("message", "Feedback submitted successfully")}
+        data = await get_gateway(request).query(Config.MAIN_COORDINATOR_ADDRESS, agent_feedback)
+        if data.get("success") is False:
+            raise HTTPException(status_code=404, detail=data.get("message"))
+        return {"message": data.get("message", "Feedback submitted successfully"), "session_id": feedback.session_id}, {}
+
+    try:
+        return await run_idempotent(request, idempotency_key, payload, submit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/state", response_model=StateResponse)
-async def get_state():
+@router.get("/state")
+async def get_state(session_id: str, request: Request, fields: Optional[str] = None,
+                    content_view: str = Query("full", alias="content"),
+                    limit: Optional[int] = Query(None, ge=1, le=200), cursor: Optional[str] = Query(None, regex=r"^\d+$"),
+                    if_none_match: Optional[str] = Header(None)):
+    """
+    A session's state. `fields` picks top-level fields (comma-separated), `content`
+    is "full", "summary" or "none" for the post bodies, and `limit`/`cursor` page
+    through generated_content. Responses carry an ETag; a matching If-None-Match
+    gets a 304 without the coordinator building the payload.
+    """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    if field_list and not set(field_list) <= set(STATE_FIELDS):
+        raise HTTPException(status_code=400, detail=f"fields must be among {', '.join(STATE_FIELDS)}")
+    if content_view not in CONTENT_VIEWS:
+        raise HTTPException(status_code=400, detail=f"content must be one of {', '.join(CONTENT_VIEWS)}")
     try:
-        # Create a StateRequest message
-        state_request = StateRequest()
-        
-        # Query the main coordinator agent for the current state
-        response = await query(
-            destination=Config.MAIN_COORDINATOR_ADDRESS,
-            message=state_request,
-            timeout=30.0  # Adjust timeout as needed
+        # Create a StateRequest message scoped to one session
+        state_request = StateRequest(
+            session_id=session_id,
+            fields=field_list,
+            content_view=content_view,
+            limit=limit,
+            cursor=cursor,
+            if_none_match=if_none_match
         )
-        
-        # Decode the response
-        data = json.loads(response.decode_payload())
-        return StateResponse(**data)
+
+        # Query the main coordinator agent for the current state
+        data = await get_gateway(request).query(Config.MAIN_COORDINATOR_ADDRESS, state_request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    etag = data.pop("etag", None)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else {"Cache-Control": "no-store"}
+    if data.pop("not_modified", False):
+        return Response(status_code=304, headers=headers)
+    # Already validated by the agent's model; pass the requested part of the payload through as is
+    keys = set(field_list or STATE_FIELDS) | {"session_id", "content_total", "next_cursor"}
+    return JSONResponse(
+        content={key: value for key, value in data.items() if key in keys or (key == "errors" and value)},
+        headers=headers
+    )
+
+async def query_storage(request: Request, query: QueryData) -> dict:
+    """Run a paginated query on the storage agent and return one page."""
+    try:
+        data = await get_gateway(request).query(Config.STORAGE_AGENT_ADDRESS, query)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if not data.get("success"):
+        # Bad cursors are the caller's fault; anything else is the storage agent's
+        status = 400 if "cursor" in data.get("message", "").lower() else 502
+        raise HTTPException(status_code=status, detail=data.get("message"))
+    return data["data"]
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """Comma-separated field names to an inclusive projection."""
+    if not fields:
+        return None
+    return {field.strip(): 1 for field in fields.split(",") if field.strip()}
+
+@router.get("/campaigns", response_model=PageResponse)
+async def list_campaigns(request: Request, since: Optional[float] = None, until: Optional[float] = None,
+                         limit: int = Query(20, ge=1, le=200), cursor: Optional[str] = None):
+    """Submitted campaigns, newest first, optionally within a created_at range (Unix seconds)."""
+    created_at = {}
+    if since is not None:
+        created_at["$gte"] = since
+    if until is not None:
+        created_at["$lt"] = until
+    return await query_storage(request, QueryData(
+        collection="user_inputs",
+        filter={"created_at": created_at} if created_at else {},
+        sort={"created_at": -1},
+        limit=limit,
+        cursor=cursor
+    ))
+
+@router.get("/campaigns/{session_id}/content", response_model=PageResponse)
+async def list_campaign_content(session_id: str, request: Request, day: Optional[str] = None, fields: Optional[str] = None,
+                                limit: int = Query(20, ge=1, le=200), cursor: Optional[str] = None):
+    """A campaign's generated posts in the order they were stored; `fields` limits what each post returns."""
+    query = {"session_id": session_id}
+    if day:
+        query["day"] = day
+    return await query_storage(request, QueryData(
+        collection="generated_content",
+        filter=query,
+        projection=parse_fields(fields),
+        sort={"created_at": 1},
+        limit=limit,
+        cursor=cursor
+    ))
+
+@router.get("/campaigns/{session_id}/topics", response_model=PageResponse)
+async def list_campaign_topics(session_id: str, request: Request,
+                               limit: int = Query(20, ge=1, le=200), cursor: Optional[str] = None):
+    return await query_storage(request, QueryData(
+        collection="suggested_topics",
+        filter={"session_id": session_id},
+        sort={"created_at": 1},
+        limit=limit,
+        cursor=cursor
+    ))
+
+@router.get("/stream")
+async def stream_events(session_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of a session's schedule, topics and generated content.
+
+    A reconnecting EventSource sends the id of the last event it received as
+    Last-Event-ID; the replay then starts after it instead of from the beginning.
+    """
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def event_stream():
+        with get_event_bus().subscribe(session_id, after=after) as subscription:
+            while True:
+                record = await subscription.get(timeout=Config.SSE_HEARTBEAT_INTERVAL)
+                if record is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"id: {record['id']}\nevent: {record['event']}\ndata: {json.dumps(record['data'])}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/events", include_in_schema=False)
+async def receive_event(event: EventRequest, x_events_token: Optional[str] = Header(None)):
+    """Entry point for events forwarded by a coordinator running in another process; needs EVENTS_TOKEN on both sides."""
+    if not Config.EVENTS_TOKEN:
+        # Otherwise anyone who can reach the API could inject events into any session's stream
+        raise HTTPException(status_code=403, detail="Event forwarding is disabled; set EVENTS_TOKEN to enable it")
+    if not hmac.compare_digest(x_events_token or "", Config.EVENTS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid events token")
+    get_event_bus().publish(event.session_id, event.event, event.data, event.retain)
+    return {"status": "ok"}
+
+def agent_addresses() -> List[str]:
+    addresses = [
+        Config.MAIN_COORDINATOR_ADDRESS,
+        Config.SCHEDULING_AGENT_ADDRESS,
+        Config.TOPIC_SUGGESTION_AGENT_ADDRESS,
+        Config.STORAGE_AGENT_ADDRESS,
+        Config.CONTENT_GENERATION_AGENT_ADDRESS,
+        *Config.CONTENT_GENERATION_AGENT_ADDRESSES
+    ]
+    return list(dict.fromkeys(address for address in addresses if address))
+
+async def gather_metrics(request: Request, spans_for: Optional[str] = None) -> dict:
+    """
+    Metrics snapshots (and the spans of one trace) from this process and every agent
+    that answers, one entry per process: agents sharing a process share its metrics.
+    """
+    processes = {PROCESS_ID: {"metrics": get_metrics().snapshot(), "spans": traces.get(spans_for) if spans_for else []}}
+    gateway = get_gateway(request)
+    replies = await asyncio.gather(*(
+        # The timeout also bounds resolving an address the gateway has not seen yet
+        asyncio.wait_for(gateway.query(address, MetricsRequest(spans_for=spans_for)), Config.METRICS_GATHER_TIMEOUT)
+        for address in agent_addresses()
+    ), return_exceptions=True)
+    for reply in replies:
+        # Agents that are down or not reachable through this gateway are left out
+        if isinstance(reply, dict) and reply.get("process") not in processes:
+            processes[reply["process"]] = {"metrics": reply["metrics"], "spans": reply.get("spans", [])}
+    return processes
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint(request: Request):
+    """Prometheus text exposition of the API's and every agent's metrics."""
+    processes = await gather_metrics(request)
+    return PlainTextResponse(
+        render_snapshots({process: data["metrics"] for process, data in processes.items()}),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, request: Request):
+    """Every recorded span of a trace, in start order, to see a campaign's critical path."""
+    processes = await gather_metrics(request, spans_for=trace_id)
+    spans = sorted(
+        ({**span, "process": process} for process, data in processes.items() for span in data["spans"]),
+        key=lambda span: span["start"]
+    )
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"No spans recorded for trace {trace_id}")
+    started = spans[0]["start"]
+    return {
+        "trace_id": trace_id,
+        "duration": max(span["start"] + span["duration"] for span in spans) - started,
+        "spans": [{**span, "offset": span["start"] - started} for span in spans]
+    }
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
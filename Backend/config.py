@@ -21,6 +21,9 @@ class Config:
     TOPIC_SUGGESTION_AGENT_ADDRESS = os.getenv("TOPIC_SUGGESTION_AGENT_ADDRESS")
     STORAGE_AGENT_ADDRESS = os.getenv("STORAGE_AGENT_ADDRESS")
 
+    # Top up agent wallets from the testnet faucet at startup
+    FUND_AGENTS = os.getenv("FUND_AGENTS", "true").lower() == "true"
+
     # Agent ports
     MAIN_COORDINATOR_PORT = int(os.getenv("MAIN_COORDINATOR_PORT", 8005))
     SCHEDULING_AGENT_PORT = int(os.getenv("SCHEDULING_AGENT_PORT", 8001))
@@ -35,18 +38,142 @@ class Config:
     STORAGE_AGENT_ENDPOINT = f"http://localhost:{STORAGE_AGENT_PORT}"
     MAIN_COORDINATOR_ENDPOINT = f"http://localhost:{MAIN_COORDINATOR_PORT}/submit"
 
+    # Single-process launcher (Backend/launcher.py)
+    BUREAU_PORT = int(os.getenv("BUREAU_PORT", 8006))
+
     
     # API configuration
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", 8000))
+    GATEWAY_MODE = os.getenv("GATEWAY_MODE", "http")  # "http" or "local" (coordinator on the API's event loop)
+    GATEWAY_TIMEOUT = float(os.getenv("GATEWAY_TIMEOUT", 30.0))
+    GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", 100))
 
     # Database configuration
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     DATABASE_NAME = os.getenv("DATABASE_NAME", "createmate")
+    MONGO_BACKEND = os.getenv("MONGO_BACKEND", "pymongo")  # "pymongo" or "mongomock"
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 20))
+
+    # Storage engine configuration
+    STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", 8))
+    STORAGE_BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", 50))
+    STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", 0.05))
 
     # Gemini API configuration
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+
+    # LLM client configuration
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" or "fake"
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+    LLM_THREAD_POOL_SIZE = int(os.getenv("LLM_THREAD_POOL_SIZE", 8))
+
+    # Prompt budgets, in estimated tokens
+    PROMPT_KEYWORD_BUDGET = int(os.getenv("PROMPT_KEYWORD_BUDGET", 60))
+    PROMPT_MAX_KEYWORDS = int(os.getenv("PROMPT_MAX_KEYWORDS", 15))
+    PROMPT_TEXT_BUDGET = int(os.getenv("PROMPT_TEXT_BUDGET", 100))  # Per free-text field such as a topic
+    PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", 2000))  # Larger rendered prompts are logged
+
+    # LLM response cache configuration
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # SQLite file for the on-disk tier; unset keeps the cache in memory only
+    LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 100000))  # Rows kept on disk; 0 for no cap
+    LLM_CACHE_PURGE_INTERVAL = float(os.getenv("LLM_CACHE_PURGE_INTERVAL", 600))  # Seconds between disk tier purges
+
+    # Coordinator session configuration
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 10000))
+    SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", 6 * 60 * 60))
+    SESSION_EVICTION_INTERVAL = float(os.getenv("SESSION_EVICTION_INTERVAL", 60))
+
+    # Coordinator storage configuration
+    COORDINATOR_STORAGE = os.getenv("COORDINATOR_STORAGE", "log")  # "log", "sqlite" or "memory"
+    COORDINATOR_STORAGE_PATH = os.getenv("COORDINATOR_STORAGE_PATH", "coordinator_state")
+    COORDINATOR_STORAGE_SEGMENT_BYTES = int(os.getenv("COORDINATOR_STORAGE_SEGMENT_BYTES", 8 * 1024 * 1024))
+    COORDINATOR_STORAGE_COMPACTION_BYTES = int(os.getenv("COORDINATOR_STORAGE_COMPACTION_BYTES", 64 * 1024 * 1024))
+    COORDINATOR_STORAGE_FSYNC = os.getenv("COORDINATOR_STORAGE_FSYNC", "false").lower() == "true"
+    COORDINATOR_COMPACTION_INTERVAL = float(os.getenv("COORDINATOR_COMPACTION_INTERVAL", 300))
+
+    # Event streaming configuration
+    EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", 200))
+    EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 1000))
+    SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", 15))
+    # Set when the API runs in another process, e.g. http://localhost:8000/events, together with
+    # EVENTS_TOKEN: the API refuses forwarded events unless both sides share a token
+    API_EVENTS_URL = os.getenv("API_EVENTS_URL")
+    EVENTS_TOKEN = os.getenv("EVENTS_TOKEN")
+    # Stream post bodies chunk by chunk while the LLM is still generating them
+    STREAM_CONTENT = os.getenv("STREAM_CONTENT", "false").lower() == "true"
+    # Send topic suggestions to the coordinator one by one as the LLM writes them, so each day's
+    # post starts as soon as its topic exists (those posts are then generated one call each, not batched)
+    STREAM_TOPICS = os.getenv("STREAM_TOPICS", "false").lower() == "true"
+
+    # Scheduling configuration
+    SCHEDULING_MODE = os.getenv("SCHEDULING_MODE", "local")  # "local" (algorithmic) or "llm"
+
+    # Content generation configuration
+    CONTENT_GENERATION_CONCURRENCY = int(os.getenv("CONTENT_GENERATION_CONCURRENCY", 4))
+    # Generate the remaining days of a week in one LLM call instead of one call per post
+    CONTENT_BATCH_GENERATION = os.getenv("CONTENT_BATCH_GENERATION", "true").lower() == "true"
+
+    # Content worker pool: comma-separated worker addresses, defaulting to CONTENT_GENERATION_AGENT_ADDRESS
+    CONTENT_GENERATION_AGENT_ADDRESSES = [address.strip() for address in os.getenv("CONTENT_GENERATION_AGENT_ADDRESSES", "").split(",") if address.strip()]
+    CONTENT_GENERATION_WORKERS = int(os.getenv("CONTENT_GENERATION_WORKERS", 1))  # Workers started by the launcher
+    CONTENT_WORKER_INDEX = int(os.getenv("CONTENT_WORKER_INDEX", 0))  # Which worker `python -m ...content_generation_agent` runs
+    CONTENT_WORKER_BASE_PORT = int(os.getenv("CONTENT_WORKER_BASE_PORT", 8100))  # Worker n > 0 listens on base + n
+    CONTENT_DISPATCH_STRATEGY = os.getenv("CONTENT_DISPATCH_STRATEGY", "least_loaded")  # "least_loaded" or "round_robin"
+    CONTENT_WORKER_CAPACITY = int(os.getenv("CONTENT_WORKER_CAPACITY", 4))  # Requests in flight per worker
+    # Seconds without a reply or a lease renewal before a request is redelivered. Workers renew while they generate,
+    # so this only has to notice a dead worker, not outlast LLM_DEADLINE, admission waits and batch fallbacks
+    CONTENT_LEASE_TIMEOUT = float(os.getenv("CONTENT_LEASE_TIMEOUT", 60))
+    CONTENT_LEASE_RENEW_INTERVAL = float(os.getenv("CONTENT_LEASE_RENEW_INTERVAL", CONTENT_LEASE_TIMEOUT / 3))
+    CONTENT_MAX_ATTEMPTS = int(os.getenv("CONTENT_MAX_ATTEMPTS", 3))
+    CONTENT_LEASE_CHECK_INTERVAL = float(os.getenv("CONTENT_LEASE_CHECK_INTERVAL", 5))
+    WORK_QUEUE_BACKEND = os.getenv("WORK_QUEUE_BACKEND", "memory")  # "memory" or "redis"
+    REDIS_URL = os.getenv("REDIS_URL")  # Unset with the redis backend uses an in-process stand-in
 
     # Other configuration
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
-    RETRY_DELAY = int(os.getenv("RETRY_DELAY", 5))
+    RETRY_DELAY = float(os.getenv("RETRY_DELAY", 5))  # Backoff before the first retry, doubled (with jitter) on each later one
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 30))
+
+    # LLM call resilience
+    LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", 60))  # Seconds a single LLM call may take
+    LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", 180))  # Seconds for an LLM call including every retry
+    LLM_CHUNK_TIMEOUT = float(os.getenv("LLM_CHUNK_TIMEOUT", 30))  # Seconds a streamed response may go without a chunk
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+    # Share of LLM calls made to fail (half of them by hanging) when LLM_BACKEND is "fake"
+    LLM_FAULT_RATE = float(os.getenv("LLM_FAULT_RATE", 0.0))
+
+    # LLM admission: provider rate limits, per model and process, shared fairly between sessions; 0 disables a limit.
+    # With agents in separate processes, give each its share of the quota.
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+    LLM_RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", 10))  # Seconds of either rate usable at once
+    LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", 500))  # Assumed response size until the real one is known
+
+    # Inter-agent payloads: agents agree on a compact codec (CodecHello), JSON otherwise
+    CODEC_ENABLED = os.getenv("CODEC_ENABLED", "true").lower() == "true"
+    CODEC_COMPRESS_THRESHOLD = int(os.getenv("CODEC_COMPRESS_THRESHOLD", 1024))  # Smallest serialized document worth packing
+    BLOB_THRESHOLD = int(os.getenv("BLOB_THRESHOLD", 1024))  # Characters from which a value goes to a same-process peer by id
+    BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", 64 * 1024 * 1024))  # Blobs kept per process, collected ones only while there is room
+
+    # Instrumentation
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))  # Share of campaigns whose INFO events are logged
+    LOG_BODY_CHARS = int(os.getenv("LOG_BODY_CHARS", 120))  # Longest string value written to a log event
+    TRACE_MAX_TRACES = int(os.getenv("TRACE_MAX_TRACES", 500))  # Recent traces whose spans are kept per process
+    METRICS_GATHER_TIMEOUT = float(os.getenv("METRICS_GATHER_TIMEOUT", 2))  # Seconds /metrics waits for each agent
+
+    # Near-duplicate detection for topics and posts
+    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.7))  # Jaccard similarity of a near duplicate
+    SIMILARITY_MAX_ITEMS = int(os.getenv("SIMILARITY_MAX_ITEMS", 100000))  # Posts remembered per process
+    # Serve a cached post written for a near-identical topic (same area, content type and day) instead of calling the LLM.
+    # The post may have been written for another user's campaign, so this is opt-in
+    SIMILARITY_REUSE_CONTENT = os.getenv("SIMILARITY_REUSE_CONTENT", "false").lower() == "true"
+
+    # Idempotency-Key handling on POST /user-input and /feedback
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 3600))  # Seconds a completed request is replayed to retries
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))  # Completed requests remembered by the API
@@ -0,0 +1,158 @@
+# launcher.py
+#
+# Runs all five agents in one uagents Bureau and the FastAPI app on the same
+# event loop. Messages between agents are dispatched in-process and the API
+# reaches the coordinator and storage agent through the LocalGateway.
+#
+# Usage: python -m Backend.launcher [--no-fund] [--llm-backend fake] [--mongo-backend mongomock] [--content-workers 4]
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger("launcher")
+
+AGENT_MODULES = {
+    "main_coordinator": ("Backend.Agents.main_coordinator_agent", "main_agent"),
+    "scheduling_agent": ("Backend.Agents.scheduling_agent", "scheduling_agent"),
+    "content_generation_agent": ("Backend.Agents.content_generation_agent", "content_generation_agent"),
+    "topic_suggestion_agent": ("Backend.Agents.topic_suggestion_agent", "topic_suggestion_agent"),
+    "storage_agent": ("Backend.Agents.storage_agent", "storage_agent")
+}
+
+# Config fields filled from the in-process agents when not set in the environment
+AGENT_ADDRESS_FIELDS = {
+    "main_coordinator": "MAIN_COORDINATOR_ADDRESS",
+    "scheduling_agent": "SCHEDULING_AGENT_ADDRESS",
+    "content_generation_agent": "CONTENT_GENERATION_AGENT_ADDRESS",
+    "topic_suggestion_agent": "TOPIC_SUGGESTION_AGENT_ADDRESS",
+    "storage_agent": "STORAGE_AGENT_ADDRESS"
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run every CreateMate agent and the API in one process")
+    parser.add_argument("--no-fund", action="store_true", help="Skip topping up agent wallets from the testnet faucet")
+    parser.add_argument("--llm-backend", choices=["gemini", "fake"], help="Override LLM_BACKEND")
+    parser.add_argument("--mongo-backend", choices=["pymongo", "mongomock"], help="Override MONGO_BACKEND")
+    parser.add_argument("--content-workers", type=int, help="Override CONTENT_GENERATION_WORKERS")
+    parser.add_argument("--no-api", action="store_true", help="Run only the agents")
+    return parser.parse_args()
+
+
+def apply_overrides(args):
+    """Overrides go into the environment before Backend.config is first imported."""
+    os.environ["GATEWAY_MODE"] = "local"
+    if args.no_fund:
+        os.environ["FUND_AGENTS"] = "false"
+    if args.llm_backend:
+        os.environ["LLM_BACKEND"] = args.llm_backend
+    if args.mongo_backend:
+        os.environ["MONGO_BACKEND"] = args.mongo_backend
+    if args.content_workers:
+        os.environ["CONTENT_GENERATION_WORKERS"] = str(args.content_workers)
+
+
+def load_agents(cold_start: dict) -> dict:
+    """Import every agent module, recording how long each import takes."""
+    agents = {}
+    for name, (module_name, attribute) in AGENT_MODULES.items():
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        agents[name] = getattr(module, attribute)
+        cold_start[name] = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    # Extra content workers share the first worker's handlers
+    from Backend.Agents.content_generation_agent import create_content_worker
+    from Backend.config import Config
+
+    for index in range(1, Config.CONTENT_GENERATION_WORKERS):
+        started = time.perf_counter()
+        agents[f"content_generation_agent_{index}"] = create_content_worker(index)
+        cold_start[f"content_generation_agent_{index}"] = {"import_ms": (time.perf_counter() - started) * 1000}
+    return agents
+
+
+def build_bureau(agents: dict, cold_start: dict, launch_started: float):
+    from uagents import Bureau
+    from Backend.config import Config
+
+    for name, agent in agents.items():
+        field = AGENT_ADDRESS_FIELDS.get(name)
+        if field and not getattr(Config, field):
+            setattr(Config, field, agent.address)
+
+        # Registered after the agent's own startup handler, so it fires once the agent is ready
+        def probe(name):
+            async def record_ready(ctx):
+                cold_start[name]["ready_ms"] = (time.perf_counter() - launch_started) * 1000
+            return record_ready
+
+        agent.on_event("startup")(probe(name))
+
+    if not Config.CONTENT_GENERATION_AGENT_ADDRESSES:
+        Config.CONTENT_GENERATION_AGENT_ADDRESSES = [
+            agent.address for name, agent in agents.items() if name.startswith("content_generation_agent")
+        ]
+
+    bureau = Bureau(port=Config.BUREAU_PORT, endpoint=[f"http://127.0.0.1:{Config.BUREAU_PORT}/submit"])
+    for agent in agents.values():
+        bureau.add(agent)
+    return bureau
+
+
+async def serve(bureau, agents: dict, cold_start: dict, launch_started: float, run_api: bool):
+    tasks = [asyncio.create_task(bureau.run_async())]
+
+    if run_api:
+        import uvicorn
+        from Backend.api import register_local_agent
+        from Backend.config import Config
+
+        started = time.perf_counter()
+        from Backend.main import app
+        cold_start["api"] = {"import_ms": (time.perf_counter() - started) * 1000}
+
+        # The agents already run on this loop; the API must not start its own coordinator
+        app.state.agents_in_process = True
+        for agent in agents.values():
+            register_local_agent(agent)
+
+        server = uvicorn.Server(uvicorn.Config(app, host=Config.API_HOST, port=Config.API_PORT, loop="asyncio"))
+        tasks.append(asyncio.create_task(server.serve()))
+        while not server.started and not tasks[-1].done():
+            await asyncio.sleep(0.01)
+        cold_start["api"]["ready_ms"] = (time.perf_counter() - launch_started) * 1000
+
+    # Give the agents' startup handlers a moment before reporting
+    await asyncio.sleep(0.5)
+    report(cold_start)
+    await asyncio.gather(*tasks)
+
+
+def report(cold_start: dict):
+    logger.info(f"{'component':<26}{'import (ms)':>14}{'ready (ms)':>14}")
+    for name, timings in cold_start.items():
+        ready = timings.get("ready_ms")
+        logger.info(f"{name:<26}{timings['import_ms']:>14.1f}{(f'{ready:.1f}' if ready is not None else 'n/a'):>14}")
+
+
+def main():
+    launch_started = time.perf_counter()
+    args = parse_args()
+    apply_overrides(args)
+
+    from Backend.utils import setup_logging
+
+    setup_logging()
+    cold_start: dict = {}
+    agents = load_agents(cold_start)
+    bureau = build_bureau(agents, cold_start, launch_started)
+    asyncio.run(serve(bureau, agents, cold_start, launch_started, run_api=not args.no_api))
+
+
+if __name__ == "__main__":
+    main()
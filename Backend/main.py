@@ -1,14 +1,9 @@
 # main.py
 
 import uvicorn
-from Backend.api import app, router  # Ensure router is imported
-from Backend.Agents.main_coordinator_agent import main_agent
-from uagents import Bureau
-from fastapi import FastAPI
+from Backend.api import app  # Already has the router and the gateway lifespan
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -18,11 +13,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include your API router
-app.include_router(router)
-
-
-
 if __name__ == "__main__":
     # Run the FastAPI app
     uvicorn.run(app, host="0.0.0.0", port=8000)
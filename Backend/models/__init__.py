@@ -4,14 +4,24 @@ from .models import (
     Schedule,
     ContentRequest,
     GeneratedContent,
+    ContentChunk,
+    ContentBatchRequest,
+    GeneratedContentBatch,
     TopicSuggestion,
     TopicRequest,
+    AgentError,
+    LeaseRenewal,
     StoreData,
     RetrieveData,
     UpdateData,
     DeleteData,
+    QueryData,
+    BulkWrite,
     DataResponse,
     Feedback,
     StateRequest,
-    StateResponse
+    StateResponse,
+    CodecHello,
+    MetricsRequest,
+    MetricsResponse
 )
\ No newline at end of file
@@ -1,67 +1,172 @@
 from uagents import Model
 from typing import List, Optional, Dict, Any
+from Backend.utils.metrics import current_trace_id
 
-class UserInput(Model):
+class TracedModel(Model):
+    """Base of every message: carries the trace id of the campaign it belongs to."""
+    trace_id: Optional[str] = None
+
+    def __init__(self, **data):
+        # Messages created while handling a traced message inherit its trace
+        if data.get("trace_id") is None:
+            data["trace_id"] = current_trace_id()
+        super().__init__(**data)
+
+class UserInput(TracedModel):
     area_of_interest: str
     content_type: str
     keywords: List[str]
     post_frequency: int
+    preferred_days: Optional[List[str]] = None
+    timezone: Optional[str] = None
+    session_id: Optional[str] = None
+    idempotency_key: Optional[str] = None  # Idempotency-Key of the API request, if it had one
 
-class Schedule(Model):
+class Schedule(TracedModel):
     posting_days: List[str]
+    session_id: Optional[str] = None
 
-class ContentRequest(Model):
+class ContentRequest(TracedModel):
     topic: str
     day: str
     area_of_interest: str
     content_type: str
     keywords: List[str]
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None  # Work item id, echoed back as the acknowledgement
+    priority: str = "background"  # "interactive" when the user is waiting on this post
 
-class GeneratedContent(Model):
+class GeneratedContent(TracedModel):
     topic: str
     content: str
     day: str
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
+
+class ContentChunk(TracedModel):
+    day: str
+    topic: str
+    index: int
+    text: str
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+class ContentBatchRequest(TracedModel):
+    topics: List[str]
+    days: List[str]
+    area_of_interest: str
+    content_type: str
+    keywords: List[str]
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
-class TopicSuggestion(Model):
+class GeneratedContentBatch(TracedModel):
+    contents: List[GeneratedContent]
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
+
+class TopicSuggestion(TracedModel):
     topics: List[str]
+    session_id: Optional[str] = None
+    offset: int = 0  # Position of topics[0] in the full list when streamed in parts
+    final: bool = True  # False for a part sent while the rest is still being generated
 
-class TopicRequest(Model):
+class TopicRequest(TracedModel):
     area_of_interest: str
     content_type: str
     keywords: List[str]
     num_topics: int = 1
+    session_id: Optional[str] = None
+
+class LeaseRenewal(TracedModel):
+    request_id: str  # Content request a worker is still generating; extends its lease
+
+class AgentError(TracedModel):
+    stage: str  # "schedule", "topics" or "content"
+    error: str
+    retryable: bool = False
+    days: List[str] = []
+    batch_id: Optional[str] = None
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
-class StateRequest(Model):
+class StateRequest(TracedModel):
     request_type: str = "get_state"
+    session_id: Optional[str] = None
+    fields: Optional[List[str]] = None  # Top-level fields to return; all when not given
+    content_view: str = "full"  # "full", "summary" or "none" for the post bodies
+    limit: Optional[int] = None  # Posts per page of generated_content
+    cursor: Optional[str] = None
+    if_none_match: Optional[str] = None
 
-class StateResponse(Model):
-    user_input: Optional[dict]
-    schedule: Optional[dict]
-    generated_content: List[dict]
-    suggested_topics: Optional[List[str]]
+class StateResponse(TracedModel):
+    user_input: Optional[dict] = None
+    schedule: Optional[dict] = None
+    generated_content: Optional[List[dict]] = None
+    suggested_topics: Optional[List[str]] = None
+    content_batches: Optional[List[dict]] = None
+    errors: Optional[List[dict]] = None
+    session_id: Optional[str] = None
+    content_total: int = 0
+    next_cursor: Optional[str] = None
+    etag: Optional[str] = None
+    not_modified: bool = False  # The client's copy (if_none_match) is current; nothing else is filled in
 
-class StoreData(Model):
+class StoreData(TracedModel):
     collection: str
-    data: Dict[str, Any]
+    data: Dict[str, Any] = {}
+    packed: Optional[str] = None  # `data` encoded with a negotiated codec (Backend.utils.codec) instead
+    blobs: List[str] = []  # Fields of `data` holding a blob store id instead of their value
 
-class RetrieveData(Model):
+class RetrieveData(TracedModel):
     collection: str
     query: Dict[str, Any]
 
-class UpdateData(Model):
+class UpdateData(TracedModel):
     collection: str
     query: Dict[str, Any]
     update: Dict[str, Any]
 
-class DeleteData(Model):
+class DeleteData(TracedModel):
     collection: str
     query: Dict[str, Any]
 
-class DataResponse(Model):
+class QueryData(TracedModel):
+    collection: str
+    filter: Dict[str, Any] = {}
+    projection: Optional[Dict[str, Any]] = None
+    sort: Dict[str, int] = {}  # Field to 1 or -1, in order; _id breaks ties
+    limit: int = 50
+    cursor: Optional[str] = None  # next_cursor of the previous page
+
+class BulkWrite(TracedModel):
+    collection: str
+    operations: List[Dict[str, Any]]  # {"op": "insert" | "update" | "delete", ...}
+    ordered: bool = False
+
+class DataResponse(TracedModel):
     success: bool
     data: Optional[Dict[str, Any]]
     message: str
     
-class Feedback(Model):
+class Feedback(TracedModel):
     liked: bool
     comments: Optional[str]
+    session_id: Optional[str] = None
+
+class CodecHello(TracedModel):
+    process: str  # Sender's PROCESS_ID; peers in the same process can pass large values by reference
+    codecs: List[str]  # Payload codecs the sender reads, most preferred first
+    reply: bool = False  # Whether the receiver should answer with its own hello
+
+class MetricsRequest(TracedModel):
+    spans_for: Optional[str] = None  # Trace id whose spans to return as well
+
+class MetricsResponse(TracedModel):
+    process: str
+    metrics: Dict[str, Any]
+    spans: List[Dict[str, Any]] = []
@@ -1 +1,19 @@
-from .helpers import setup_logging, validate_user_input, format_content
\ No newline at end of file
+from .helpers import setup_logging, validate_user_input, format_content, run_in_background, fund_agent
+from .llm_client import LLMBackend, GeminiBackend, FakeBackend, FaultInjectingBackend, LLMClient, get_llm_client, set_backend
+from .storage_engine import AsyncMongoStore, InsertBatcher, create_mongo_client, INDEXES, encode_cursor, decode_cursor
+from .llm_cache import ResponseCache, make_cache_key, get_response_cache
+from .scheduler import build_schedule, parse_weekday
+from .coordinator_storage import CoordinatorStorage, MemoryStorage, SegmentLogStorage, SQLiteStorage, create_coordinator_storage
+from .session_store import SessionStore
+from .event_bus import EventBus, get_event_bus, publish_event
+from .work_queue import WorkQueue, InProcessWorkQueue, RedisWorkQueue, LocalRedis, WorkDispatcher, create_work_queue
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, TransientLLMError, call_with_retries, get_circuit_breaker, is_retryable
+from .structured_output import StructuredOutputError, JsonArrayStreamParser, extract_json, parse_json_list, text_item, fit_count, iter_json_list
+from .prompts import PromptTemplate, PromptRegistry, get_prompt, estimate_tokens, truncate_to_tokens
+from .state_view import project_state, state_etag, etag_matches, STATE_FIELDS, CONTENT_VIEWS
+from .metrics import MetricsRegistry, Counter, Gauge, Histogram, TraceRecorder, get_metrics, traces, instrument, span, log_event, summarize_message, label_key, render_snapshots, current_trace, current_trace_id, PROCESS_ID
+from .similarity import SimilarityIndex, get_similarity_index, is_near_duplicate, jaccard, shingles
+from .idempotency import IdempotencyCache, IdempotencyConflict, get_idempotency_cache, request_fingerprint
+from .llm_scheduler import LLMScheduler, TokenBucket, Ticket, get_llm_scheduler, INTERACTIVE, BACKGROUND, PRIORITIES
+from .codec import CODECS, pack, unpack, BlobStore, blob_store, PeerCodecs, peer_codecs, outgoing_payload, incoming_payload
+from .workflow import CampaignWorkflow, post_step, step_day, SCHEDULE_STEP, TOPICS_STEP, PENDING, ISSUED, DONE, FAILED, SCHEDULING, GENERATING, COMPLETE, CAMPAIGN_STATES
\ No newline at end of file
@@ -0,0 +1,206 @@
+# Backend/utils/codec.py
+
+import base64
+import hashlib
+import json
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from Backend.config import Config
+from Backend.utils.metrics import PROCESS_ID, get_metrics
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAYLOAD_BYTES = get_metrics().counter("agent_payload_bytes_total", "Bytes of packed agent message payloads, by codec")
+
+# Codecs this process can read and write, most compact first; "json" (the message's own encoding) always works.
+# Each compact codec is a serialization plus a compression: uncompressed, base64 would only make payloads bigger.
+CODECS: List[str] = (["msgpack+zstd"] if msgpack and zstandard else []) + (["msgpack+zlib"] if msgpack else []) + ["json+zlib", "json"]
+
+
+def _serialize(value: Any, family: str) -> bytes:
+    if family == "msgpack":
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _deserialize(data: bytes, family: str) -> Any:
+    if family == "msgpack":
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def pack(value: Any, codec: str, threshold: int = Config.CODEC_COMPRESS_THRESHOLD) -> Optional[str]:
+    """
+    Encode a JSON-compatible value compactly, as a string a uagents Model can carry.
+
+    Args:
+    value (Any): The value, e.g. a document's fields.
+    codec (str): One of CODECS other than "json".
+    threshold (int): Smallest serialized size worth packing.
+
+    Returns:
+    str: "<codec>:<base64 payload>", or None when the value is too small to gain from it.
+    """
+    family, _, compression = codec.partition("+")
+    data = _serialize(value, family)
+    if len(data) < threshold:
+        return None
+    data = zstandard.ZstdCompressor(level=3).compress(data) if compression == "zstd" else zlib.compress(data, 6)
+    PAYLOAD_BYTES.inc(len(data), codec=codec)
+    return f"{codec}:{base64.b64encode(data).decode('ascii')}"
+
+
+def unpack(packed: str) -> Any:
+    """Decode a string made by pack()."""
+    codec, _, payload = packed.partition(":")
+    if codec not in CODECS or codec == "json":
+        raise ValueError(f"Unsupported codec: {codec}")
+    family, _, compression = codec.partition("+")
+    data = base64.b64decode(payload)
+    data = zstandard.ZstdDecompressor().decompress(data) if compression == "zstd" else zlib.decompress(data)
+    return _deserialize(data, family)
+
+
+class BlobStore:
+    """
+    Content-addressed store for large strings passed between agents in the same process.
+
+    The sender puts a string and sends its id; the receiver takes it back out.
+    Holding the string costs only a reference, not a copy. The same string
+    put twice must be taken twice; once it has been, it is still kept while
+    there is room, so a message delivered again (a retry or a redelivery) can
+    take it once more. Beyond `max_bytes` collected strings are dropped first,
+    then those the receiver never collected, oldest first.
+
+    Args:
+    max_bytes (int): Characters held before blobs are evicted.
+    """
+
+    def __init__(self, max_bytes: int = Config.BLOB_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._blobs: "OrderedDict[str, List]" = OrderedDict()  # id -> [text, times put and not yet taken]
+        self._taken: "OrderedDict[str, str]" = OrderedDict()  # id -> text taken as often as it was put
+        self._size = 0
+        self.evicted = 0
+
+    def put(self, text: str) -> str:
+        blob_id = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        entry = self._blobs.get(blob_id)
+        if entry is not None:
+            entry[1] += 1
+            return blob_id
+        if blob_id in self._taken:
+            self._blobs[blob_id] = [self._taken.pop(blob_id), 1]
+            return blob_id
+        self._blobs[blob_id] = [text, 1]
+        self._size += len(text)
+        while self._size > self.max_bytes and self._taken:
+            _, collected = self._taken.popitem(last=False)
+            self._size -= len(collected)
+        while self._size > self.max_bytes and len(self._blobs) > 1:
+            _, (evicted, _) = self._blobs.popitem(last=False)
+            self._size -= len(evicted)
+            self.evicted += 1
+        return blob_id
+
+    def take(self, blob_id: str) -> str:
+        """Return a blob; KeyError if it was never put or has been evicted."""
+        entry = self._blobs.get(blob_id)
+        if entry is None:
+            # Already collected: a second delivery of the same message
+            text = self._taken[blob_id]
+            self._taken.move_to_end(blob_id)
+            return text
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._blobs[blob_id]
+            self._taken[blob_id] = entry[0]
+        return entry[0]
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+blob_store = BlobStore()
+
+
+class PeerCodecs:
+    """
+    What each peer agent told us in its CodecHello: its process and the codecs it reads.
+
+    A peer nothing is known about gets plain JSON, so a message is never sent
+    in a form the receiver cannot read.
+    """
+
+    def __init__(self, hello_interval: float = 30.0):
+        self.hello_interval = hello_interval
+        self._peers: Dict[str, Tuple[str, List[str]]] = {}
+        self._hello_sent: Dict[str, float] = {}
+
+    def learn(self, address: str, process: str, codecs: List[str]):
+        self._peers[address] = (process, list(codecs))
+
+    def needs_hello(self, address: str, now: Optional[float] = None) -> bool:
+        """Whether to (re)send our CodecHello to a peer we know nothing about yet; at most every `hello_interval`."""
+        if not Config.CODEC_ENABLED or address in self._peers:
+            return False
+        now = time.monotonic() if now is None else now
+        if now - self._hello_sent.get(address, float("-inf")) < self.hello_interval:
+            return False
+        self._hello_sent[address] = now
+        return True
+
+    def codec_for(self, address: str) -> str:
+        """The most compact codec both sides support, "json" if none is agreed."""
+        peer = self._peers.get(address)
+        if not Config.CODEC_ENABLED or peer is None:
+            return "json"
+        return next(codec for codec in CODECS if codec in peer[1] or codec == "json")
+
+    def same_process(self, address: str) -> bool:
+        peer = self._peers.get(address)
+        return Config.CODEC_ENABLED and peer is not None and peer[0] == PROCESS_ID
+
+
+peer_codecs = PeerCodecs()
+
+
+def outgoing_payload(data: Dict[str, Any], address: str) -> Dict[str, Any]:
+    """
+    The payload fields of a message carrying `data` to `address`.
+
+    With a peer in the same process, string values of at least BLOB_THRESHOLD
+    characters go through the blob store and only their id is sent, with the
+    names of those fields listed in "blobs". Otherwise, with a compact codec
+    agreed, a document large enough is packed.
+
+    Returns:
+    Dict[str, Any]: {"data": data}, {"data": {...}, "blobs": [...]} or {"data": {}, "packed": "..."}.
+    """
+    if peer_codecs.same_process(address):
+        blobs = [key for key, value in data.items() if isinstance(value, str) and len(value) >= Config.BLOB_THRESHOLD]
+        if not blobs:
+            return {"data": data}
+        return {"data": {**data, **{key: blob_store.put(data[key]) for key in blobs}}, "blobs": blobs}
+    codec = peer_codecs.codec_for(address)
+    packed = pack(data, codec) if codec != "json" else None
+    return {"data": {}, "packed": packed} if packed else {"data": data}
+
+
+def incoming_payload(data: Dict[str, Any], packed: Optional[str] = None, blobs: Optional[List[str]] = None) -> Dict[str, Any]:
+    """The document sent by outgoing_payload(), with packed fields decoded and the fields named in `blobs` collected."""
+    if packed:
+        data = unpack(packed)
+    if not blobs:
+        return dict(data)
+    return {**data, **{key: blob_store.take(data[key]) for key in blobs}}
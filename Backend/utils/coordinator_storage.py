@@ -0,0 +1,281 @@
+# Backend/utils/coordinator_storage.py
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from Backend.config import Config
+
+
+class CoordinatorStorage:
+    """
+    Durable record of coordinator session state.
+
+    State is written as small operations (set a field, append to a list field,
+    delete a session) so that the cost of a write does not depend on how much
+    state has already been stored. `load` rebuilds every session on startup.
+    """
+
+    def set(self, session_id: str, key: str, value: Any):
+        raise NotImplementedError
+
+    def append(self, session_id: str, key: str, item: Any):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, sessions: Dict[str, Dict[str, Any]]):
+        """Replace the stored history with a snapshot of `sessions`."""
+
+    def close(self):
+        pass
+
+
+class MemoryStorage(CoordinatorStorage):
+    """Keeps nothing; sessions live only as long as the process."""
+
+    def set(self, session_id: str, key: str, value: Any):
+        pass
+
+    def append(self, session_id: str, key: str, item: Any):
+        pass
+
+    def delete(self, session_id: str):
+        pass
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+
+def _apply(sessions: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    op, session_id = record["op"], record["session"]
+    if op == "delete":
+        sessions.pop(session_id, None)
+        return
+    session = sessions.setdefault(session_id, {})
+    if op == "set":
+        session[record["key"]] = record["value"]
+    elif op == "append":
+        session.setdefault(record["key"], []).append(record["value"])
+
+
+class SegmentLogStorage(CoordinatorStorage):
+    """
+    Append-only log split into size-bounded segments, plus a compacted snapshot.
+
+    Every write is one JSON line appended to the active segment. Compaction
+    writes the live state to `snapshot.json`, headed by the number of the last
+    segment it covers, and then removes those segments; recovery loads the
+    snapshot and replays only later segments, so segments a crash left behind
+    after the snapshot was written are not applied twice.
+
+    Args:
+    directory (str): Where the snapshot and segments are kept.
+    segment_max_bytes (int): Size at which a new segment is started.
+    compaction_bytes (int): Log size (across segments) that makes compaction worthwhile.
+    fsync (bool): fsync after every write instead of relying on the OS page cache.
+    """
+
+    SNAPSHOT = "snapshot.json"
+
+    def __init__(self, directory: str, segment_max_bytes: int = Config.COORDINATOR_STORAGE_SEGMENT_BYTES,
+                 compaction_bytes: int = Config.COORDINATOR_STORAGE_COMPACTION_BYTES, fsync: bool = Config.COORDINATOR_STORAGE_FSYNC):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compaction_bytes = compaction_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        last = self._segment_number(segments[-1]) if segments else 0
+        # Numbering carries on past the snapshot even when compaction removed every segment
+        self._next_segment = max(last, self._snapshot_through()) + 1
+        self._log_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in segments)
+        self._file = None
+        self._file_bytes = 0
+
+    def _segments(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("segment-") and name.endswith(".log"))
+
+    @staticmethod
+    def _segment_number(name: str) -> int:
+        return int(name[len("segment-"):-len(".log")])
+
+    def _snapshot_through(self) -> int:
+        """Number of the last segment the snapshot covers, read from its header line; 0 without a snapshot."""
+        try:
+            with open(os.path.join(self.directory, self.SNAPSHOT), encoding="utf-8") as snapshot:
+                header = json.loads(snapshot.readline() or "{}")
+        except FileNotFoundError:
+            return 0
+        # A snapshot from before the header was added is a single line of sessions covering nothing
+        return header.get("through_segment", 0) if set(header) == {"through_segment"} else 0
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"segment-{self._next_segment:08d}.log")
+        self._next_segment += 1
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_bytes = 0
+
+    def _write(self, record: Dict[str, Any]):
+        if self._file is None or self._file_bytes >= self.segment_max_bytes:
+            self._open_segment()
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        size = len(line.encode("utf-8"))
+        self._file_bytes += size
+        self._log_bytes += size
+
+    def set(self, session_id: str, key: str, value: Any):
+        self._write({"op": "set", "session": session_id, "key": key, "value": value})
+
+    def append(self, session_id: str, key: str, item: Any):
+        self._write({"op": "append", "session": session_id, "key": key, "value": item})
+
+    def delete(self, session_id: str):
+        self._write({"op": "delete", "session": session_id})
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        sessions: Dict[str, Dict[str, Any]] = {}
+        through = 0
+        snapshot_path = os.path.join(self.directory, self.SNAPSHOT)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as snapshot:
+                header = json.loads(snapshot.readline())
+                if set(header) == {"through_segment"}:
+                    through = header["through_segment"]
+                    sessions = json.loads(snapshot.readline())
+                else:
+                    sessions = header
+        for name in self._segments():
+            if self._segment_number(name) <= through:
+                # Already in the snapshot; left behind by a compaction that stopped before removing it
+                continue
+            with open(os.path.join(self.directory, name), encoding="utf-8") as segment:
+                for line in segment:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn write at the tail of the last segment; everything before it is intact
+                        break
+                    _apply(sessions, record)
+        return sessions
+
+    def needs_compaction(self) -> bool:
+        return self._log_bytes >= self.compaction_bytes
+
+    def compact(self, sessions: Dict[str, Dict[str, Any]]):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        covered = self._segments()
+        through = self._next_segment - 1
+
+        temp_path = os.path.join(self.directory, self.SNAPSHOT + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as snapshot:
+            snapshot.write(json.dumps({"through_segment": through}) + "\n")
+            json.dump(sessions, snapshot, separators=(",", ":"))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temp_path, os.path.join(self.directory, self.SNAPSHOT))
+
+        for name in covered:
+            os.remove(os.path.join(self.directory, name))
+        self._log_bytes = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SQLiteStorage(CoordinatorStorage):
+    """
+    SQLite in WAL mode: fields are upserted and list items are inserted as rows,
+    so appending a post never rewrites the posts before it.
+    """
+
+    def __init__(self, path: str, fsync: bool = Config.COORDINATOR_STORAGE_FSYNC):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_fields (session_id TEXT, key TEXT, value TEXT, PRIMARY KEY (session_id, key))"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_items (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, key TEXT, value TEXT)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS session_items_session ON session_items (session_id)")
+        self._connection.commit()
+
+    def set(self, session_id: str, key: str, value: Any):
+        with self._connection:
+            # A field that is set replaces any items appended to it earlier
+            self._connection.execute("DELETE FROM session_items WHERE session_id = ? AND key = ?", (session_id, key))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO session_fields (session_id, key, value) VALUES (?, ?, ?)",
+                (session_id, key, json.dumps(value))
+            )
+
+    def append(self, session_id: str, key: str, item: Any):
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO session_items (session_id, key, value) VALUES (?, ?, ?)", (session_id, key, json.dumps(item))
+            )
+
+    def delete(self, session_id: str):
+        with self._connection:
+            self._connection.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+            self._connection.execute("DELETE FROM session_items WHERE session_id = ?", (session_id,))
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for session_id, key, value in self._connection.execute("SELECT session_id, key, value FROM session_fields"):
+            sessions.setdefault(session_id, {})[key] = json.loads(value)
+        for session_id, key, value in self._connection.execute("SELECT session_id, key, value FROM session_items ORDER BY id"):
+            field = sessions.setdefault(session_id, {}).setdefault(key, [])
+            field.append(json.loads(value))
+        return sessions
+
+    def needs_compaction(self) -> bool:
+        return True
+
+    def compact(self, sessions: Dict[str, Dict[str, Any]]):
+        # Rows are already the live state; just fold the WAL back into the database file
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self._connection.close()
+
+
+def create_coordinator_storage(backend: str = Config.COORDINATOR_STORAGE,
+                               path: Optional[str] = Config.COORDINATOR_STORAGE_PATH) -> CoordinatorStorage:
+    """
+    Build the coordinator storage backend.
+
+    Args:
+    backend (str): "log" (segment log), "sqlite" or "memory".
+    path (str): Directory for the segment log, or database file for SQLite.
+    """
+    if backend == "log":
+        return SegmentLogStorage(path)
+    if backend == "sqlite":
+        return SQLiteStorage(path if path.endswith(".db") else os.path.join(path, "coordinator.db"))
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Unknown coordinator storage backend: {backend}")
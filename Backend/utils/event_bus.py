@@ -0,0 +1,178 @@
+# Backend/utils/event_bus.py
+
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from Backend.config import Config
+
+
+class Subscription:
+    """One listener's queue of events for a session."""
+
+    def __init__(self, bus: "EventBus", session_id: str, queue: asyncio.Queue):
+        self.bus = bus
+        self.session_id = session_id
+        self.queue = queue
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; returns None if `timeout` passes first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventBus:
+    """
+    In-process publish/subscribe of campaign events, keyed by session id.
+
+    A bounded history of retained events is kept per session so a client that
+    subscribes late still receives everything published so far, or, when it
+    reconnects, everything after the last event it saw. Slow subscribers lose
+    their oldest queued events rather than blocking publishers.
+    """
+
+    def __init__(self, history_size: int = Config.EVENT_HISTORY_SIZE, queue_size: int = Config.EVENT_QUEUE_SIZE,
+                 max_sessions: int = Config.MAX_SESSIONS):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.max_sessions = max_sessions
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+
+    def publish(self, session_id: str, event: str, data: Any, retain: bool = True):
+        """
+        Publish an event to a session's subscribers.
+
+        Args:
+        session_id (str): The campaign the event belongs to.
+        event (str): Event type, e.g. "schedule", "topics", "content".
+        data (Any): JSON-serializable payload.
+        retain (bool): Keep the event for late subscribers; off for high-volume events such as token chunks.
+        """
+        self._last_id = next(self._ids)
+        record = {"id": self._last_id, "event": event, "data": data}
+        if retain:
+            history = self._history.get(session_id)
+            if history is None:
+                history = deque(maxlen=self.history_size)
+                self._history[session_id] = history
+                while len(self._history) > self.max_sessions:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(session_id)
+            history.append(record)
+        for subscription in self._subscribers.get(session_id, ()):
+            self._offer(subscription.queue, record)
+
+    def subscribe(self, session_id: str, replay: bool = True, after: Optional[int] = None) -> Subscription:
+        """
+        Listen to a session's events.
+
+        Args:
+        session_id (str): The campaign to listen to.
+        replay (bool): Start with the session's retained history.
+        after (int): Id of the last event the client already has (SSE Last-Event-ID); only later ones are replayed.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if after is not None and after > self._last_id:
+            # Ids restart with the process; an id from before a restart says nothing about what the client has
+            after = None
+        if replay:
+            for record in self._history.get(session_id, ()):
+                if after is None or record["id"] > after:
+                    self._offer(queue, record)
+        subscription = Subscription(self, session_id, queue)
+        self._subscribers.setdefault(session_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.session_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.session_id]
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, record: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(record)
+
+
+class EventForwarder:
+    """
+    Forwards events over HTTP to the API when it runs in a different process than the coordinator.
+
+    Events are queued and sent in order by a single background task, so
+    publishers never wait on the network.
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, queue_size: int = Config.EVENT_QUEUE_SIZE):
+        self.url = url
+        self.token = token
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._worker: Optional[asyncio.Task] = None
+        self._session = None
+
+    def enqueue(self, payload: Dict[str, Any]):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        EventBus._offer(self._queue, payload)
+
+    async def _run(self):
+        import aiohttp
+
+        headers = {"X-Events-Token": self.token} if self.token else {}
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        while True:
+            payload = await self._queue.get()
+            try:
+                async with self._session.post(self.url, json=payload, headers=headers) as response:
+                    response.raise_for_status()
+            except Exception:
+                # Streaming is best-effort; a lost event must never break the campaign pipeline
+                pass
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_event_bus: Optional[EventBus] = None
+_forwarder: Optional[EventForwarder] = None
+
+
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
+
+
+def publish_event(session_id: str, event: str, data: Any, retain: bool = True):
+    """Publish to the local event bus and, when API_EVENTS_URL is set, to the API process."""
+    global _forwarder
+    get_event_bus().publish(session_id, event, data, retain)
+    if Config.API_EVENTS_URL:
+        if _forwarder is None:
+            _forwarder = EventForwarder(Config.API_EVENTS_URL, Config.EVENTS_TOKEN)
+        _forwarder.enqueue({"session_id": session_id, "event": event, "data": data, "retain": retain})
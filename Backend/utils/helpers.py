@@ -1,7 +1,13 @@
+import asyncio
 import logging
-from typing import List
+from typing import Awaitable, List, Set
 import re
 
+from Backend.config import Config
+
+# Strong references to background tasks so they are not garbage collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
 def setup_logging():
     """Set up logging configuration for the application."""
     logging.basicConfig(
@@ -47,4 +53,39 @@ def format_content(content: str) -> str:
     # Capitalize the first letter of each sentence
     formatted = '. '.join(s.capitalize() for s in formatted.split('. '))
     
-    return formatted.strip()
\ No newline at end of file
+    return formatted.strip()
+
+def run_in_background(coro: Awaitable) -> asyncio.Task:
+    """
+    Schedule a coroutine without awaiting it.
+
+    uAgents dispatches an agent's messages one at a time, so a handler that
+    awaits slow work holds up every message queued behind it. Handlers hand
+    that work to this function and return immediately instead.
+
+    Args:
+    coro (Awaitable): The coroutine to run.
+
+    Returns:
+    asyncio.Task: The scheduled task.
+    """
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def fund_agent(agent) -> None:
+    """
+    Top up an agent's wallet from the testnet faucet when FUND_AGENTS is enabled.
+
+    Runs from the agent's startup handler rather than at import time, and on a
+    worker thread since the faucet call is a blocking network request.
+
+    Args:
+    agent (Agent): The agent to fund.
+    """
+    if not Config.FUND_AGENTS:
+        return
+    from uagents.setup import fund_agent_if_low
+
+    await asyncio.to_thread(fund_agent_if_low, agent.wallet.address())
\ No newline at end of file
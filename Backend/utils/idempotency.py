@@ -0,0 +1,120 @@
+# Backend/utils/idempotency.py
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from Backend.config import Config
+from Backend.utils.metrics import get_metrics, label_key
+
+IDEMPOTENT_REQUESTS = get_metrics().counter(
+    "api_idempotent_requests_total", "POST requests by whether they ran, joined an identical one in flight or were replayed"
+)
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a different request."""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """SHA-256 of the parts of a request that make it the same request (path and body)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Runs each request once per key: concurrent requests with the same key share
+    one run, and its result is replayed to retries for `ttl` seconds.
+
+    The run is a task of its own, so a caller that disconnects or times out
+    does not cancel it for the others. A run that fails is not remembered; the
+    next request with its key runs again.
+
+    Args:
+    ttl (float): Seconds a completed result is replayed.
+    max_entries (int): Completed results kept; the oldest go first.
+    """
+
+    def __init__(self, ttl: float = Config.IDEMPOTENCY_TTL, max_entries: int = Config.IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._completed: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+
+    def _lookup(self, key: str, fingerprint: str) -> Optional[Tuple[Any, bool]]:
+        entry = self._completed.get(key)
+        if entry is not None and entry[0] < time.time():
+            del self._completed[key]
+            entry = None
+        if entry is not None:
+            if entry[1] != fingerprint:
+                raise IdempotencyConflict("Idempotency key was already used for a different request")
+            return entry[2], True
+        return None
+
+    async def run(self, key: str, fingerprint: str, call: Callable[[], Awaitable[Any]],
+                  ttl: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Result of `call()` for `key`, running it only if no run is in flight or remembered.
+
+        Args:
+        key (str): Idempotency key, scoped by the caller (e.g. to the endpoint).
+        fingerprint (str): request_fingerprint of the request; a key reused with another raises IdempotencyConflict.
+        call (Callable[[], Awaitable[Any]]): Produces the result.
+        ttl (float): Seconds to replay the result; 0 only coalesces requests in flight.
+
+        Returns:
+        Tuple[Any, bool]: The result, and whether it came from another request's run.
+        """
+        replay = self._lookup(key, fingerprint)
+        if replay is not None:
+            IDEMPOTENT_REQUESTS.inc(result="replayed")
+            return replay
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            if in_flight[0] != fingerprint:
+                raise IdempotencyConflict("A different request with this idempotency key is in progress")
+            IDEMPOTENT_REQUESTS.inc(result="coalesced")
+            return await asyncio.shield(in_flight[1]), True
+
+        IDEMPOTENT_REQUESTS.inc(result="executed")
+        task = asyncio.ensure_future(self._execute(key, fingerprint, call, self.ttl if ttl is None else ttl))
+        # Retrieve the error even if every caller has gone, so it is not reported as unhandled
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = (fingerprint, task)
+        return await asyncio.shield(task), False
+
+    async def _execute(self, key: str, fingerprint: str, call: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        try:
+            result = await call()
+        finally:
+            self._in_flight.pop(key, None)
+        if ttl > 0:
+            now = time.time()
+            self._completed[key] = (now + ttl, fingerprint, result)
+            self._completed.move_to_end(key)
+            while self._completed and (len(self._completed) > self.max_entries or next(iter(self._completed.values()))[0] < now):
+                self._completed.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._in_flight), "completed": len(self._completed)}
+
+
+_idempotency_cache: Optional[IdempotencyCache] = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """Return the process-wide idempotency cache used by the API."""
+    global _idempotency_cache
+    if _idempotency_cache is None:
+        _idempotency_cache = IdempotencyCache()
+        cache = _idempotency_cache
+        get_metrics().gauge("api_idempotency_keys", "Idempotency keys held by the API, by state", callback=lambda: {
+            label_key({"state": state}): count for state, count in cache.stats().items()
+        })
+    return _idempotency_cache
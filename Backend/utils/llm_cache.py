@@ -0,0 +1,213 @@
+# Backend/utils/llm_cache.py
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from Backend.config import Config
+from Backend.utils.metrics import get_metrics, label_key
+
+
+def normalize_keywords(keywords: List[str]) -> List[str]:
+    """Lowercase, trim, de-duplicate and sort keywords so their order and case don't matter."""
+    return sorted({keyword.strip().lower() for keyword in keywords if keyword.strip()})
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def make_cache_key(kind: str, model_name: str, template_version: str, keywords: Optional[List[str]] = None, **inputs) -> str:
+    """
+    Build a content-addressed cache key for an LLM call.
+
+    Args:
+    kind (str): What is being generated, e.g. "content", "schedule" or "topics".
+    model_name (str): The model answering the prompt.
+    template_version (str): Version of the prompt template; bump it to invalidate old entries.
+    keywords (List[str]): Keywords, normalized so order and case don't matter.
+    **inputs: The remaining prompt inputs.
+
+    Returns:
+    str: A SHA-256 hex digest.
+    """
+    payload = {
+        "kind": kind,
+        "model": model_name,
+        "template": template_version,
+        "keywords": normalize_keywords(keywords or []),
+        "inputs": {name: _normalize(value) for name, value in inputs.items()}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class MemoryCacheTier:
+    """In-memory LRU tier with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """
+    Optional on-disk tier so cached responses survive restarts.
+
+    Expired rows are deleted when the tier opens and then at most every
+    `purge_interval` seconds as entries are written. A purge also trims the
+    table to `max_entries` rows, dropping those that expire first (the oldest,
+    as every entry gets the same TTL), so the file stays bounded.
+    """
+
+    def __init__(self, path: str, max_entries: int = Config.LLM_CACHE_DISK_MAX_ENTRIES,
+                 purge_interval: float = Config.LLM_CACHE_PURGE_INTERVAL):
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires_at ON llm_cache (expires_at)")
+        self._connection.commit()
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self._connection.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, value: Any, expires_at: float):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at)
+        )
+        self._connection.commit()
+        if time.time() - self._purged_at >= self.purge_interval:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows, then the soonest to expire beyond `max_entries`; returns how many went."""
+        now = time.time()
+        deleted = self._connection.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,)).rowcount
+        if self.max_entries:
+            deleted += self._connection.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        self._connection.commit()
+        self._purged_at = now
+        return deleted
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM results keyed by make_cache_key.
+
+    Values must be JSON-serializable. Lookups check the memory tier first, then
+    the disk tier (if configured), promoting disk hits back into memory.
+    """
+
+    def __init__(self, max_entries: int = Config.LLM_CACHE_MAX_ENTRIES, ttl: float = Config.LLM_CACHE_TTL,
+                 path: Optional[str] = Config.LLM_CACHE_PATH):
+        self.ttl = ttl
+        self.memory = MemoryCacheTier(max_entries)
+        self.disk = SQLiteCacheTier(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None:
+                expires_at, value = entry
+                self.memory.set(key, value, expires_at)
+                self.disk_hits += 1
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl
+        self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, expires_at)
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, or await `generate()` and cache its result."""
+        value = await self.get(key)
+        if value is None:
+            value = await generate()
+            await self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits, "entries": len(self.memory)}
+
+
+class _DisabledCache(ResponseCache):
+    """Cache stand-in used when LLM_CACHE_ENABLED is false: always generates."""
+
+    def __init__(self):
+        super().__init__(max_entries=0, path=None)
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        pass
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache shared by the generation agents."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache() if Config.LLM_CACHE_ENABLED else _DisabledCache()
+        cache = _response_cache
+        get_metrics().gauge("llm_cache_lookups", "LLM response cache lookups, by result", callback=lambda: {
+            label_key({"result": result}): count for result, count in cache.stats().items() if result != "entries"
+        })
+        get_metrics().gauge("llm_cache_entries", "Responses held in memory by the LLM cache", callback=lambda: cache.stats()["entries"])
+    return _response_cache
@@ -0,0 +1,367 @@
+# Backend/utils/llm_client.py
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from Backend.config import Config
+from Backend.utils.resilience import CircuitBreaker, RetryPolicy, TransientLLMError, call_with_retries, get_circuit_breaker
+from Backend.utils.llm_scheduler import BACKGROUND, LLMScheduler, Ticket, get_llm_scheduler
+from Backend.utils.metrics import LLM_IN_FLIGHT, LLM_SECONDS, LLM_TOKENS, span
+from Backend.utils.prompts import estimate_tokens
+
+
+class LLMBackend:
+    """Base class for the backends an LLMClient can talk to."""
+
+    model_name: str = "unknown"
+
+    async def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response in chunks as it is generated; by default as a single chunk."""
+        yield await self.generate(prompt)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Gemini backend holding a single reusable GenerativeModel.
+
+    The model is created lazily on the first call so that importing an agent
+    does not configure the SDK. The native async API is used when the installed
+    SDK provides it, otherwise calls run on a bounded thread pool so they never
+    block the agent's event loop.
+    """
+
+    def __init__(self, model_name: str = Config.GEMINI_MODEL, api_key: Optional[str] = Config.GEMINI_API_KEY,
+                 thread_pool_size: int = Config.LLM_THREAD_POOL_SIZE):
+        self.model_name = model_name
+        self._api_key = api_key
+        self._thread_pool_size = thread_pool_size
+        self._model = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self._api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._thread_pool_size, thread_name_prefix="gemini")
+        return self._executor
+
+    async def generate(self, prompt: str) -> str:
+        model = self._get_model()
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(prompt)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._get_executor(), model.generate_content, prompt)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        model = self._get_model()
+        if not hasattr(model, "generate_content_async"):
+            yield await self.generate(prompt)
+            return
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Offline backend for throughput tests.
+
+    Args:
+    responder (Callable[[str], str]): Maps a prompt to the response text.
+    latency (float): Seconds to wait before answering, simulating a round-trip.
+    model_name (str): Name reported to callers (and used in cache keys).
+    tokens_per_second (float): Output rate; when set, each response also takes its length in tokens divided by it.
+    """
+
+    def __init__(self, responder: Optional[Callable[[str], str]] = None, latency: float = 0.0, model_name: str = "fake",
+                 tokens_per_second: Optional[float] = None):
+        self.model_name = model_name
+        self.responder = responder or (lambda prompt: f"Fake response for a prompt of {len(prompt)} characters.")
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+
+    def _output_seconds(self, text: str) -> float:
+        return estimate_tokens(text) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        text = self.responder(prompt)
+        delay = self.latency + self._output_seconds(text)
+        if delay:
+            await asyncio.sleep(delay)
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        words = self.responder(prompt).split(" ")
+        # Spread the simulated latency over the words so the first chunk arrives early
+        delay = self.latency / len(words)
+        for index, word in enumerate(words):
+            chunk = word if index == 0 else " " + word
+            if delay or self.tokens_per_second:
+                await asyncio.sleep(delay + self._output_seconds(chunk))
+            yield chunk
+
+
+class FaultInjectingBackend(LLMBackend):
+    """
+    Wraps another backend and makes a share of its calls fail, for exercising retries and the circuit breaker.
+
+    Args:
+    inner (LLMBackend): Backend answering the calls that are let through.
+    failure_rate (float): Share of calls that fail with a TransientLLMError.
+    hang_rate (float): Share of calls that hang for `hang_seconds` first, to trip timeouts.
+    hang_seconds (float): How long a hanging call waits.
+    error_factory (Callable[[], Exception]): Builds the injected error.
+    seed (int): Seed for reproducible fault sequences.
+    """
+
+    def __init__(self, inner: LLMBackend, failure_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 3600.0,
+                 error_factory: Optional[Callable[[], Exception]] = None, seed: Optional[int] = None):
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.error_factory = error_factory or (lambda: TransientLLMError("Injected fault"))
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.faults = 0
+
+    async def _maybe_fail(self):
+        self.calls += 1
+        roll = self._random.random()
+        if roll < self.failure_rate:
+            self.faults += 1
+            raise self.error_factory()
+        if roll < self.failure_rate + self.hang_rate:
+            self.faults += 1
+            await asyncio.sleep(self.hang_seconds)
+
+    async def generate(self, prompt: str) -> str:
+        await self._maybe_fail()
+        return await self.inner.generate(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        await self._maybe_fail()
+        async for chunk in self.inner.stream(prompt):
+            yield chunk
+
+
+class LLMClient:
+    """
+    Async LLM client for one agent.
+
+    Waits for the model's admission scheduler before each call, caps the
+    agent's concurrent calls, retries transient failures with backoff, fails
+    fast while the model's circuit breaker is open and gives every call a
+    deadline covering its wait for admission and all of its attempts.
+
+    Calls are admitted fairly between sessions, with INTERACTIVE ones (a user
+    is waiting on them) ahead of BACKGROUND ones.
+    """
+
+    def __init__(self, backend: LLMBackend, max_concurrency: int = Config.LLM_MAX_CONCURRENCY,
+                 retry_policy: Optional[RetryPolicy] = None, deadline: float = Config.LLM_DEADLINE,
+                 circuit_breaker: Optional[CircuitBreaker] = None, name: str = "",
+                 scheduler: Optional[LLMScheduler] = None, chunk_timeout: float = Config.LLM_CHUNK_TIMEOUT):
+        self.backend = backend
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.deadline = deadline
+        self.chunk_timeout = chunk_timeout
+        self._circuit_breaker = circuit_breaker
+        self._scheduler = scheduler
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def model_name(self) -> str:
+        return self.backend.model_name
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        # Looked up per call so swapping the backend also switches to its model's breaker
+        return self._circuit_breaker or get_circuit_breaker(self.model_name)
+
+    @property
+    def scheduler(self) -> LLMScheduler:
+        # Per model, like the circuit breaker: rate limits belong to the model, not the agent
+        return self._scheduler or get_llm_scheduler(self.model_name)
+
+    def _count_tokens(self, direction: str, text: str):
+        LLM_TOKENS.inc(estimate_tokens(text), model=self.model_name, agent=self.name, direction=direction)
+
+    async def _admit(self, prompt: str, session: Optional[str], priority: str, deadline: float) -> Ticket:
+        tokens = estimate_tokens(prompt) + Config.LLM_EXPECTED_OUTPUT_TOKENS
+        try:
+            return await asyncio.wait_for(self.scheduler.acquire(session or self.name, tokens, priority), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError("LLM call deadline exceeded waiting for admission")
+
+    async def generate(self, prompt: str, session: Optional[str] = None, priority: str = BACKGROUND) -> str:
+        """
+        Generate a response to `prompt`.
+
+        Args:
+        prompt (str): The prompt.
+        session (str): Session the call is for, so sessions share the rate limits fairly; the agent's own when not given.
+        priority (str): INTERACTIVE or BACKGROUND.
+        """
+        attempts = 0
+
+        async def attempt(timeout: float) -> str:
+            nonlocal attempts
+            attempts += 1
+            # Taken per attempt so a call waiting out its backoff does not hold a slot, and
+            # before the timeout starts so time queued for a slot is not held against the backend
+            async with self._semaphore:
+                return await asyncio.wait_for(self.backend.generate(prompt), timeout)
+
+        self._count_tokens("prompt", prompt)
+        deadline = time.monotonic() + self.deadline
+        LLM_IN_FLIGHT.inc(agent=self.name)
+        try:
+            ticket = await self._admit(prompt, session, priority, deadline)
+            text = ""
+            try:
+                with span("llm.generate", LLM_SECONDS, model=self.model_name, agent=self.name, kind="generate"):
+                    text = await call_with_retries(attempt, self.retry_policy, self.circuit_breaker, deadline)
+            finally:
+                # Every attempt sent the prompt; only the one that succeeded produced output
+                self.scheduler.settle(ticket, estimate_tokens(prompt) * attempts + estimate_tokens(text), attempts)
+        finally:
+            LLM_IN_FLIGHT.dec(agent=self.name)
+        self._count_tokens("completion", text)
+        return text
+
+    async def stream(self, prompt: str, session: Optional[str] = None, priority: str = BACKGROUND) -> AsyncIterator[str]:
+        """Stream a response to `prompt` in chunks; `session` and `priority` as for generate()."""
+        self._count_tokens("prompt", prompt)
+        deadline = time.monotonic() + self.deadline
+        LLM_IN_FLIGHT.inc(agent=self.name)
+        try:
+            ticket = await self._admit(prompt, session, priority, deadline)
+            attempts = [0]
+            completion_tokens = 0
+            chunks = self._stream(prompt, deadline, attempts)
+            try:
+                with span("llm.stream", LLM_SECONDS, model=self.model_name, agent=self.name, kind="stream"):
+                    async for chunk in chunks:
+                        self._count_tokens("completion", chunk)
+                        completion_tokens += estimate_tokens(chunk)
+                        yield chunk
+            finally:
+                # Closed here rather than whenever it is garbage collected, so a consumer that
+                # stops reading gives the upstream stream and its slot back straight away
+                await chunks.aclose()
+                self.scheduler.settle(ticket, estimate_tokens(prompt) * attempts[0] + completion_tokens, attempts[0])
+        finally:
+            LLM_IN_FLIGHT.dec(agent=self.name)
+
+    async def _stream(self, prompt: str, deadline: float, attempts: List[int]) -> AsyncIterator[str]:
+        """
+        The backend's chunks, holding a concurrency slot while its stream is open.
+
+        A stream that stalls for chunk_timeout, or is still open at the deadline,
+        raises TimeoutError; either way, or when the consumer stops reading, the
+        upstream stream is closed and the slot released.
+        """
+        async with self._semaphore:
+            chunks = None
+
+            # Only opening the stream is retried: once a chunk has been passed on, a retry would repeat it
+            async def open_stream(timeout: float) -> Optional[str]:
+                nonlocal chunks
+                attempts[0] += 1
+                chunks = self.backend.stream(prompt).__aiter__()
+                try:
+                    return await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return None
+
+            try:
+                first = await call_with_retries(open_stream, self.retry_policy, self.circuit_breaker, deadline)
+                if first is None:
+                    return
+                yield first
+                while True:
+                    timeout = min(self.chunk_timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError("LLM call deadline exceeded while streaming")
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise asyncio.TimeoutError(f"LLM stream sent nothing for {timeout:.1f}s")
+                    yield chunk
+            finally:
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+
+_backend: Optional[LLMBackend] = None
+_clients: Dict[str, LLMClient] = {}
+
+
+def create_backend(kind: str = Config.LLM_BACKEND) -> LLMBackend:
+    """Build the backend named by `kind` ("gemini" or "fake")."""
+    if kind == "gemini":
+        return GeminiBackend()
+    if kind == "fake":
+        if Config.LLM_FAULT_RATE:
+            return FaultInjectingBackend(FakeBackend(), failure_rate=Config.LLM_FAULT_RATE / 2, hang_rate=Config.LLM_FAULT_RATE / 2)
+        return FakeBackend()
+    raise ValueError(f"Unknown LLM backend: {kind}")
+
+
+def get_backend() -> LLMBackend:
+    """Return the process-wide backend, creating it from Config on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: LLMBackend):
+    """Swap the process-wide backend, e.g. for a FakeBackend in benchmarks."""
+    global _backend
+    _backend = backend
+    for client in _clients.values():
+        client.backend = backend
+
+
+def get_llm_client(agent_name: str, max_concurrency: Optional[int] = None) -> LLMClient:
+    """
+    Return the shared LLM client for an agent.
+
+    Args:
+    agent_name (str): Name of the calling agent; each agent gets its own concurrency limit.
+    max_concurrency (int): Limit for this agent, defaults to Config.LLM_MAX_CONCURRENCY.
+
+    Returns:
+    LLMClient: The agent's client, created on first use.
+    """
+    client = _clients.get(agent_name)
+    if client is None:
+        client = LLMClient(get_backend(), max_concurrency or Config.LLM_MAX_CONCURRENCY, name=agent_name)
+        _clients[agent_name] = client
+    return client
@@ -0,0 +1,234 @@
+# Backend/utils/llm_scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, List, Optional
+
+from Backend.config import Config
+from Backend.utils.metrics import LLM_QUEUE_SECONDS, get_metrics, label_key
+
+# Priority classes, served strictly in this order
+INTERACTIVE = "interactive"  # Work a user is waiting on, e.g. the schedule and first post of a new campaign
+BACKGROUND = "background"  # Everything else: topics and the rest of the week's posts
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+
+class TokenBucket:
+    """
+    Allows `rate` units per second on average, and bursts of up to `capacity`.
+
+    Taking more than is left puts the bucket in debt, which later takers wait
+    out; that is how a call that used more tokens than estimated is charged.
+
+    Args:
+    rate (float): Units added per second.
+    capacity (float): Most units held at once.
+    clock (Callable[[], float]): Time source, replaceable in tests.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken; one larger than the bucket goes when it is full."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def put(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class Ticket:
+    """One call waiting for, or granted, admission."""
+
+    def __init__(self, flow: str, priority: str, tokens: int, start: float, submitted_at: float):
+        self.flow = flow
+        self.priority = priority
+        self.tokens = tokens
+        self.start = start
+        self.submitted_at = submitted_at
+        self.granted_at: Optional[float] = None
+        self.cancelled = False
+        self.future: Optional[asyncio.Future] = None
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls within request and token rate limits, fairly across sessions.
+
+    Calls queue by priority class first: an interactive call always goes
+    before a background one. Within a class, start-time fair queuing orders
+    them by the tokens each session has already been given, so a campaign
+    asking for seven posts at once takes turns with one asking for a single
+    post instead of going first with all seven.
+
+    A call is admitted once both buckets hold enough: one request, and its
+    estimated tokens (prompt plus expected output). settle() charges the
+    difference once the real usage is known, and the retries a call made.
+
+    The logic is synchronous and reads time only from `clock`: tests can
+    submit() tickets, move a fake clock and call dispatch() to see which are
+    admitted. acquire() is the asynchronous wrapper the LLM client uses.
+
+    Args:
+    requests_per_minute (float): Request limit; 0 for none.
+    tokens_per_minute (float): Token limit; 0 for none.
+    burst_seconds (float): How many seconds of each rate may be used at once.
+    clock (Callable[[], float]): Time source, replaceable in tests.
+    """
+
+    def __init__(self, requests_per_minute: float = Config.LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = Config.LLM_TOKENS_PER_MINUTE,
+                 burst_seconds: float = Config.LLM_RATE_BURST_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.requests = self._bucket(requests_per_minute, burst_seconds, clock)
+        self.tokens = self._bucket(tokens_per_minute, burst_seconds, clock)
+        self._queue: List[tuple] = []  # (priority rank, start tag, sequence, ticket)
+        self._sequence = itertools.count()
+        self._virtual_time = [0.0] * len(PRIORITIES)
+        self._finish: Dict[tuple, float] = {}  # (priority rank, flow) -> finish tag of its last call
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+
+    @staticmethod
+    def _bucket(per_minute: float, burst_seconds: float, clock: Callable[[], float]) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        return TokenBucket(per_minute / 60, max(1.0, per_minute / 60 * burst_seconds), clock)
+
+    def submit(self, flow: str, tokens: int, priority: str = BACKGROUND, weight: float = 1.0) -> Ticket:
+        """
+        Queue a call without waiting for it.
+
+        Args:
+        flow (str): Who the call is for (a session id); flows share the rate limits fairly.
+        tokens (int): Estimated tokens the call will use.
+        priority (str): INTERACTIVE or BACKGROUND.
+        weight (float): Share of the rate limits this flow gets relative to others.
+
+        Returns:
+        Ticket: Granted once dispatch() admits it.
+        """
+        rank = PRIORITIES.index(priority)
+        start = max(self._virtual_time[rank], self._finish.get((rank, flow), 0.0))
+        self._finish[(rank, flow)] = start + max(tokens, 1) / weight
+        ticket = Ticket(flow, priority, tokens, start, self.clock())
+        heapq.heappush(self._queue, (rank, start, next(self._sequence), ticket))
+        return ticket
+
+    def dispatch(self) -> Optional[float]:
+        """Admit queued calls in order while the limits allow; returns seconds until the next can go, None if none wait."""
+        while self._queue:
+            rank, start, _, ticket = self._queue[0]
+            if ticket.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            wait = max(
+                self.requests.wait_time(1) if self.requests else 0.0,
+                self.tokens.wait_time(ticket.tokens) if self.tokens else 0.0
+            )
+            if wait > 0:
+                return wait
+            heapq.heappop(self._queue)
+            self._grant(rank, ticket)
+        return None
+
+    def _grant(self, rank: int, ticket: Ticket):
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(ticket.tokens)
+        self._virtual_time[rank] = ticket.start
+        ticket.granted_at = self.clock()
+        self.admitted += 1
+        LLM_QUEUE_SECONDS.observe(ticket.granted_at - ticket.submitted_at, priority=ticket.priority)
+        if ticket.future is not None and not ticket.future.done():
+            ticket.future.set_result(ticket)
+        if len(self._finish) > 4 * len(self._queue) + 1024:
+            # A flow whose last finish tag the virtual time has passed starts afresh anyway
+            self._finish = {key: finish for key, finish in self._finish.items() if finish > self._virtual_time[key[0]]}
+
+    def settle(self, ticket: Ticket, tokens: int, requests: int = 1):
+        """Charge a finished call's real usage: its tokens and the requests its retries made."""
+        if self.tokens and tokens != ticket.tokens:
+            if tokens > ticket.tokens:
+                self.tokens.take(tokens - ticket.tokens)
+            else:
+                self.tokens.put(ticket.tokens - tokens)
+        if self.requests and requests > 1:
+            self.requests.take(requests - 1)
+        elif self.requests and requests < 1:
+            self.requests.put(1)
+        self._schedule()
+
+    async def acquire(self, flow: str, tokens: int, priority: str = BACKGROUND, weight: float = 1.0) -> Ticket:
+        """Wait until a call is admitted; cancelling the wait takes it out of the queue."""
+        ticket = self.submit(flow, tokens, priority, weight)
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._schedule()
+        try:
+            return await ticket.future
+        except asyncio.CancelledError:
+            if ticket.granted:
+                self.settle(ticket, 0, 0)
+            else:
+                ticket.cancelled = True
+            raise
+
+    def _schedule(self):
+        """Admit what can go now and set a timer for when the next call can."""
+        wait = self.dispatch()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Driven by hand through dispatch(), e.g. with a fake clock
+            return
+        if wait is not None:
+            self._timer = loop.call_later(wait, self._schedule)
+
+    def queued(self) -> Dict[str, int]:
+        counts = {priority: 0 for priority in PRIORITIES}
+        for _, _, _, ticket in self._queue:
+            if not ticket.cancelled:
+                counts[ticket.priority] += 1
+        return counts
+
+
+_schedulers: Dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(model_name: str) -> LLMScheduler:
+    """Return the process-wide admission scheduler for a model, shared by every agent calling it."""
+    scheduler = _schedulers.get(model_name)
+    if scheduler is None:
+        scheduler = LLMScheduler()
+        _schedulers[model_name] = scheduler
+        get_metrics().gauge("llm_queue_depth", "LLM calls waiting for admission, by model and priority", callback=lambda: {
+            label_key({"model": model, "priority": priority}): count
+            for model, each in _schedulers.items() for priority, count in each.queued().items()
+        })
+    return scheduler
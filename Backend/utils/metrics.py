@@ -0,0 +1,371 @@
+# Backend/utils/metrics.py
+
+import bisect
+import functools
+import json
+import logging
+import os
+import random
+import socket
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from Backend.config import Config
+
+# Latency buckets in seconds, from a cache hit to a slow LLM call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+CallbackValue = Union[float, Dict[LabelKey, float]]
+
+# Trace id of the campaign the running handler works for. Tasks started from a
+# handler copy it, so LLM calls and messages created in the background keep it.
+current_trace: ContextVar[Optional[str]] = ContextVar("current_trace", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    return current_trace.get()
+
+
+def label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+
+    def samples(self) -> Dict[LabelKey, Any]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[LabelKey, float]:
+        return dict(self._values)
+
+
+class Gauge(Metric):
+    """A value that goes up and down; either set directly or read from `callback` when collected."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, callback: Optional[Callable[[], CallbackValue]] = None):
+        super().__init__(name, help)
+        self.callback = callback
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: Any):
+        self._values[label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        if self.callback is None:
+            return dict(self._values)
+        try:
+            value = self.callback()
+        except Exception:
+            logging.getLogger(__name__).exception(f"Collecting gauge {self.name} failed")
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram, as Prometheus expects."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = label_key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            self._values[key] = series
+        series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """Observe the duration of the block; labels added to the yielded dict are recorded too."""
+        labels = dict(labels)
+        started = time.perf_counter()
+        try:
+            yield labels
+        except BaseException:
+            labels.setdefault("outcome", "error")
+            raise
+        finally:
+            labels.setdefault("outcome", "ok")
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Dict[LabelKey, Dict[str, Any]]:
+        return {key: {"counts": list(series["counts"]), "sum": series["sum"], "count": series["count"]}
+                for key, series in self._values.items()}
+
+
+class MetricsRegistry:
+    """The metrics of one process, shared by every agent running in it."""
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, Metric]" = OrderedDict()
+
+    def _get(self, cls, name: str, help: str, **kwargs) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls(name, help, **kwargs)
+            self._metrics[name] = metric
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str, callback: Optional[Callable[[], CallbackValue]] = None) -> Gauge:
+        gauge = self._get(Gauge, name, help)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-safe copy of every metric, for sending to the process serving /metrics."""
+        families = {}
+        for name, metric in self._metrics.items():
+            family = {"type": metric.type, "help": metric.help, "samples": [
+                [list(map(list, key)), value] for key, value in metric.samples().items()
+            ]}
+            if isinstance(metric, Histogram):
+                family["buckets"] = list(metric.buckets)
+            families[name] = family
+        return families
+
+    def render(self) -> str:
+        return render_snapshots({"": self.snapshot()})
+
+
+def render_snapshots(snapshots: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Prometheus text exposition of metrics gathered from one or more processes.
+
+    Args:
+    snapshots (Dict[str, Dict[str, Any]]): MetricsRegistry.snapshot() by process; with more than
+        one process every sample gets an `instance` label naming its process.
+    """
+    merged: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for instance, families in snapshots.items():
+        for name, family in families.items():
+            entry = merged.setdefault(name, {"type": family["type"], "help": family["help"],
+                                             "buckets": family.get("buckets"), "samples": []})
+            extra = (("instance", instance),) if len(snapshots) > 1 else ()
+            entry["samples"].extend((tuple(map(tuple, key)), extra, value) for key, value in family["samples"])
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key, extra, value in family["samples"]:
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(key, extra)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(family["buckets"]) + [float("inf")], value["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, extra + (('le', _format_number(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key, extra)} {_format_number(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(key, extra)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class TraceRecorder:
+    """
+    Spans of the most recent traces in this process.
+
+    Each span is one handler or LLM call; put together across processes, the
+    spans of a campaign show where its time went.
+    """
+
+    def __init__(self, max_traces: int = Config.TRACE_MAX_TRACES):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+    def record(self, trace_id: Optional[str], name: str, started: float, duration: float, **attributes: Any):
+        if not trace_id:
+            return
+        spans = self._traces.get(trace_id)
+        if spans is None:
+            spans = self._traces[trace_id] = []
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        spans.append({"name": name, "start": started, "duration": duration, **attributes})
+
+    def get(self, trace_id: str) -> List[Dict[str, Any]]:
+        return list(self._traces.get(trace_id, []))
+
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+metrics = MetricsRegistry()
+traces = TraceRecorder()
+
+HANDLER_SECONDS = metrics.histogram("agent_handler_seconds", "Time spent in agent message handlers")
+MESSAGES_RECEIVED = metrics.counter("agent_messages_received_total", "Messages received by agent handlers")
+LLM_SECONDS = metrics.histogram("llm_call_seconds", "LLM call latency including retries")
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Estimated LLM tokens, by direction")
+LLM_IN_FLIGHT = metrics.gauge("llm_calls_in_flight", "LLM calls waiting for a response")
+LLM_QUEUE_SECONDS = metrics.histogram("llm_queue_wait_seconds", "Time LLM calls waited for rate-limit admission, by priority")
+MONGO_SECONDS = metrics.histogram("mongo_operation_seconds", "MongoDB operation latency")
+
+
+def get_metrics() -> MetricsRegistry:
+    return metrics
+
+
+def _sampled(trace_id: Optional[str]) -> bool:
+    if Config.LOG_SAMPLE_RATE >= 1:
+        return True
+    if trace_id:
+        # Decided per trace, so a sampled campaign is logged end to end
+        return zlib.crc32(trace_id.encode("utf-8")) % 10000 < Config.LOG_SAMPLE_RATE * 10000
+    return random.random() < Config.LOG_SAMPLE_RATE
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}… ({len(value)} chars)"
+    if isinstance(value, dict):
+        return {key: _truncate(item, limit) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_truncate(item, limit) for item in value[:10]]
+        return items + [f"… ({len(value)} items)"] if len(value) > 10 else items
+    return value
+
+
+def summarize_message(msg: Any, limit: int = Config.LOG_BODY_CHARS) -> Dict[str, Any]:
+    """A message's fields with long strings and lists cut short, e.g. to log it without whole posts."""
+    fields = msg.dict() if hasattr(msg, "dict") else {"value": msg}
+    fields.pop("trace_id", None)
+    return {"model": type(msg).__name__, **_truncate(fields, limit)}
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any):
+    """
+    Log one structured (JSON) event, tagged with the current trace id.
+
+    INFO and DEBUG events are sampled per trace (LOG_SAMPLE_RATE); warnings and
+    errors are always logged. String values are truncated to LOG_BODY_CHARS.
+    """
+    trace_id = current_trace.get()
+    if level < logging.WARNING and not _sampled(trace_id):
+        return
+    if not logger.isEnabledFor(level):
+        return
+    record = {"event": event, "trace_id": trace_id, **_truncate(fields, Config.LOG_BODY_CHARS)}
+    logger.log(level, json.dumps(record, default=str, ensure_ascii=False))
+
+
+def _agent_name(ctx: Any, default: str) -> str:
+    agent = getattr(ctx, "agent", None)
+    return getattr(agent, "name", None) or getattr(ctx, "name", None) or default
+
+
+def instrument(handler: Optional[str] = None, agent: str = "agent"):
+    """
+    Time an agent message handler and log what it received.
+
+    Goes under the uagents decorator:
+
+        @agent.on_message(model=UserInput)
+        @instrument()
+        async def handle_user_input(ctx, sender, msg): ...
+
+    The handler runs with the message's trace id (or, for messages that have
+    none, its session id) as the current trace.
+
+    Args:
+    handler (str): Name used in metrics and logs; defaults to the function name.
+    agent (str): Agent name used when the context does not carry one.
+    """
+    def decorate(func):
+        name = handler or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(ctx, sender, msg):
+            trace_id = getattr(msg, "trace_id", None) or getattr(msg, "session_id", None)
+            token = current_trace.set(trace_id)
+            agent_name = _agent_name(ctx, agent)
+            MESSAGES_RECEIVED.inc(agent=agent_name, handler=name)
+            log_event(ctx.logger, "received", handler=name, sender=sender, message=summarize_message(msg))
+            started = time.time()
+            try:
+                with HANDLER_SECONDS.time(agent=agent_name, handler=name):
+                    return await func(ctx, sender, msg)
+            finally:
+                traces.record(trace_id, name, started, time.time() - started, agent=agent_name)
+                current_trace.reset(token)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def span(name: str, histogram: Optional[Histogram] = None, **labels: Any) -> Iterator[Dict[str, Any]]:
+    """Record a span of the current trace around the block, and observe `histogram` if given."""
+    started = time.time()
+    try:
+        if histogram is None:
+            yield labels
+        else:
+            with histogram.time(**labels) as labels:
+                yield labels
+    finally:
+        traces.record(current_trace.get(), name, started, time.time() - started, **labels)
+
+
+def snapshot_process() -> Dict[str, Any]:
+    return {"process": PROCESS_ID, "metrics": metrics.snapshot()}
@@ -0,0 +1,234 @@
+# Backend/utils/prompts.py
+
+import hashlib
+import logging
+import math
+import textwrap
+from string import Formatter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from Backend.config import Config
+from Backend.utils.metrics import get_metrics, label_key
+
+logger = logging.getLogger(__name__)
+
+# Shared opening of every prompt. Keeping it first and byte-identical across
+# prompts gives the provider a common prefix it can cache between requests.
+PREAMBLE = (
+    "You are CreateMate, an assistant that plans and writes content for creators. "
+    "Follow the requested output format exactly."
+)
+JSON_PREAMBLE = PREAMBLE + " Respond with JSON only: no prose and no code fences."
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut `text` down to about `budget` tokens, at a word boundary where possible."""
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut).rstrip(",;: ") + "…"
+
+
+def fit_keywords(keywords: List[str], budget: int, max_keywords: int = Config.PROMPT_MAX_KEYWORDS) -> List[str]:
+    """The first distinct keywords that fit in `budget` tokens, at most `max_keywords` of them."""
+    fitted, used = [], 0
+    for keyword in dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()):
+        cost = estimate_tokens(keyword) + 1
+        if len(fitted) >= max_keywords or used + cost > budget:
+            break
+        fitted.append(keyword)
+        used += cost
+    return fitted
+
+
+class PromptTemplate:
+    """
+    A prompt compiled once into literal and field segments.
+
+    The version combines the template name, its revision number and a hash of
+    its text, so editing a template changes the cache keys derived from it even
+    if nobody remembers to bump the revision.
+
+    Args:
+    name (str): Registry name, e.g. "content".
+    revision (int): Bumped on deliberate prompt changes.
+    body (str): Template text with {field} placeholders; indentation is removed.
+    preamble (str): Shared text placed before the body.
+    list_fields (Iterable[str]): Fields given as lists of keywords, fitted to the keyword budget and comma-joined.
+    text_fields (Iterable[str]): Free-text fields (user input, topics) cut down to the text budget.
+    keyword_budget (int): Tokens allowed for each list field.
+    text_budget (int): Tokens allowed for each text field.
+    """
+
+    def __init__(self, name: str, revision: int, body: str, preamble: str = PREAMBLE,
+                 list_fields: Iterable[str] = (), text_fields: Iterable[str] = (),
+                 keyword_budget: int = Config.PROMPT_KEYWORD_BUDGET, text_budget: int = Config.PROMPT_TEXT_BUDGET):
+        self.name = name
+        self.revision = revision
+        self.preamble = preamble
+        self.list_fields = set(list_fields)
+        self.text_fields = set(text_fields)
+        self.keyword_budget = keyword_budget
+        self.text_budget = text_budget
+
+        source = f"{preamble}\n\n{textwrap.dedent(body).strip()}\n"
+        self.segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(source)
+        ]
+        self.fields = {field for _, field in self.segments if field}
+        unknown = (self.list_fields | self.text_fields) - self.fields
+        if unknown:
+            raise ValueError(f"Prompt {name} declares fields it does not use: {sorted(unknown)}")
+
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:8]
+        self.version = f"{name}-v{revision}-{digest}"
+        self.preamble_tokens = estimate_tokens(preamble)
+        self.renders = 0
+        self.total_tokens = 0
+        self.truncations = 0
+
+    def _prepare(self, field: str, value: Any) -> str:
+        if field in self.list_fields:
+            distinct = list(dict.fromkeys(keyword.strip() for keyword in value if keyword.strip()))
+            fitted = fit_keywords(distinct, self.keyword_budget)
+            self.truncations += len(fitted) < len(distinct)
+            return ", ".join(fitted)
+        value = str(value)
+        if field in self.text_fields:
+            fitted = truncate_to_tokens(value, self.text_budget)
+            self.truncations += fitted != value
+            return fitted
+        return value
+
+    def render(self, **values: Any) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt {self.name} is missing values for {sorted(missing)}")
+        prepared = {field: self._prepare(field, values[field]) for field in self.fields}
+        text = "".join(literal + (prepared[field] if field else "") for literal, field in self.segments)
+
+        tokens = estimate_tokens(text)
+        self.renders += 1
+        self.total_tokens += tokens
+        if tokens > Config.PROMPT_MAX_TOKENS:
+            logger.warning(f"Prompt {self.version} is about {tokens} tokens, over the {Config.PROMPT_MAX_TOKENS} budget")
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "renders": self.renders,
+            "mean_tokens": self.total_tokens / self.renders if self.renders else None,
+            "preamble_tokens": self.preamble_tokens,
+            "truncations": self.truncations
+        }
+
+
+class PromptRegistry:
+    """Named prompt templates, compiled when registered."""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        if template.name in self._templates:
+            raise ValueError(f"Prompt {template.name} is already registered")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: template.stats() for name, template in self._templates.items()}
+
+
+prompts = PromptRegistry()
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    return prompts.get(name)
+
+
+def _prompt_stat(stat: str):
+    return lambda: {
+        label_key({"prompt": name, "version": stats["version"]}): stats[stat] or 0
+        for name, stats in prompts.stats().items()
+    }
+
+
+get_metrics().gauge("prompt_renders", "Prompts rendered, by template", callback=_prompt_stat("renders"))
+get_metrics().gauge("prompt_mean_tokens", "Mean estimated tokens of a rendered prompt", callback=_prompt_stat("mean_tokens"))
+get_metrics().gauge("prompt_truncations", "Prompt fields cut down to fit their budget", callback=_prompt_stat("truncations"))
+
+
+prompts.register(PromptTemplate("schedule", 2, """
+    Generate a weekly content posting schedule based on the following preferences:
+    - Area of interest: {area_of_interest}
+    - Content type: {content_type}
+    - Keywords: {keywords}
+    - Post frequency: {post_frequency} times per week
+
+    Provide the schedule as a JSON array of days (e.g., ["Monday", "Wednesday", "Friday"]).
+    Ensure the number of days matches the post frequency.
+""", preamble=JSON_PREAMBLE, list_fields=["keywords"], text_fields=["area_of_interest", "content_type"]))
+
+prompts.register(PromptTemplate("topics", 3, """
+    Generate a list of {num_topics} engaging and trending topic suggestions for content creation based on the following:
+    - Area of interest: {area_of_interest}
+    - Content type: {content_type}
+    - Keywords: {keywords}
+
+    Consider current trends and popular discussions in this area. Each topic should be specific, interesting, and relevant to the given parameters.
+
+    Provide exactly {num_topics} topics as a JSON array of strings.
+""", preamble=JSON_PREAMBLE, list_fields=["keywords"], text_fields=["area_of_interest", "content_type"]))
+
+prompts.register(PromptTemplate("topics_top_up", 1, """
+    Generate {missing} more engaging topic suggestions for {content_type} content about {area_of_interest}
+    (keywords: {keywords}), different from these: {existing}.
+
+    Provide exactly {missing} topics as a JSON array of strings.
+""", preamble=JSON_PREAMBLE, list_fields=["keywords"], text_fields=["area_of_interest", "content_type", "existing"]))
+
+prompts.register(PromptTemplate("content", 2, """
+    Generate content for a {content_type} post about {topic} in the area of {area_of_interest}.
+    Incorporate the following keywords: {keywords}.
+    The content should be suitable for posting on {day}.
+
+    Please provide a well-structured post with:
+    1. An engaging title
+    2. An introduction
+    3. Main content (2-3 paragraphs)
+    4. A conclusion or call-to-action
+
+    Ensure the content is informative, engaging, and relevant to the topic and keywords.
+""", list_fields=["keywords"], text_fields=["topic", "area_of_interest", "content_type"]))
+
+prompts.register(PromptTemplate("content_batch", 2, """
+    Generate content for {count} {content_type} posts in the area of {area_of_interest}.
+    Incorporate the following keywords: {keywords}.
+
+    Write one post for each of the following days and topics:
+    {posts}
+
+    Each post should be well-structured with:
+    1. An engaging title
+    2. An introduction
+    3. Main content (2-3 paragraphs)
+    4. A conclusion or call-to-action
+
+    Ensure the content is informative, engaging, and relevant to the topic and keywords.
+
+    Respond with a JSON array of {count} objects, in the same order as the list above,
+    each with the keys "day", "topic" and "content".
+""", preamble=JSON_PREAMBLE, list_fields=["keywords"], text_fields=["area_of_interest", "content_type"]))
@@ -0,0 +1,185 @@
+# Backend/utils/resilience.py
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from Backend.config import Config
+
+T = TypeVar("T")
+
+# Errors from the Gemini SDK (google.api_core.exceptions) that may succeed on a later attempt.
+# Matched by name so this module does not import the SDK.
+TRANSIENT_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "Aborted", "Unknown"
+}
+
+
+class TransientLLMError(Exception):
+    """An LLM failure worth retrying, e.g. a rate limit or an overloaded backend."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether `error` is transient; bad prompts, bad credentials and unparseable responses are not."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TransientLLMError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+    max_retries (int): Attempts after the first one.
+    base_delay (float): Backoff before the first retry, doubled on each later one.
+    max_delay (float): Cap on a single backoff.
+    attempt_timeout (float): Seconds a single attempt may take.
+    """
+
+    def __init__(self, max_retries: int = Config.MAX_RETRIES, base_delay: float = Config.RETRY_DELAY,
+                 max_delay: float = Config.RETRY_MAX_DELAY, attempt_timeout: float = Config.LLM_ATTEMPT_TIMEOUT):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing backend for a while instead of piling more load on it.
+
+    After `failure_threshold` consecutive transient failures the circuit opens
+    and calls fail immediately with CircuitOpenError. Once `reset_timeout` has
+    passed a single trial call is let through (half-open): success closes the
+    circuit, failure opens it again, and a trial cancelled before it finished
+    (release()) lets the next call try instead.
+
+    Args:
+    failure_threshold (int): Consecutive failures that open the circuit.
+    reset_timeout (float): Seconds to stay open before a trial call.
+    clock (Callable[[], float]): Time source, replaceable in tests.
+    """
+
+    def __init__(self, failure_threshold: int = Config.CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = Config.CIRCUIT_RESET_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release(self):
+        """Give back a trial call that was cancelled, e.g. by a deadline: it says nothing about the backend."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+        self._trial_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(model_name: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a model, shared by every agent calling it."""
+    breaker = _breakers.get(model_name)
+    if breaker is None:
+        breaker = CircuitBreaker()
+        _breakers[model_name] = breaker
+    return breaker
+
+
+async def call_with_retries(call: Callable[[float], Awaitable[T]], policy: Optional[RetryPolicy] = None,
+                            breaker: Optional[CircuitBreaker] = None, deadline: Optional[float] = None,
+                            sleep: Callable[[float], Awaitable[None]] = asyncio.sleep) -> T:
+    """
+    Run `call`, retrying transient failures until it succeeds, the retries run out or the deadline passes.
+
+    Args:
+    call (Callable[[float], Awaitable[T]]): Makes one attempt, which should give up after the seconds it is passed.
+    policy (RetryPolicy): Backoff and per-attempt timeout.
+    breaker (CircuitBreaker): Breaker consulted before, and updated after, every attempt.
+    deadline (float): time.monotonic() by which the whole call must finish.
+    sleep (Callable[[float], Awaitable[None]]): Used for backoff, replaceable in tests.
+
+    Returns:
+    T: The result of the first successful attempt.
+    """
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        timeout = policy.attempt_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise asyncio.TimeoutError("LLM call deadline exceeded")
+
+        # Checked after the deadline so a call that gives up here never holds the half-open trial
+        trial = breaker is not None and breaker.state == "half_open"
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open, not calling the backend")
+
+        try:
+            result = await call(timeout)
+        except Exception as e:
+            transient = is_retryable(e)
+            if breaker is not None:
+                if transient:
+                    breaker.record_failure()
+                else:
+                    # The backend answered; the failure is ours (e.g. a rejected prompt)
+                    breaker.record_success()
+            if not transient or retry >= policy.max_retries:
+                raise
+            delay = policy.backoff(retry)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            retry += 1
+            await sleep(delay)
+        except BaseException:
+            # Cancelled mid-attempt: a trial that never finished must not keep the circuit half-open forever
+            if trial:
+                breaker.release()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,91 @@
+# Backend/utils/scheduler.py
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Days that tend to perform best for each content type, in order of preference
+PREFERRED_DAYS: Dict[str, List[str]] = {
+    "blog": ["Tuesday", "Thursday", "Monday", "Wednesday"],
+    "linkedin": ["Tuesday", "Wednesday", "Thursday"],
+    "twitter": ["Monday", "Wednesday", "Friday"],
+    "instagram": ["Monday", "Wednesday", "Friday", "Sunday"],
+    "newsletter": ["Tuesday", "Thursday"],
+    "video": ["Thursday", "Friday", "Saturday"]
+}
+
+
+def _normalize_day(day: str) -> Optional[int]:
+    # Accepts full names and abbreviations in any case, e.g. "monday" or "Mon"
+    prefix = day.strip()[:3].capitalize()
+    if len(prefix) < 3:
+        return None
+    return next((index for index, name in enumerate(WEEKDAYS) if name.startswith(prefix)), None)
+
+
+def parse_weekday(value) -> Optional[str]:
+    """The weekday named by `value` (e.g. "mon", "Monday"), or None if it names none."""
+    index = _normalize_day(value) if isinstance(value, str) else None
+    return WEEKDAYS[index] if index is not None else None
+
+
+@lru_cache(maxsize=None)
+def _even_patterns(post_frequency: int) -> Tuple[Tuple[int, ...], ...]:
+    """Every way of placing `post_frequency` days around the week as evenly as possible."""
+    base = [round(index * 7 / post_frequency) for index in range(post_frequency)]
+    gaps = [(base[(index + 1) % post_frequency] - base[index]) % 7 or 7 for index in range(post_frequency)]
+    patterns = set()
+    for shift in range(post_frequency):
+        rotated = gaps[shift:] + gaps[:shift]
+        for offset in range(7):
+            days, day = [], offset
+            for gap in rotated:
+                days.append(day % 7)
+                day += gap
+            patterns.add(tuple(sorted(days)))
+    return tuple(sorted(patterns))
+
+
+def build_schedule(post_frequency: int, content_type: Optional[str] = None,
+                   preferred_days: Optional[List[str]] = None, timezone: Optional[str] = None) -> List[str]:
+    """
+    Pick posting days for a week without calling an LLM.
+
+    Only evenly spread patterns are considered; among those, the one covering the
+    most preferred days (given explicitly, or looked up from the content type)
+    wins, with earlier preferences weighing more.
+
+    Args:
+    post_frequency (int): Number of posts per week (1-7).
+    content_type (str): Content type used to look up default preferred days.
+    preferred_days (List[str]): Explicit preferred weekday names.
+    timezone (str): IANA timezone of the audience; the schedule starts from today's weekday there.
+
+    Returns:
+    List[str]: Weekday names in posting order.
+    """
+    if post_frequency < 1 or post_frequency > 7:
+        raise ValueError("post_frequency must be between 1 and 7")
+
+    if preferred_days is None and content_type:
+        preferred_days = PREFERRED_DAYS.get(content_type.strip().lower())
+    preferred = list(dict.fromkeys(
+        day for day in (_normalize_day(name) for name in preferred_days or []) if day is not None
+    ))
+    weights = {day: len(preferred) - rank for rank, day in enumerate(preferred)}
+
+    # Patterns are sorted, so ties resolve to the one starting earliest in the week
+    chosen = max(_even_patterns(post_frequency), key=lambda pattern: sum(weights.get(day, 0) for day in pattern))
+
+    start = _current_weekday(timezone)
+    return [WEEKDAYS[day] for day in sorted(chosen, key=lambda day: (day - start) % 7)]
+
+
+def _current_weekday(timezone: Optional[str]) -> int:
+    if not timezone:
+        return 0
+    from zoneinfo import ZoneInfo
+
+    return datetime.now(ZoneInfo(timezone)).weekday()
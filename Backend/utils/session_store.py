@@ -0,0 +1,139 @@
+# Backend/utils/session_store.py
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from Backend.config import Config
+from Backend.utils.coordinator_storage import CoordinatorStorage, MemoryStorage
+
+
+def new_session_state(session_id: str) -> Dict[str, Any]:
+    """The coordinator state kept for one campaign."""
+    return {
+        "session_id": session_id,
+        "user_input": None,
+        "schedule": None,
+        "generated_content": [],
+        "suggested_topics": [],
+        "remaining_days": [],
+        "content_batches": {},
+        "current_batch_id": None,
+        "topics_requested_at": None,
+        "dispatched_days": [],
+        "workflow": {},
+        "errors": [],
+        "revision": 0,
+        "last_active": time.time()
+    }
+
+
+class SessionStore:
+    """
+    Coordinator state indexed by session id.
+
+    Sessions are kept in least-recently-used order so idle ones can be evicted
+    cheaply, and content batches are indexed back to the session that owns them.
+    Changes made through set_field/append_item are written through to the
+    durable storage backend and bump the session's revision, which together
+    with the store's epoch identifies a version of the session (e.g. for ETags).
+
+    Args:
+    max_sessions (int): Sessions kept before the least recently used one is evicted.
+    idle_timeout (float): Seconds of inactivity after which a session is evicted.
+    storage (CoordinatorStorage): Durable backend; defaults to keeping nothing.
+    """
+
+    def __init__(self, max_sessions: int = Config.MAX_SESSIONS, idle_timeout: float = Config.SESSION_IDLE_TIMEOUT,
+                 storage: Optional[CoordinatorStorage] = None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.storage = storage or MemoryStorage()
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._batch_index: Dict[str, str] = {}
+        # Revisions restart from zero in every process, so versions also carry this
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def restore(self) -> int:
+        """Reload every session from durable storage; returns how many were restored."""
+        for session_id, stored in self.storage.load().items():
+            session = new_session_state(session_id)
+            session.update(stored)
+            self._sessions[session_id] = session
+            for batch_id in session["content_batches"]:
+                self._batch_index[batch_id] = session_id
+        return len(self._sessions)
+
+    def get(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        session = self._sessions.get(session_id) if session_id else None
+        if session is not None:
+            session["last_active"] = time.time()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def create(self, session_id: str) -> Dict[str, Any]:
+        """Start a fresh session, replacing any previous state under the same id."""
+        self._drop(session_id)
+        session = new_session_state(session_id)
+        self._sessions[session_id] = session
+        self.storage.set(session_id, "session_id", session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)))
+        return session
+
+    def set_field(self, session: Dict[str, Any], key: str, value: Any):
+        session[key] = value
+        session["revision"] += 1
+        self.storage.set(session["session_id"], key, value)
+
+    def append_item(self, session: Dict[str, Any], key: str, item: Any):
+        session[key].append(item)
+        session["revision"] += 1
+        self.storage.append(session["session_id"], key, item)
+
+    def compact(self) -> bool:
+        """Compact durable storage if the backend asks for it; returns whether it ran."""
+        if not self.storage.needs_compaction():
+            return False
+        snapshot = {
+            session_id: {key: value for key, value in session.items() if key not in ("last_active", "revision")}
+            for session_id, session in self._sessions.items()
+        }
+        self.storage.compact(snapshot)
+        return True
+
+    def index_batch(self, batch_id: str, session_id: str):
+        self._batch_index[batch_id] = session_id
+
+    def get_by_batch(self, batch_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.get(self._batch_index.get(batch_id)) if batch_id else None
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop sessions idle for longer than idle_timeout and return their ids."""
+        cutoff = (now or time.time()) - self.idle_timeout
+        evicted = []
+        # Sessions are in LRU order, so stop at the first one that is still active
+        for session_id, session in list(self._sessions.items()):
+            if session["last_active"] >= cutoff:
+                break
+            self._drop(session_id)
+            evicted.append(session_id)
+        return evicted
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            for batch_id in session["content_batches"]:
+                self._batch_index.pop(batch_id, None)
+            self.storage.delete(session_id)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Every session, without touching their recency."""
+        return iter(list(self._sessions.values()))
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
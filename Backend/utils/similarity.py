@@ -0,0 +1,213 @@
+# Backend/utils/similarity.py
+
+import hashlib
+import heapq
+import re
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set
+
+from Backend.config import Config
+from Backend.utils.metrics import get_metrics
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "your", "you", "how", "why", "what",
+    "is", "are", "it", "its", "by", "at", "from", "or", "as", "be", "this", "that", "about", "into"
+}
+BUCKET_CAPACITY = 64  # Newest entries kept per LSH bucket; bounds the work a lookup can do
+MAX_CANDIDATES = 16  # Candidates scored exactly per lookup, those sharing the most bands first
+
+
+def shingles(text: str) -> Set[str]:
+    """
+    Word unigrams and bigrams of `text`, lowercased, without stopwords and with plurals folded.
+
+    Topics are a handful of words, so word shingles match reworded or reordered
+    titles far better than character n-grams would.
+    """
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+             for word in TOKEN.findall(text.lower()) if word not in STOPWORDS]
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def is_near_duplicate(text: str, others: Iterable[str], threshold: float = Config.SIMILARITY_THRESHOLD) -> bool:
+    """Whether `text` is at least `threshold` similar (Jaccard over shingles) to any of `others`."""
+    own = shingles(text)
+    return any(jaccard(own, shingles(other)) >= threshold for other in others)
+
+
+class Match(NamedTuple):
+    text: str
+    ref: Any
+    similarity: float
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index for finding near-duplicate texts (topics) without scanning everything stored.
+
+    Each text gets a MinHash signature of `bands * rows` values, split into
+    bands; texts sharing any band land in the same bucket, so a lookup only
+    compares against a few candidates (at most MAX_CANDIDATES, from buckets
+    of at most BUCKET_CAPACITY) however many of the `max_items` entries are
+    stored. Candidates are then scored by exact Jaccard similarity.
+
+    Entries live in a ring of `max_items` slots: when it is full the oldest
+    entry is dropped, so memory stays bounded (about 1 KB per entry with the
+    defaults). Entries are grouped by namespace, e.g. one per area of
+    interest; lookups never cross namespaces.
+
+    Args:
+    bands (int): LSH bands; more bands find less similar pairs.
+    rows (int): Signature values per band; more rows make buckets stricter.
+    max_items (int): Entries kept before the oldest is evicted.
+    threshold (float): Default similarity for a match.
+    seed (int): Seed of the hash functions.
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 3, max_items: int = Config.SIMILARITY_MAX_ITEMS,
+                 threshold: float = Config.SIMILARITY_THRESHOLD, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        self.num_perm = bands * rows
+        if self.num_perm > 32:
+            raise ValueError("bands * rows can be at most 32")  # One 64-byte BLAKE2b digest per shingle
+        self.max_items = max_items
+        self.threshold = threshold
+        # Unlike hash(), a salted BLAKE2b digest gives the same signature in every process
+        self._salt = seed.to_bytes(8, "little")
+
+        self._signatures = array("H", bytes(2 * self.num_perm * max_items))
+        self._entries: List[Optional[tuple]] = [None] * max_items  # (namespace, text, ref, owner)
+        self._buckets: Dict[int, Any] = {}  # bucket key -> slot, or list of slots when shared
+        self._next = 0
+        self._size = 0
+        self.lookups = 0
+        self.matches = 0
+
+    def signature(self, text: str) -> List[int]:
+        """
+        MinHash signature of `text`: per hash function, the smallest hash of any of its shingles.
+
+        One digest per shingle is cut into `num_perm` independent 16-bit hashes,
+        which is far cheaper in Python than `num_perm` separate hash functions.
+        """
+        rows = [
+            array("H", hashlib.blake2b(shingle.encode("utf-8"), digest_size=2 * self.num_perm, salt=self._salt).digest())
+            for shingle in shingles(text) or {""}
+        ]
+        return list(map(min, *rows)) if len(rows) > 1 else list(rows[0])
+
+    def _bucket_keys(self, namespace: Hashable, signature: List[int]) -> List[int]:
+        rows = self.rows
+        return [hash((namespace, band, tuple(signature[band * rows:(band + 1) * rows]))) for band in range(self.bands)]
+
+    def _evict(self, slot: int):
+        entry = self._entries[slot]
+        if entry is None:
+            return
+        start = slot * self.num_perm
+        for key in self._bucket_keys(entry[0], list(self._signatures[start:start + self.num_perm])):
+            bucket = self._buckets.get(key)
+            if bucket == slot:
+                del self._buckets[key]
+            elif isinstance(bucket, list) and slot in bucket:
+                bucket.remove(slot)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+        self._entries[slot] = None
+        self._size -= 1
+
+    def add(self, namespace: Hashable, text: str, ref: Any = None, owner: Optional[str] = None) -> int:
+        """
+        Store `text`, evicting the oldest entry if the index is full.
+
+        Args:
+        namespace (Hashable): Group the entry belongs to; only looked up within it.
+        text (str): The text compared on lookups.
+        ref (Any): Returned with matches, e.g. a response cache key.
+        owner (str): Who produced it (a session id), so lookups can skip their own entries.
+
+        Returns:
+        int: The entry's slot.
+        """
+        slot = self._next
+        self._next = (slot + 1) % self.max_items
+        self._evict(slot)
+
+        signature = self.signature(text)
+        start = slot * self.num_perm
+        self._signatures[start:start + self.num_perm] = array("H", signature)
+        self._entries[slot] = (namespace, text, ref, owner)
+        self._size += 1
+        for key in self._bucket_keys(namespace, signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = slot
+            elif isinstance(bucket, list):
+                bucket.append(slot)
+                if len(bucket) > BUCKET_CAPACITY:
+                    # The oldest entry stays reachable through its other bands
+                    del bucket[0]
+            else:
+                self._buckets[key] = [bucket, slot]
+        return slot
+
+    def query(self, namespace: Hashable, text: str, threshold: Optional[float] = None,
+              exclude_owner: Optional[str] = None, limit: int = 5) -> List[Match]:
+        """Entries of `namespace` at least `threshold` similar to `text`, most similar first."""
+        threshold = self.threshold if threshold is None else threshold
+        self.lookups += 1
+        votes: Dict[int, int] = {}
+        for key in self._bucket_keys(namespace, self.signature(text)):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            for slot in bucket if isinstance(bucket, list) else (bucket,):
+                votes[slot] = votes.get(slot, 0) + 1
+
+        own = shingles(text)
+        matches = []
+        for slot in heapq.nlargest(MAX_CANDIDATES, votes, key=votes.get):
+            entry_namespace, entry_text, ref, owner = self._entries[slot]
+            # Bucket keys are hashes, so a collision could bring in another namespace
+            if entry_namespace != namespace or (exclude_owner is not None and owner == exclude_owner):
+                continue
+            similarity = jaccard(own, shingles(entry_text))
+            if similarity >= threshold:
+                matches.append(Match(entry_text, ref, similarity))
+        matches.sort(key=lambda match: match.similarity, reverse=True)
+        if matches:
+            self.matches += 1
+        return matches[:limit]
+
+    def find(self, namespace: Hashable, text: str, threshold: Optional[float] = None,
+             exclude_owner: Optional[str] = None) -> Optional[Match]:
+        """The closest match, if any."""
+        matches = self.query(namespace, text, threshold, exclude_owner, limit=1)
+        return matches[0] if matches else None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": self._size, "buckets": len(self._buckets), "lookups": self.lookups, "matches": self.matches}
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Return the process-wide similarity index shared by the generation agents."""
+    global _similarity_index
+    if _similarity_index is None:
+        _similarity_index = SimilarityIndex()
+        index = _similarity_index
+        get_metrics().gauge("similarity_index_entries", "Topics held by the near-duplicate index", callback=lambda: len(index))
+    return _similarity_index
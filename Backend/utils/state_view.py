@@ -0,0 +1,85 @@
+# Backend/utils/state_view.py
+
+import hashlib
+from typing import Any, Dict, List, Optional
+
+# Top-level fields of a state response that a client may ask for
+STATE_FIELDS = ("user_input", "schedule", "generated_content", "suggested_topics", "content_batches", "errors")
+CONTENT_VIEWS = ("full", "summary", "none")
+SUMMARY_CHARS = 200
+
+
+def state_etag(epoch: str, session: Dict[str, Any], *view: Any) -> str:
+    """
+    Strong ETag for one view of a session at its current revision.
+
+    Computed from the revision rather than the payload, so checking it costs
+    nothing however large the session has grown.
+    """
+    key = "|".join(str(part) for part in (epoch, session["session_id"], session["revision"]) + view)
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an If-None-Match header value names `etag` (weak comparison, as RFC 9110 asks for)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def summarize_content(item: Dict[str, Any], content_view: str) -> Dict[str, Any]:
+    if content_view == "full":
+        return item
+    projected = {key: value for key, value in item.items() if key != "content"}
+    if content_view == "summary":
+        content = item.get("content") or ""
+        projected["summary"] = content if len(content) <= SUMMARY_CHARS else content[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+    return projected
+
+
+def project_state(session: Dict[str, Any], fields: Optional[List[str]] = None, content_view: str = "full",
+                  limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The part of a session's state a client asked for.
+
+    Args:
+    session (Dict[str, Any]): Coordinator session state.
+    fields (List[str]): Top-level fields to include; all of STATE_FIELDS when empty.
+    content_view (str): "full" posts, a "summary" excerpt in place of the body, or "none" for no body.
+    limit (int): Posts per page of generated_content; all of them when not given.
+    cursor (str): next_cursor of the previous page.
+
+    Returns:
+    Dict[str, Any]: StateResponse fields.
+    """
+    if content_view not in CONTENT_VIEWS:
+        raise ValueError(f"Unknown content view: {content_view}")
+    wanted = set(fields or STATE_FIELDS)
+    unknown = wanted - set(STATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown state fields: {sorted(unknown)}")
+
+    posts = session["generated_content"]
+    state: Dict[str, Any] = {"session_id": session["session_id"], "content_total": len(posts)}
+    if "user_input" in wanted:
+        state["user_input"] = session["user_input"]
+    if "schedule" in wanted:
+        state["schedule"] = session["schedule"]
+    if "suggested_topics" in wanted:
+        state["suggested_topics"] = session["suggested_topics"]
+    if "content_batches" in wanted:
+        state["content_batches"] = list(session["content_batches"].values())
+    if "errors" in wanted:
+        state["errors"] = session["errors"]
+    if "generated_content" in wanted:
+        # generated_content is append-only, so a position is a stable cursor
+        try:
+            start = int(cursor) if cursor else 0
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        end = len(posts) if limit is None else start + limit
+        state["generated_content"] = [summarize_content(item, content_view) for item in posts[start:end]]
+        state["next_cursor"] = str(end) if end < len(posts) else None
+    return state
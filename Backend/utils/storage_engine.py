@@ -0,0 +1,366 @@
+# Backend/utils/storage_engine.py
+
+import asyncio
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from Backend.config import Config
+from Backend.utils.metrics import MONGO_SECONDS, span
+
+# Indexes created when the storage agent starts, per collection. Every listing
+# the API serves filters on session_id and pages by created_at (with _id as the
+# tie-breaker), so those reads are index range scans rather than collection scans.
+INDEXES: Dict[str, List[List[Tuple[str, int]]]] = {
+    "user_inputs": [
+        [("session_id", 1)],
+        [("created_at", -1), ("_id", -1)]
+    ],
+    "schedules": [
+        [("session_id", 1), ("created_at", 1), ("_id", 1)]
+    ],
+    "generated_content": [
+        [("session_id", 1), ("created_at", 1), ("_id", 1)],
+        [("session_id", 1), ("day", 1)]
+    ],
+    "suggested_topics": [
+        [("session_id", 1), ("created_at", 1), ("_id", 1)]
+    ]
+}
+
+# Cursor pages stay small enough to travel in one agent message
+MAX_PAGE_SIZE = 200
+
+
+def create_mongo_client(backend: str = Config.MONGO_BACKEND):
+    """
+    Create the MongoDB client used by the storage engine.
+
+    Args:
+    backend (str): "pymongo" for a real server, "mongomock" for an in-process fake.
+
+    Returns:
+    A pymongo-compatible client.
+    """
+    if backend == "mongomock":
+        import mongomock
+
+        return mongomock.MongoClient()
+    if backend == "pymongo":
+        from pymongo import MongoClient
+
+        return MongoClient(Config.MONGO_URI, maxPoolSize=Config.MONGO_MAX_POOL_SIZE)
+    raise ValueError(f"Unknown Mongo backend: {backend}")
+
+
+def _to_object_id(value: str):
+    try:
+        from bson import ObjectId
+    except ImportError:
+        from mongomock import ObjectId
+    return ObjectId(value)
+
+
+def _encode_value(value: Any) -> Any:
+    # ObjectIds are the only non-JSON values the cursor has to carry
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return {"$oid": str(value)}
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$oid" in value:
+        return _to_object_id(value["$oid"])
+    return value
+
+
+def encode_cursor(document: Dict[str, Any], sort: List[Tuple[str, int]]) -> str:
+    """Opaque cursor pointing just past `document` in `sort` order."""
+    values = [_encode_value(document.get(field)) for field, _ in sort]
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Cursor does not match the sort order")
+    return [_decode_value(value) for value in values]
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Filter on one sort field for the values after `value`, None if there are none.
+
+    A missing field sorts as null, before every other value, and the cursor
+    carries it as null; comparison operators never match null, so it is spelt
+    out in both directions.
+    """
+    if value is None:
+        return {field: {"$ne": None}} if direction > 0 else None
+    if direction > 0:
+        return {field: {"$gt": value}}
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: List[Tuple[str, int]], values: List[Any]) -> Dict[str, Any]:
+    """
+    Filter matching the documents after `values` in `sort` order.
+
+    For a sort on (a, b) this is a > va OR (a == va AND b > vb), which the
+    matching compound index answers as a range scan, unlike skip(). Documents
+    missing a sort field are paged through like those holding null.
+    """
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[index])
+        if after is None:
+            continue
+        clause = {earlier: values[position] for position, (earlier, _) in enumerate(sort[:index])}
+        clause.update(after)
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def normalize_sort(sort: Optional[Dict[str, int]]) -> List[Tuple[str, int]]:
+    """Sort fields in order, ending with _id so every document has a unique position."""
+    fields = [(field, 1 if direction >= 0 else -1) for field, direction in (sort or {}).items() if field != "_id"]
+    fields.append(("_id", (sort or {}).get("_id", fields[-1][1] if fields else 1)))
+    return fields
+
+
+def serialize_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+    return document
+
+
+class InsertBatcher:
+    """
+    Coalesces single-document inserts into one collection into insert_many calls.
+
+    A batch is written as soon as it holds `batch_size` documents or when
+    `flush_interval` seconds have passed since its first document, whichever
+    comes first. Every caller gets back the id of its own document.
+    """
+
+    def __init__(self, store: "AsyncMongoStore", collection: str, batch_size: int, flush_interval: float):
+        self.store = store
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    async def insert(self, document: Dict[str, Any]) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((document, future))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+        return await future
+
+    def flush(self):
+        """Start writing everything pending; returns immediately."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def drain(self):
+        """Flush and wait for every in-flight write to finish."""
+        self.flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        documents = [document for document, _ in batch]
+        failed: Dict[int, Exception] = {}
+        try:
+            # insert_many assigns an _id to every document in place
+            await self.store.run(self.store.db[self.collection].insert_many, documents, ordered=False)
+        except Exception as e:
+            details = getattr(e, "details", None)
+            if not details:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for error in details.get("writeErrors", []):
+                failed[error["index"]] = Exception(error.get("errmsg", "Write error"))
+
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(str(document["_id"]))
+
+
+class AsyncMongoStore:
+    """
+    Async facade over a pymongo-compatible client.
+
+    Blocking driver calls run on a dedicated worker pool sized to the driver's
+    connection pool, and inserts are coalesced per collection by InsertBatcher.
+    """
+
+    def __init__(self, client, database_name: str = Config.DATABASE_NAME, workers: int = Config.STORAGE_WORKERS,
+                 batch_size: int = Config.STORAGE_BATCH_SIZE, flush_interval: float = Config.STORAGE_FLUSH_INTERVAL):
+        self.client = client
+        self.db = client[database_name]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mongo")
+        self._batchers: Dict[str, InsertBatcher] = {}
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking driver call on the worker pool, timed by operation and collection."""
+        # Bound Collection methods name both; anything else is timed by its own name
+        operation = getattr(fn, "__name__", "call")
+        collection = getattr(getattr(fn, "__self__", None), "name", "")
+        return await self._run(operation, collection, fn, *args, **kwargs)
+
+    async def _run(self, operation: str, collection: str, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with span(f"mongo.{operation}", MONGO_SECONDS, operation=operation, collection=collection):
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def insert(self, collection: str, document: Dict[str, Any]) -> str:
+        # Listings page by insertion time
+        document.setdefault("created_at", time.time())
+        batcher = self._batchers.get(collection)
+        if batcher is None:
+            batcher = InsertBatcher(self, collection, self.batch_size, self.flush_interval)
+            self._batchers[collection] = batcher
+        return await batcher.insert(document)
+
+    async def find_one(self, collection: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db[collection].find_one, query)
+
+    async def update_one(self, collection: str, query: Dict[str, Any], update: Dict[str, Any]):
+        return await self.run(self.db[collection].update_one, query, update)
+
+    async def delete_one(self, collection: str, query: Dict[str, Any]):
+        return await self.run(self.db[collection].delete_one, query)
+
+    async def ensure_indexes(self, indexes: Dict[str, List[List[Tuple[str, int]]]] = INDEXES):
+        """Create the declared indexes; a no-op for those that already exist."""
+        for collection, keys in indexes.items():
+            for key in keys:
+                await self.run(self.db[collection].create_index, key)
+
+    async def find_page(self, collection: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                        sort: Optional[Dict[str, int]] = None, limit: int = 50,
+                        cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Read one page of a query, using keyset (cursor) pagination.
+
+        Args:
+        collection (str): Collection to read.
+        query (Dict[str, Any]): Mongo filter.
+        projection (Dict[str, Any]): Mongo projection; the sort fields are always read to build the next cursor.
+        sort (Dict[str, int]): Field to direction (1 or -1), in order; _id is appended as a tie-breaker.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+        cursor (str): next_cursor from the previous page.
+
+        Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: The documents and the cursor of the next page, None on the last page.
+        """
+        order = normalize_sort(sort)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if cursor:
+            after = keyset_filter(order, decode_cursor(cursor, order))
+            query = {"$and": [query, after]} if query else after
+
+        # The sort keys are read even if the projection leaves them out, then dropped again
+        hidden = []
+        if projection:
+            projection = dict(projection)
+            inclusive = any(value for field, value in projection.items() if field != "_id")
+            for field, _ in order:
+                if inclusive and not projection.get(field):
+                    projection[field] = 1
+                    hidden.append(field)
+                elif not inclusive and field in projection:
+                    del projection[field]
+                    hidden.append(field)
+            projection = projection or None
+
+        def read():
+            # One extra document tells whether there is another page
+            return list(self.db[collection].find(query, projection).sort(order).limit(limit + 1))
+
+        documents = await self._run("find", collection, read)
+        next_cursor = encode_cursor(documents[limit - 1], order) if len(documents) > limit else None
+        documents = documents[:limit]
+        for document in documents:
+            for field in hidden:
+                document.pop(field, None)
+        return [serialize_document(document) for document in documents], next_cursor
+
+    async def bulk_write(self, collection: str, operations: List[Dict[str, Any]], ordered: bool = False) -> Dict[str, int]:
+        """
+        Run mixed inserts, updates and deletes in one round trip.
+
+        Args:
+        collection (str): Collection to write.
+        operations (List[Dict[str, Any]]): Each has "op" ("insert", "update" or "delete") and
+            "document" for inserts, or "query" plus "update" for updates; "many" and "upsert" are optional.
+        ordered (bool): Stop at the first failing operation instead of running the rest.
+
+        Returns:
+        Dict[str, int]: Inserted, matched, modified, upserted and deleted counts.
+        """
+        from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+
+        requests = []
+        for operation in operations:
+            op = operation.get("op")
+            many = operation.get("many", False)
+            if op == "insert":
+                document = dict(operation["document"])
+                document.setdefault("created_at", time.time())
+                requests.append(InsertOne(document))
+            elif op == "update":
+                update = operation["update"]
+                if not any(key.startswith("$") for key in update):
+                    update = {"$set": update}
+                request_type = UpdateMany if many else UpdateOne
+                requests.append(request_type(operation["query"], update, upsert=operation.get("upsert", False)))
+            elif op == "delete":
+                requests.append((DeleteMany if many else DeleteOne)(operation["query"]))
+            else:
+                raise ValueError(f"Unknown bulk operation: {op}")
+        if not requests:
+            return {"inserted_count": 0, "matched_count": 0, "modified_count": 0, "upserted_count": 0, "deleted_count": 0}
+
+        result = await self.run(self.db[collection].bulk_write, requests, ordered=ordered)
+        return {
+            "inserted_count": result.inserted_count,
+            "matched_count": result.matched_count,
+            "modified_count": result.modified_count,
+            "upserted_count": result.upserted_count,
+            "deleted_count": result.deleted_count
+        }
+
+    async def flush(self):
+        await asyncio.gather(*(batcher.drain() for batcher in self._batchers.values()))
+
+    async def close(self):
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        self.client.close()
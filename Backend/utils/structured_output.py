@@ -0,0 +1,380 @@
+# Backend/utils/structured_output.py
+
+import json
+import re
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+FENCE = re.compile(r"```[a-zA-Z]*\s*")
+FENCE_OPENING = re.compile(r"```[a-zA-Z]*\s*$")
+FENCED_BLOCK = re.compile(r"```[a-zA-Z]*\s*(.*?)```", re.DOTALL)
+TRAILING_COMMA = re.compile(r",\s*([\]}])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+PYTHON_LITERALS = re.compile(r"\b(True|False|None)\b")
+PYTHON_TO_JSON = {"True": "true", "False": "false", "None": "null"}
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+DANGLING_KEY = re.compile(r'"(?:[^"\\]|\\.)*"\s*:$|:$')
+SINGLE_QUOTED = re.compile(r"'((?:[^'\\]|\\.)*)'(?=\s*[,\]}:])")
+LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+?)\s*$")
+CLOSERS = {"[": "]", "{": "}"}
+
+
+class StructuredOutputError(ValueError):
+    """The response did not contain the structured data that was asked for."""
+
+
+def strip_code_fences(text: str) -> str:
+    return FENCE.sub("", text).replace("```", "")
+
+
+def _scan_value(text: str, position: int) -> Tuple[Optional[int], Optional[int]]:
+    """Start and end of the first array or object opened at or after `position`; end is None if it is never closed."""
+    start = None
+    stack = []
+    in_string = False
+    escaped = False
+    for index in range(position, len(text)):
+        char = text[index]
+        if start is None:
+            if char in CLOSERS:
+                start = index
+                stack.append(CLOSERS[char])
+            continue
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                return start, index + 1
+    return start, None
+
+
+def _value_candidates(text: str) -> List[str]:
+    """
+    The arrays and objects in `text`, most likely answer first.
+
+    Complete top-level values come last first, as models tend to put examples
+    or asides before the answer. Then a value left open at the end (a truncated
+    response, for repair_json to close), then values inside it, in case its
+    opening bracket was just prose.
+    """
+    values = []
+    tail = None
+    nested = []
+    position = 0
+    while True:
+        start, end = _scan_value(text, position)
+        if start is None:
+            break
+        if end is None:
+            if tail is None:
+                tail = text[start:]
+            else:
+                nested.append(text[start:])
+            position = start + 1
+        elif tail is None:
+            values.append(text[start:end])
+            position = end
+        else:
+            nested.append(text[start:end])
+            position = end
+    return values[::-1] + ([tail] if tail is not None else []) + nested[::-1]
+
+
+def json_candidates(text: str) -> List[str]:
+    """
+    Spans of `text` that may hold the JSON asked for, in the order to try them.
+
+    Values in fenced code blocks come first, then those in the rest of the
+    response (see _value_candidates).
+    """
+    candidates = [span for block in FENCED_BLOCK.findall(text) for span in _value_candidates(block)]
+    candidates += _value_candidates(strip_code_fences(text))
+    return list(dict.fromkeys(candidates))
+
+
+def find_json_span(text: str) -> Optional[str]:
+    """
+    Return the JSON array or object most likely to be the answer in `text`, skipping any prose around it.
+
+    If the text ends before the value is closed (a truncated response), the
+    unterminated tail is returned so repair_json can close it.
+    """
+    candidates = json_candidates(text)
+    return candidates[0] if candidates else None
+
+
+def _outside_strings(text: str, fix: Callable[[str], str]) -> str:
+    """Apply `fix` to the parts of `text` that are not inside string literals."""
+    parts = []
+    last = 0
+    for match in STRING.finditer(text):
+        parts.append(fix(text[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(fix(text[last:]))
+    return "".join(parts)
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the mistakes LLMs commonly make in JSON: smart or single quotes, Python
+    literals, trailing commas, and brackets left open by a truncated response.
+    """
+    text = text.translate(SMART_QUOTES)
+    if '"' not in text:
+        text = SINGLE_QUOTED.sub(lambda match: json.dumps(match.group(1)), text)
+
+    stack = []
+    in_string = False
+    escaped = False
+    string_start = 0
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            string_start = index
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+
+    # A truncated response: drop the unfinished string (and a key left without its value), then close what is open
+    if in_string:
+        text = text[:string_start]
+    text = DANGLING_KEY.sub("", text.rstrip()).rstrip().rstrip(",") + "".join(reversed(stack))
+
+    def fix(part: str) -> str:
+        part = PYTHON_LITERALS.sub(lambda match: PYTHON_TO_JSON[match.group(1)], part)
+        return TRAILING_COMMA.sub(r"\1", part)
+
+    return _outside_strings(text, fix)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the JSON array or object in an LLM response.
+
+    Candidates are tried in json_candidates() order, each as is and then
+    repaired; the first that parses wins.
+
+    Raises:
+    StructuredOutputError: No JSON value could be found or repaired.
+    """
+    candidates = json_candidates(text)
+    if not candidates:
+        raise StructuredOutputError("No JSON array or object in the response")
+    error = None
+    for span in candidates:
+        try:
+            return json.loads(span)
+        except json.JSONDecodeError:
+            pass
+        try:
+            return json.loads(repair_json(span))
+        except json.JSONDecodeError as e:
+            error = error or e
+    raise StructuredOutputError(f"Could not parse JSON from the response: {error}")
+
+
+def _as_list(value: Any) -> Optional[List[Any]]:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        # e.g. {"topics": [...]}
+        for item in value.values():
+            if isinstance(item, list):
+                return item
+    return None
+
+
+def parse_json_list(text: str, item: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+    """
+    Parse a list from an LLM response, falling back to a bulleted or numbered list in prose.
+
+    Args:
+    text (str): The response text.
+    item (Callable[[Any], Any]): Converts each element, returning None to drop it.
+
+    Returns:
+    List[Any]: The converted elements, possibly empty.
+    """
+    try:
+        values = _as_list(extract_json(text))
+    except StructuredOutputError:
+        values = None
+    if values is None:
+        values = [match.group(1) for match in map(LIST_ITEM.match, text.splitlines()) if match]
+    if item is not None:
+        values = [item(value) for value in values]
+    return [value for value in values if value is not None]
+
+
+def text_item(key: Optional[str] = None) -> Callable[[Any], Optional[str]]:
+    """Element converter for lists of strings; objects are read through `key` (or their first string value)."""
+    def convert(value: Any) -> Optional[str]:
+        if isinstance(value, dict):
+            value = value.get(key) if key else next((v for v in value.values() if isinstance(v, str)), None)
+        if not isinstance(value, str):
+            return None
+        value = value.strip().strip('"').strip()
+        return value or None
+    return convert
+
+
+def fit_count(items: List[Any], count: int, fill: Optional[Callable[[List[Any], int], List[Any]]] = None) -> List[Any]:
+    """
+    Make `items` exactly `count` long: extra items are dropped, missing ones come from `fill`.
+
+    Args:
+    items (List[Any]): Parsed items.
+    count (int): Number requested.
+    fill (Callable[[List[Any], int], List[Any]]): Given the items so far and how many are missing, returns replacements.
+
+    Raises:
+    StructuredOutputError: Items are missing and there is no `fill`, or it could not supply enough.
+    """
+    items = list(items[:count])
+    if len(items) < count and fill is not None:
+        items.extend(fill(items, count - len(items))[:count - len(items)])
+    if len(items) < count:
+        raise StructuredOutputError(f"Expected {count} items, got {len(items)}")
+    return items
+
+
+class JsonArrayStreamParser:
+    """
+    Pulls the elements of a JSON array out of a response while it is still streaming.
+
+    Feed it chunks as they arrive; every element completed by a chunk is
+    returned straight away, so work on the first element can start before the
+    model has written the last one. Only an array that opens the response or
+    a code fence is streamed: one after prose may be an example rather than
+    the answer.
+
+    The answer itself is picked by close() the way parse_json_list picks it
+    from the whole response (fenced blocks first, then the last complete
+    value), so streaming never changes which array is used. If that is not
+    the array that was streamed, `diverged` is set and close() returns all
+    of the answer's elements.
+    """
+
+    def __init__(self, item: Optional[Callable[[Any], Any]] = None):
+        self.item = item
+        self.diverged = False
+        self._buffer = ""
+        self._position = 0
+        self._started = False
+        self._finished = False
+        self._closed = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start: Optional[int] = None
+        self._emitted: List[Any] = []
+
+    def _emit(self, raw: str, items: List[Any]):
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                value = json.loads(repair_json(raw))
+            except json.JSONDecodeError:
+                return
+        if self.item is not None:
+            value = self.item(value)
+        if value is not None:
+            items.append(value)
+            self._emitted.append(value)
+
+    def _opens_answer(self, index: int) -> bool:
+        """Whether the bracket at `index` starts the response or a code fence."""
+        before = self._buffer[:index]
+        return not before.strip() or (before.count("```") % 2 == 1 and FENCE_OPENING.search(before) is not None)
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of the response; returns the elements it completed."""
+        items: List[Any] = []
+        if self._closed:
+            return items
+        self._buffer += chunk
+        buffer = self._buffer
+        if self._finished:
+            return items
+        for index in range(self._position, len(buffer)):
+            char = buffer[index]
+            if not self._started:
+                if char == "[" and self._opens_answer(index):
+                    self._started = True
+                    self._depth = 1
+                    self._element_start = index + 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[self._element_start:index], items)
+                    self._finished = True
+                    break
+            elif char == "," and self._depth == 1:
+                self._emit(buffer[self._element_start:index], items)
+                self._element_start = index + 1
+        self._position = len(buffer)
+        return items
+
+    def close(self) -> List[Any]:
+        """End of the response: returns the elements of the answer that feed() has not returned."""
+        if self._closed:
+            return []
+        self._closed = True
+        answer = parse_json_list(self._buffer, self.item)
+        streamed = len(self._emitted)
+        if answer[:streamed] == self._emitted:
+            return answer[streamed:]
+        self.diverged = True
+        return answer
+
+
+async def iter_json_list(chunks: AsyncIterator[str], item: Optional[Callable[[Any], Any]] = None) -> AsyncIterator[Any]:
+    """
+    Yield the elements of a streamed JSON array as soon as each one is complete.
+
+    Raises:
+    StructuredOutputError: The array streamed was not the answer (see JsonArrayStreamParser).
+    """
+    parser = JsonArrayStreamParser(item)
+    async for chunk in chunks:
+        for value in parser.feed(chunk):
+            yield value
+    remaining = parser.close()
+    if parser.diverged:
+        raise StructuredOutputError("The streamed array was not the answer in the response")
+    for value in remaining:
+        yield value
@@ -0,0 +1,374 @@
+# Backend/utils/work_queue.py
+
+import itertools
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from Backend.config import Config
+
+
+class WorkQueue:
+    """
+    Pending and in-flight work items for the content workers.
+
+    An item is a dict with "id", "payload" and "attempts". Items move from
+    pending to in-flight when leased to a worker and leave the queue when
+    acknowledged; in-flight items whose lease expires can be requeued.
+    """
+
+    def push(self, item: Dict[str, Any], front: bool = False):
+        raise NotImplementedError
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def lease(self, item: Dict[str, Any], worker: str, deadline: float):
+        raise NotImplementedError
+
+    def renew(self, item_id: str, deadline: float) -> bool:
+        """Move an in-flight item's lease deadline; False if it is not in flight (acked, expired or never leased)."""
+        raise NotImplementedError
+
+    def ack(self, item_id: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """Remove an item; returns it with the worker holding it, or None if it is unknown (e.g. already acked)."""
+        raise NotImplementedError
+
+    def expired(self, now: float) -> List[Tuple[Dict[str, Any], str]]:
+        """Take back every in-flight item whose lease ended before `now`, with the worker that held it."""
+        raise NotImplementedError
+
+    def contains(self, item_id: str) -> bool:
+        """Whether an item is pending or in flight, e.g. one that outlived a coordinator restart."""
+        raise NotImplementedError
+
+    def pending_count(self) -> int:
+        raise NotImplementedError
+
+    def inflight_count(self) -> int:
+        raise NotImplementedError
+
+
+class InProcessWorkQueue(WorkQueue):
+    """WorkQueue kept in this process's memory."""
+
+    def __init__(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._pending: Deque[str] = deque()
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def push(self, item: Dict[str, Any], front: bool = False):
+        self._items[item["id"]] = item
+        if front:
+            self._pending.appendleft(item["id"])
+        else:
+            self._pending.append(item["id"])
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        while self._pending:
+            item_id = self._pending.popleft()
+            # Acked items are dropped lazily instead of being searched for in the deque
+            if item_id in self._items and item_id not in self._leases:
+                return self._items[item_id]
+        return None
+
+    def lease(self, item: Dict[str, Any], worker: str, deadline: float):
+        self._items[item["id"]] = item
+        self._leases[item["id"]] = (worker, deadline)
+
+    def renew(self, item_id: str, deadline: float) -> bool:
+        lease = self._leases.get(item_id)
+        if lease is None:
+            return False
+        self._leases[item_id] = (lease[0], deadline)
+        return True
+
+    def ack(self, item_id: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return None
+        worker, _ = self._leases.pop(item_id, (None, None))
+        return item, worker
+
+    def expired(self, now: float) -> List[Tuple[Dict[str, Any], str]]:
+        expired = [(item_id, worker) for item_id, (worker, deadline) in self._leases.items() if deadline < now]
+        for item_id, _ in expired:
+            del self._leases[item_id]
+        return [(self._items[item_id], worker) for item_id, worker in expired]
+
+    def contains(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def pending_count(self) -> int:
+        return sum(1 for item_id in self._pending if item_id in self._items and item_id not in self._leases)
+
+    def inflight_count(self) -> int:
+        return len(self._leases)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the handful of Redis commands RedisWorkQueue uses.
+
+    Lets the Redis-backed queue run without a server, e.g. in development and
+    benchmarks; pass a redis.Redis client instead in production.
+    """
+
+    def __init__(self):
+        self._lists: Dict[str, Deque[str]] = {}
+        self._hashes: Dict[str, Dict[str, str]] = {}
+        self._zsets: Dict[str, Dict[str, float]] = {}
+
+    def rpush(self, key: str, value: str):
+        self._lists.setdefault(key, deque()).append(value)
+
+    def lpush(self, key: str, value: str):
+        self._lists.setdefault(key, deque()).appendleft(value)
+
+    def lpop(self, key: str) -> Optional[str]:
+        values = self._lists.get(key)
+        return values.popleft() if values else None
+
+    def lrange(self, key: str, start: int, end: int) -> List[str]:
+        values = list(self._lists.get(key, ()))
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    def hset(self, key: str, field: str, value: str):
+        self._hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self._hashes.get(key, {}).get(field)
+
+    def hdel(self, key: str, field: str) -> int:
+        return 1 if self._hashes.get(key, {}).pop(field, None) is not None else 0
+
+    def hexists(self, key: str, field: str) -> bool:
+        return field in self._hashes.get(key, {})
+
+    def zadd(self, key: str, mapping: Dict[str, float]):
+        self._zsets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key: str, minimum: float, maximum: float) -> List[str]:
+        members = self._zsets.get(key, {})
+        return sorted((member for member, score in members.items() if minimum <= score <= maximum), key=members.get)
+
+    def zrem(self, key: str, member: str) -> int:
+        return 1 if self._zsets.get(key, {}).pop(member, None) is not None else 0
+
+    def zcard(self, key: str) -> int:
+        return len(self._zsets.get(key, {}))
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    WorkQueue stored in Redis: a pending list, an item hash and a sorted set of
+    lease deadlines. Works with redis.Redis(decode_responses=True) or LocalRedis.
+    """
+
+    def __init__(self, client, prefix: str = "createmate:content"):
+        self.client = client
+        self._pending = f"{prefix}:pending"
+        self._items = f"{prefix}:items"
+        self._leases = f"{prefix}:leases"
+        self._workers = f"{prefix}:workers"
+
+    def push(self, item: Dict[str, Any], front: bool = False):
+        self.client.hset(self._items, item["id"], json.dumps(item))
+        if front:
+            self.client.lpush(self._pending, item["id"])
+        else:
+            self.client.rpush(self._pending, item["id"])
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        while True:
+            item_id = self.client.lpop(self._pending)
+            if item_id is None:
+                return None
+            if self.client.hexists(self._workers, item_id):
+                continue
+            raw = self.client.hget(self._items, item_id)
+            if raw is not None:
+                return json.loads(raw)
+
+    def lease(self, item: Dict[str, Any], worker: str, deadline: float):
+        self.client.hset(self._items, item["id"], json.dumps(item))
+        self.client.hset(self._workers, item["id"], worker)
+        self.client.zadd(self._leases, {item["id"]: deadline})
+
+    def renew(self, item_id: str, deadline: float) -> bool:
+        if not self.client.hexists(self._workers, item_id):
+            return False
+        self.client.zadd(self._leases, {item_id: deadline})
+        return True
+
+    def ack(self, item_id: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        raw = self.client.hget(self._items, item_id)
+        if raw is None:
+            return None
+        worker = self.client.hget(self._workers, item_id)
+        self.client.hdel(self._items, item_id)
+        self.client.hdel(self._workers, item_id)
+        self.client.zrem(self._leases, item_id)
+        return json.loads(raw), worker
+
+    def expired(self, now: float) -> List[Tuple[Dict[str, Any], str]]:
+        expired = []
+        for item_id in self.client.zrangebyscore(self._leases, float("-inf"), now):
+            # zrem doubles as a claim when several coordinators share the queue
+            if not self.client.zrem(self._leases, item_id):
+                continue
+            worker = self.client.hget(self._workers, item_id)
+            self.client.hdel(self._workers, item_id)
+            raw = self.client.hget(self._items, item_id)
+            if raw is not None:
+                expired.append((json.loads(raw), worker))
+        return expired
+
+    def contains(self, item_id: str) -> bool:
+        return self.client.hexists(self._items, item_id)
+
+    def pending_count(self) -> int:
+        return sum(
+            1 for item_id in self.client.lrange(self._pending, 0, -1)
+            if not self.client.hexists(self._workers, item_id) and self.client.hget(self._items, item_id) is not None
+        )
+
+    def inflight_count(self) -> int:
+        return self.client.zcard(self._leases)
+
+
+def create_work_queue(backend: str = Config.WORK_QUEUE_BACKEND) -> WorkQueue:
+    """
+    Build the content work queue.
+
+    Args:
+    backend (str): "memory", or "redis" (uses REDIS_URL when set, otherwise the in-process LocalRedis stand-in).
+    """
+    if backend == "memory":
+        return InProcessWorkQueue()
+    if backend == "redis":
+        if Config.REDIS_URL:
+            import redis
+
+            return RedisWorkQueue(redis.Redis.from_url(Config.REDIS_URL, decode_responses=True))
+        return RedisWorkQueue(LocalRedis())
+    raise ValueError(f"Unknown work queue backend: {backend}")
+
+
+class WorkDispatcher:
+    """
+    Assigns queued work to a pool of workers and tracks it until acknowledged.
+
+    Each worker takes at most `capacity` items at a time. Workers are picked
+    round-robin or by fewest items in flight. Workers renew the lease of an
+    item while they work on it; an item whose lease runs out (the worker died
+    or hung) is put back at the front of the queue for another
+    worker, up to `max_attempts` deliveries.
+
+    Args:
+    queue (WorkQueue): Where pending and in-flight items are kept.
+    strategy (str): "least_loaded" or "round_robin".
+    capacity (int): Items in flight per worker.
+    lease_timeout (float): Seconds a worker has to acknowledge or renew an item.
+    max_attempts (int): Deliveries before an item is given up on.
+    """
+
+    def __init__(self, queue: WorkQueue, strategy: str = Config.CONTENT_DISPATCH_STRATEGY,
+                 capacity: int = Config.CONTENT_WORKER_CAPACITY, lease_timeout: float = Config.CONTENT_LEASE_TIMEOUT,
+                 max_attempts: int = Config.CONTENT_MAX_ATTEMPTS):
+        if strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown dispatch strategy: {strategy}")
+        self.queue = queue
+        self.strategy = strategy
+        self.capacity = capacity
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.workers: List[str] = []
+        self._inflight: Dict[str, int] = {}
+        self._round_robin = itertools.count()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._started = time.time()
+
+    def set_workers(self, workers: List[str]):
+        self.workers = [worker for worker in dict.fromkeys(workers) if worker]
+        for worker in self.workers:
+            self._inflight.setdefault(worker, 0)
+            self._stats.setdefault(worker, {"assigned": 0, "completed": 0, "expired": 0, "busy_seconds": 0.0})
+
+    def submit(self, item_id: str, payload: Dict[str, Any], front: bool = False):
+        """Queue an item; `front` puts it ahead of everything pending, for work a user is waiting on."""
+        self.queue.push({"id": item_id, "payload": payload, "attempts": 0}, front=front)
+
+    def _pick_worker(self) -> Optional[str]:
+        available = [worker for worker in self.workers if self._inflight[worker] < self.capacity]
+        if not available:
+            return None
+        if self.strategy == "round_robin":
+            return available[next(self._round_robin) % len(available)]
+        return min(available, key=lambda worker: self._inflight[worker])
+
+    def assign(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Lease pending items to workers with spare capacity; returns the (worker, item) pairs to send."""
+        now = now or time.time()
+        assignments = []
+        while True:
+            worker = self._pick_worker()
+            if worker is None:
+                break
+            item = self.queue.pop()
+            if item is None:
+                break
+            item["attempts"] += 1
+            item["leased_at"] = now
+            self.queue.lease(item, worker, now + self.lease_timeout)
+            self._inflight[worker] += 1
+            self._stats[worker]["assigned"] += 1
+            assignments.append((worker, item))
+        return assignments
+
+    def renew(self, item_id: str, now: Optional[float] = None) -> bool:
+        """Extend the lease of an item its worker is still working on; False if it is no longer in flight."""
+        return self.queue.renew(item_id, (now or time.time()) + self.lease_timeout)
+
+    def ack(self, item_id: str, now: Optional[float] = None) -> bool:
+        """Mark an item done; False if it was already acknowledged (a duplicate delivery)."""
+        acked = self.queue.ack(item_id)
+        if acked is None:
+            return False
+        item, worker = acked
+        if worker in self._inflight:
+            self._inflight[worker] = max(0, self._inflight[worker] - 1)
+            self._stats[worker]["completed"] += 1
+            self._stats[worker]["busy_seconds"] += (now or time.time()) - item.get("leased_at", now or time.time())
+        return True
+
+    def reap_expired(self, now: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Requeue items whose lease ran out; returns (redelivered, abandoned) items."""
+        redelivered, abandoned = [], []
+        for item, worker in self.queue.expired(now or time.time()):
+            if worker in self._inflight:
+                self._inflight[worker] = max(0, self._inflight[worker] - 1)
+                self._stats[worker]["expired"] += 1
+            if item["attempts"] < self.max_attempts:
+                redelivered.append(item)
+            else:
+                self.queue.ack(item["id"])
+                abandoned.append(item)
+        # Back to the front of the queue, keeping their original order
+        for item in reversed(redelivered):
+            self.queue.push(item, front=True)
+        return redelivered, abandoned
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self._started, 1e-9)
+        workers = {}
+        for worker, stats in self._stats.items():
+            completed = stats["completed"]
+            workers[worker] = {
+                **stats,
+                "inflight": self._inflight.get(worker, 0),
+                "throughput_per_minute": completed / elapsed * 60,
+                "mean_seconds": stats["busy_seconds"] / completed if completed else None
+            }
+        return {"pending": self.queue.pending_count(), "inflight": self.queue.inflight_count(), "workers": workers}
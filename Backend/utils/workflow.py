@@ -0,0 +1,110 @@
+# Backend/utils/workflow.py
+
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Step states; a step moves pending -> issued -> done or failed
+PENDING = "pending"  # Known to be needed, request not sent yet
+ISSUED = "issued"  # Request sent, reply not recorded yet; may have been lost if the coordinator stopped
+DONE = "done"
+FAILED = "failed"
+TRANSITIONS = {
+    PENDING: (ISSUED, DONE, FAILED),  # Done without being issued: a reply to a request sent before steps were recorded
+    ISSUED: (ISSUED, DONE, FAILED),  # Issued again: re-sent after a restart
+    DONE: (),
+    FAILED: ()
+}
+
+# Campaign states, derived from its steps
+SCHEDULING = "scheduling"  # Waiting for the schedule
+GENERATING = "generating"  # Topics or posts outstanding
+COMPLETE = "complete"  # Every step done or failed
+CAMPAIGN_STATES = (SCHEDULING, GENERATING, COMPLETE)
+
+SCHEDULE_STEP = "schedule"
+TOPICS_STEP = "topics"
+POST_STEP_PREFIX = "post:"
+
+
+def post_step(day: str) -> str:
+    return POST_STEP_PREFIX + day
+
+
+def step_day(step: str) -> Optional[str]:
+    """The posting day of a post step, None for any other step."""
+    return step[len(POST_STEP_PREFIX):] if step.startswith(POST_STEP_PREFIX) else None
+
+
+class CampaignWorkflow:
+    """
+    Where each step of each campaign stands, checkpointed with the session.
+
+    A campaign is a handful of steps: its schedule, its topic suggestions and
+    one post per posting day. Every transition is written through the session
+    store before the request it records is sent, so after a restart the steps
+    still issued are exactly the requests that may have been lost; outstanding()
+    lists them for the coordinator to send again, and nothing done is paid for
+    twice.
+
+    A step that is done or failed ignores further transitions, which also drops
+    duplicate replies, such as the original reply to a request re-sent after a
+    restart.
+
+    Args:
+    sessions (SessionStore): Where sessions, and so their checkpoints, are kept.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+    def advance(self, session: Dict[str, Any], steps: Iterable[str], status: str, **details: Any) -> List[str]:
+        """
+        Move steps to `status` in one checkpoint.
+
+        Args:
+        session (dict): The campaign's session.
+        steps (Iterable[str]): Steps to move, e.g. [post_step("Monday")].
+        status (str): ISSUED, DONE or FAILED.
+        details: Recorded on each step, e.g. the request id and priority of a post.
+
+        Returns:
+        List[str]: The steps that moved; the others were already past `status`.
+        """
+        workflow = dict(session["workflow"])
+        moved = []
+        now = time.time()
+        for step in steps:
+            entry = workflow.get(step, {"status": PENDING, "attempts": 0})
+            if status not in TRANSITIONS[entry["status"]]:
+                continue
+            entry = {**entry, **details, "status": status, "updated_at": now}
+            if status == ISSUED:
+                entry["attempts"] += 1
+            workflow[step] = entry
+            moved.append(step)
+        if moved:
+            self.sessions.set_field(session, "workflow", workflow)
+        return moved
+
+    @staticmethod
+    def status(session: Dict[str, Any], step: str) -> str:
+        return session["workflow"].get(step, {}).get("status", PENDING)
+
+    @staticmethod
+    def outstanding(session: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Steps issued without a reply recorded, by name."""
+        return {step: entry for step, entry in session["workflow"].items() if entry["status"] == ISSUED}
+
+    @staticmethod
+    def state(session: Dict[str, Any]) -> str:
+        """SCHEDULING, GENERATING or COMPLETE."""
+        workflow = session["workflow"]
+        if workflow.get(SCHEDULE_STEP, {}).get("status") not in (DONE, FAILED):
+            return SCHEDULING
+        if any(entry["status"] in (PENDING, ISSUED) for entry in workflow.values()):
+            return GENERATING
+        days = (session["schedule"] or {}).get("posting_days", [])
+        finished = {step_day(step) for step, entry in workflow.items() if step_day(step) is not None}
+        if workflow[SCHEDULE_STEP]["status"] == DONE and not finished.issuperset(days):
+            return GENERATING
+        return COMPLETE
@@ -1,6 +1,27 @@
 // Base URL of your backend API
 const BASE_URL = 'http://localhost:8000';
 
+// Session of the campaign started by the last submitted user input
+let sessionId = null;
+
+// Live updates for the current session (Server-Sent Events)
+let eventSource = null;
+let streamedContent = [];
+let reportedFailures = new Set();
+let streamingPost = '';
+
+// Idempotency key of each form's last unanswered submission: a double submit or a
+// retry of the same payload reuses it, so the backend runs the submission only once
+const pendingSubmissions = {};
+
+function idempotencyKey(form, body) {
+    const pending = pendingSubmissions[form];
+    if (!pending || pending.body !== body) {
+        pendingSubmissions[form] = { body: body, key: crypto.randomUUID() };
+    }
+    return pendingSubmissions[form].key;
+}
+
 // Handle User Input Form Submission
 document.getElementById('user-input-form').addEventListener('submit', async function (e) {
     e.preventDefault();
@@ -14,22 +35,32 @@ document.getElementById('user-input-form').addEventListener('submit', async func
         area_of_interest: areaOfInterest,
         content_type: contentType,
         keywords: keywords,
-        post_frequency: postFrequency
+        post_frequency: postFrequency,
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone
     };
 
     try {
+        const body = JSON.stringify(payload);
         const response = await fetch(`${BASE_URL}/user-input`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Idempotency-Key': idempotencyKey('user-input', body)
             },
-            body: JSON.stringify(payload)
+            body: body
         });
 
         if (response.ok) {
+            delete pendingSubmissions['user-input'];
+            const data = await response.json();
+            sessionId = data.session_id;
             alert('User input submitted successfully.');
-            // Wait for the backend to process
-            setTimeout(fetchGeneratedContent, 5000);
+            if (window.EventSource) {
+                streamSession();
+            } else {
+                // Wait for the backend to process
+                setTimeout(fetchGeneratedContent, 5000);
+            }
         } else {
             const errorData = await response.json();
             alert('Error submitting user input: ' + errorData.detail);
@@ -39,15 +70,68 @@ document.getElementById('user-input-form').addEventListener('submit', async func
     }
 });
 
+// Stream the session's posts as soon as the backend receives them
+function streamSession() {
+    if (eventSource) {
+        eventSource.close();
+    }
+    streamedContent = [];
+    reportedFailures = new Set();
+    streamingPost = '';
+    eventSource = new EventSource(`${BASE_URL}/stream?session_id=${encodeURIComponent(sessionId)}`);
+
+    // Show the first post while it is still being written
+    eventSource.addEventListener('content_chunk', function (e) {
+        const chunk = JSON.parse(e.data);
+        if (streamedContent.length === 0) {
+            streamingPost += chunk.text;
+            displayGeneratedContent({ day: chunk.day, topic: chunk.topic, content: streamingPost });
+            document.getElementById('generated-content-section').style.display = 'block';
+        }
+    });
+
+    eventSource.addEventListener('content', function (e) {
+        const content = JSON.parse(e.data);
+        // A replayed post (after a reconnect) replaces the one already shown for its day
+        const index = streamedContent.findIndex(post => post.day === content.day);
+        if (index !== -1) {
+            streamedContent[index] = content;
+        } else {
+            streamedContent.push(content);
+        }
+        if (streamedContent.length === 1) {
+            displayGeneratedContent(streamedContent[0]);
+            document.getElementById('generated-content-section').style.display = 'block';
+        } else {
+            displayAllGeneratedContent(streamedContent);
+            document.getElementById('all-content-section').style.display = 'block';
+        }
+    });
+
+    // An agent gave up on part of the campaign after retrying
+    eventSource.addEventListener('failure', function (e) {
+        const failure = JSON.parse(e.data);
+        const key = `${failure.stage}:${failure.request_id}:${failure.failed_at}`;
+        if (reportedFailures.has(key)) {
+            return;
+        }
+        reportedFailures.add(key);
+        alert(`Could not generate ${failure.stage}: ${failure.error}`);
+    });
+}
+
 // Fetch Generated Content
 async function fetchGeneratedContent() {
     try {
-        const response = await fetch(`${BASE_URL}/state`);
+        // Only the first post is shown here; the browser revalidates with the ETag between polls
+        const response = await fetch(`${BASE_URL}/state?session_id=${encodeURIComponent(sessionId)}&fields=generated_content,errors&limit=1`);
         if (response.ok) {
             const state = await response.json();
             if (state.generated_content && state.generated_content.length > 0) {
                 displayGeneratedContent(state.generated_content[0]);
                 document.getElementById('generated-content-section').style.display = 'block';
+            } else if (state.errors && state.errors.length > 0) {
+                alert('Error generating content: ' + state.errors[0].error);
             } else {
                 // Wait and retry if content not yet generated
                 setTimeout(fetchGeneratedContent, 3000);
@@ -81,22 +165,28 @@ document.getElementById('feedback-form').addEventListener('submit', async functi
 
     const payload = {
         liked: liked,
-        comments: comments
+        comments: comments,
+        session_id: sessionId
     };
 
     try {
+        const body = JSON.stringify(payload);
         const response = await fetch(`${BASE_URL}/feedback`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Idempotency-Key': idempotencyKey('feedback', body)
             },
-            body: JSON.stringify(payload)
+            body: body
         });
 
         if (response.ok) {
+            delete pendingSubmissions['feedback'];
             alert('Feedback submitted successfully.');
-            // Wait for the backend to process
-            setTimeout(fetchAllGeneratedContent, 10000);
+            // The event stream keeps delivering posts; poll only without it
+            if (!eventSource) {
+                setTimeout(fetchAllGeneratedContent, 10000);
+            }
         } else {
             const errorData = await response.json();
             alert('Error submitting feedback: ' + errorData.detail);
@@ -109,7 +199,7 @@ document.getElementById('feedback-form').addEventListener('submit', async functi
 // Fetch All Generated Content
 async function fetchAllGeneratedContent() {
     try {
-        const response = await fetch(`${BASE_URL}/state`);
+        const response = await fetch(`${BASE_URL}/state?session_id=${encodeURIComponent(sessionId)}`);
         if (response.ok) {
             const state = await response.json();
             if (state.generated_content && state.generated_content.length > 0) {
@@ -0,0 +1,91 @@
+# benchmarks/bench_api_latency.py
+#
+# Measures p50/p99 latency of coordinator round-trips as made by the API:
+#   query  - one uagents.query per request (the previous behaviour)
+#   http   - the persistent HttpGateway
+#   local  - LocalGateway, coordinator on the same event loop (started by this script)
+#
+# The query and http modes expect the coordinator to be running already
+# (python -m Backend.Agents.main_coordinator_agent) with MAIN_COORDINATOR_ADDRESS set.
+#
+# Usage: python -m benchmarks.bench_api_latency --mode http --requests 500 --concurrency 20
+
+import argparse
+import asyncio
+import json
+import time
+
+from Backend.api.gateway import LocalGateway, create_gateway
+from Backend.config import Config
+from Backend.models import StateRequest
+from benchmarks.common import summarize
+
+
+async def query_once(session_id: str):
+    from uagents.query import query
+
+    response = await query(destination=Config.MAIN_COORDINATOR_ADDRESS, message=StateRequest(session_id=session_id), timeout=30.0)
+    return json.loads(response.decode_payload())
+
+
+async def run(mode: str, requests: int, concurrency: int):
+    agent_task = None
+    if mode == "local":
+        from Backend.Agents.main_coordinator_agent import main_agent
+
+        gateway = LocalGateway([main_agent])
+        agent_task = asyncio.create_task(main_agent.run_async())
+        await asyncio.sleep(1.0)
+    elif mode == "http":
+        gateway = create_gateway("http")
+    else:
+        gateway = None
+
+    if gateway is not None:
+        await gateway.start()
+
+    async def call():
+        if gateway is None:
+            return await query_once("bench")
+        return await gateway.query(Config.MAIN_COORDINATOR_ADDRESS, StateRequest(session_id="bench"))
+
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def timed_call():
+        async with slots:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up connections and identities before measuring
+    await asyncio.gather(*(timed_call() for _ in range(concurrency)))
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed_call() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    if gateway is not None:
+        await gateway.close()
+    if agent_task is not None:
+        agent_task.cancel()
+
+    result = summarize(latencies)
+    result.update({"mode": mode, "concurrency": concurrency, "throughput_rps": requests / elapsed})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator query latency benchmark")
+    parser.add_argument("--mode", choices=["query", "http", "local"], default="http")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.mode, args.requests, args.concurrency))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
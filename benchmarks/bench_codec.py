@@ -0,0 +1,101 @@
+# benchmarks/bench_codec.py
+#
+# Cost of sending a campaign's documents from the coordinator to the storage
+# agent with each payload codec: time to encode and decode every StoreData
+# message, and the bytes of message JSON that go on the wire (uagents then
+# base64s it into the envelope, which scales every codec alike). "ref" is the
+# same-process path, where post bodies go through the blob store by id.
+#
+# Posts are pseudo-English text, so they compress about as well as real
+# ones; msgpack codecs are only measured when msgpack (and zstandard) are
+# installed.
+#
+# Usage: python -m benchmarks.bench_codec [--post-words 300] [--repeat 200]
+
+import argparse
+import json
+import random
+import time
+
+from Backend.utils.codec import CODECS, incoming_payload, outgoing_payload, peer_codecs
+from Backend.utils.metrics import PROCESS_ID
+
+WORDS = (
+    "the of and to in is you that it he was for on are as with his they at be this have from or one had by word but not "
+    "what all were we when your can said there use an each which she do how their if will up other about out many then "
+    "them these so some her would make like him into time has look two more write go see number no way could people my "
+    "than first water been call who oil its now find long down day did get come made may part brand growth content "
+    "audience strategy marketing social campaign post engage share story idea customer value trend tip guide week plan"
+).split()
+
+
+def post_text(rng: random.Random, words: int) -> str:
+    # Zipf-like word choice, sentences of 8 to 20 words
+    chosen, sentence = [], 0
+    for _ in range(words):
+        word = WORDS[min(int(rng.paretovariate(1.1)) - 1, len(WORDS) - 1)]
+        chosen.append(word.capitalize() if sentence == 0 else word)
+        sentence += 1
+        if sentence >= rng.randint(8, 20):
+            chosen[-1] += "."
+            sentence = 0
+    return " ".join(chosen)
+
+
+def campaign_documents(rng: random.Random, posts: int, post_words: int) -> list:
+    session_id = "5f0c9a52-8a4e-4d55-9a57-1c2f3e4d5a6b"
+    documents = [("user_inputs", {
+        "area_of_interest": "sustainable fashion", "content_type": "blog post", "keywords": ["thrift", "capsule", "repair"],
+        "post_frequency": posts, "preferred_days": None, "timezone": "Europe/Berlin", "session_id": session_id
+    }), ("schedules", {"posting_days": ["Monday", "Wednesday", "Friday", "Sunday", "Tuesday", "Thursday", "Saturday"][:posts],
+                       "session_id": session_id})]
+    documents += [("generated_content", {
+        "topic": f"Topic {index}: building a capsule wardrobe", "content": post_text(rng, post_words), "day": "Monday",
+        "batch_id": "a1b2c3", "session_id": session_id, "request_id": f"request-{index}"
+    }) for index in range(posts)]
+    return documents
+
+
+def measure(documents: list, codec: str, repeat: int) -> dict:
+    # A peer that reads only this codec, in another process unless measuring blob references
+    address = f"peer-{codec}"
+    if codec == "ref":
+        peer_codecs.learn(address, PROCESS_ID, CODECS)
+    else:
+        peer_codecs.learn(address, "elsewhere", [codec])
+
+    encode_seconds = decode_seconds = 0.0
+    wire_bytes = 0
+    for _ in range(repeat):
+        for collection, data in documents:
+            started = time.perf_counter()
+            message = json.dumps({"collection": collection, **outgoing_payload(data, address)})
+            encode_seconds += time.perf_counter() - started
+            wire_bytes += len(message)
+            started = time.perf_counter()
+            received = json.loads(message)
+            incoming_payload(received["data"], received.get("packed"), received.get("blobs"))
+            decode_seconds += time.perf_counter() - started
+    return {
+        "bytes_per_campaign": wire_bytes // repeat,
+        "encode_us_per_campaign": encode_seconds / repeat * 1e6,
+        "decode_us_per_campaign": decode_seconds / repeat * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inter-agent payload codec benchmark")
+    parser.add_argument("--post-words", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    results = {}
+    for posts in (3, 5, 7):
+        documents = campaign_documents(rng, posts, args.post_words)
+        results[f"{posts}_posts"] = {codec: measure(documents, codec, args.repeat) for codec in CODECS[::-1] + ["ref"]}
+    print(json.dumps({"codecs": CODECS, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_coordinator_storage.py
+#
+# Compares the cost of recording one generated post as the amount of stored
+# content grows, for the old approach (rewrite the whole JSON state file, as the
+# default uAgents storage does) and the coordinator storage backends.
+#
+# Usage: python -m benchmarks.bench_coordinator_storage [--volumes 100 1000 5000] [--post-bytes 2000]
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from Backend.utils.coordinator_storage import SegmentLogStorage, SQLiteStorage
+
+
+class JsonRewriteStorage:
+    """What ctx.storage did: keep the state in memory and rewrite the whole file on every set."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state = {"generated_content": []}
+
+    def append(self, session_id: str, key: str, item):
+        self.state[key].append(item)
+        with open(self.path, "w", encoding="utf-8") as state_file:
+            json.dump(self.state, state_file, indent=4)
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as state_file:
+            return json.load(state_file)
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    "json-rewrite": lambda directory: JsonRewriteStorage(os.path.join(directory, "state.json")),
+    "segment-log": lambda directory: SegmentLogStorage(os.path.join(directory, "log")),
+    "sqlite-wal": lambda directory: SQLiteStorage(os.path.join(directory, "state.db"))
+}
+
+
+def run(volumes, post_bytes: int, sample: int):
+    post = {"topic": "Benchmark topic", "day": "Monday", "content": "x" * post_bytes, "session_id": "bench"}
+    results = []
+    for name, factory in BACKENDS.items():
+        directory = tempfile.mkdtemp(prefix=f"bench-{name}-")
+        try:
+            storage = factory(directory)
+            written = 0
+            for volume in sorted(volumes):
+                # Fill up to just below the target volume, then time the last `sample` writes
+                while written < volume - sample:
+                    storage.append("bench", "generated_content", post)
+                    written += 1
+                started = time.perf_counter()
+                while written < volume:
+                    storage.append("bench", "generated_content", post)
+                    written += 1
+                per_write = (time.perf_counter() - started) / sample
+
+                storage.close()
+                started = time.perf_counter()
+                storage = factory(directory)
+                storage.load()
+                recovery = time.perf_counter() - started
+                if isinstance(storage, JsonRewriteStorage):
+                    storage.state = storage.load()
+
+                results.append({
+                    "backend": name,
+                    "posts": volume,
+                    "write_us": per_write * 1e6,
+                    "recovery_ms": recovery * 1e3
+                })
+            storage.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator storage write-cost benchmark")
+    parser.add_argument("--volumes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--post-bytes", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'backend':<14}{'posts':>8}{'write (us)':>14}{'recovery (ms)':>16}")
+    for row in run(args.volumes, args.post_bytes, args.sample):
+        print(f"{row['backend']:<14}{row['posts']:>8}{row['write_us']:>14.1f}{row['recovery_ms']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# benchmarks/bench_e2e.py
+#
+# End-to-end load test. Starts the FastAPI app and all five agents in this
+# process (as Backend.launcher does), with a deterministic fake Gemini of
+# configurable latency and token rate and mongomock in place of MongoDB, then
+# runs campaigns the way the frontend does: POST /user-input, poll /state
+# until the first post is there, POST /feedback, poll until every day is
+# written.
+#
+# Reports throughput, p50/p95/p99 latency per endpoint, when each stage of a
+# campaign finished (from its trace), where handler, LLM and Mongo time went
+# (from the metrics registry) and memory growth. Results are written as JSON;
+# --compare prints the change against an earlier result file. With
+# --duplicate-submits every POST is sent that many times at once under one
+# Idempotency-Key, as a double click or a retry storm would; llm_calls should
+# not change. A run in which any campaign does not complete writes no result
+# file and exits non-zero, with the campaigns' errors.
+#
+# Needs httpx (for the in-process ASGI client) and mongomock besides the
+# backend's own requirements.
+#
+# Usage: python -m benchmarks.bench_e2e [--campaigns 50] [--concurrency 10] [--llm-latency 0.2]
+#            [--tokens-per-second 200] [--duplicate-submits 1] [--output results.json] [--compare baseline.json]
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import rss_mb, summarize
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+POSTING_LEVELS = [3, 5, 7]
+KEY_RESULTS = [
+    ("throughput", "campaigns_per_second"),
+    ("latency", "user_input", "p95_ms"),
+    ("latency", "state", "p95_ms"),
+    ("latency", "feedback", "p95_ms"),
+    ("campaign", "first_post", "p95_ms"),
+    ("campaign", "complete", "p95_ms"),
+    ("memory", "rss_growth_mb")
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end CreateMate load test with a fake LLM and fake Mongo")
+    parser.add_argument("--campaigns", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10, help="Campaigns driven at the same time")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds before the fake LLM starts answering")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="Fake LLM output rate")
+    parser.add_argument("--post-words", type=int, default=300)
+    parser.add_argument("--content-workers", type=int, default=1)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--campaign-timeout", type=float, default=120)
+    parser.add_argument("--duplicate-submits", type=int, default=1, help="Copies of each POST sent at once with the same Idempotency-Key")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM response cache on (off by default)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report Python heap growth (slower)")
+    parser.add_argument("--output", help="Result file; defaults to benchmarks/results/e2e-<commit>.json")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    return parser.parse_args()
+
+
+def configure(args):
+    """Environment for an offline, in-process run; set before Backend.config is first imported."""
+    os.environ.update({
+        "GATEWAY_MODE": "local",
+        "FUND_AGENTS": "false",
+        "LLM_BACKEND": "fake",
+        "MONGO_BACKEND": "mongomock",
+        "COORDINATOR_STORAGE": "memory",
+        "LLM_CACHE_ENABLED": "true" if args.llm_cache else "false",
+        "CONTENT_GENERATION_WORKERS": str(args.content_workers),
+        "LOG_SAMPLE_RATE": os.environ.get("LOG_SAMPLE_RATE", "0")
+    })
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def histogram_summary(family: Dict[str, Any], group_by: str) -> Dict[str, Dict[str, float]]:
+    """Count, mean and bucket-estimated p95 (ms) of a histogram snapshot, per value of one label."""
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for key, value in family["samples"]:
+        label = dict(key).get(group_by, "")
+        entry = grouped.setdefault(label, {"counts": [0] * len(value["counts"]), "sum": 0.0, "count": 0})
+        entry["counts"] = [a + b for a, b in zip(entry["counts"], value["counts"])]
+        entry["sum"] += value["sum"]
+        entry["count"] += value["count"]
+
+    bounds = list(family["buckets"]) + [float("inf")]
+    summary = {}
+    for label, entry in sorted(grouped.items()):
+        target, cumulative, p95 = 0.95 * entry["count"], 0, bounds[-1]
+        for bound, count in zip(bounds, entry["counts"]):
+            cumulative += count
+            if cumulative >= target:
+                p95 = bound
+                break
+        summary[label] = {
+            "count": entry["count"],
+            "mean_ms": entry["sum"] / entry["count"] * 1000 if entry["count"] else None,
+            "p95_ms_upper_bound": p95 * 1000 if p95 != float("inf") else None
+        }
+    return summary
+
+
+def stage_milestones(spans: List[Dict[str, Any]], started: float) -> Dict[str, float]:
+    """Seconds from submitting a campaign to the coordinator receiving each stage's result."""
+    milestones = {}
+    for span in sorted(spans, key=lambda span: span["start"]):
+        offset = span["start"] + span["duration"] - started
+        name = span["name"]
+        if name == "handle_schedule":
+            milestones.setdefault("schedule", offset)
+        elif name == "handle_topic_suggestion":
+            milestones["topics"] = offset
+        elif name in ("handle_generated_content", "handle_generated_content_batch"):
+            milestones.setdefault("first_content", offset)
+            milestones["content"] = offset
+        elif name.startswith("mongo."):
+            milestones["storage"] = offset
+    return milestones
+
+
+class Campaign:
+    def __init__(self, index: int):
+        self.index = index
+        self.trace_id = uuid.uuid4().hex
+        self.post_frequency = POSTING_LEVELS[index % len(POSTING_LEVELS)]
+        self.session_id: Optional[str] = None
+        self.started: Optional[float] = None  # Wall clock, to line up with the trace's spans
+        self.first_post: Optional[float] = None
+        self.complete: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+async def run_campaign(client, campaign: Campaign, latencies: Dict[str, List[float]], counters: Dict[str, int], args) -> Campaign:
+    headers = {"X-Trace-Id": campaign.trace_id}
+
+    async def timed(kind: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies[kind].append(time.perf_counter() - started)
+        counters[f"{kind}_{response.status_code}"] += 1
+        return response
+
+    async def submit(kind: str, url: str, body: dict):
+        # Copies of one submission share its key, so together they should cost what one does
+        responses = await asyncio.gather(*[
+            timed(kind, "POST", url, headers={**headers, "Idempotency-Key": f"{campaign.trace_id}-{kind}"}, json=body)
+            for _ in range(args.duplicate_submits)
+        ])
+        for response in responses:
+            response.raise_for_status()
+        if len({response.json()["session_id"] for response in responses}) > 1:
+            raise RuntimeError(f"Copies of one {kind} got different sessions")
+        return responses[0]
+
+    campaign.started = time.time()
+    started = time.perf_counter()
+    response = await submit("user_input", "/user-input", {
+        "area_of_interest": f"Area {campaign.index % 10}",
+        "content_type": "blog post",
+        "keywords": ["growth", "tips", f"keyword{campaign.index % 7}"],
+        "post_frequency": campaign.post_frequency
+    })
+    campaign.session_id = response.json()["session_id"]
+
+    etag = None
+    feedback_sent = False
+    deadline = started + args.campaign_timeout
+    while time.perf_counter() < deadline:
+        response = await timed(
+            "state", "GET", "/state",
+            params={"session_id": campaign.session_id, "fields": "generated_content,errors", "content": "none"},
+            headers={"If-None-Match": etag} if etag else {}
+        )
+        if response.status_code == 200:
+            etag = response.headers.get("etag")
+            state = response.json()
+            if state.get("errors"):
+                campaign.error = state["errors"][0].get("error")
+                break
+            total = state.get("content_total", 0)
+            if total and campaign.first_post is None:
+                campaign.first_post = time.perf_counter() - started
+            if total and not feedback_sent:
+                await submit("feedback", "/feedback", {"liked": True, "comments": None, "session_id": campaign.session_id})
+                feedback_sent = True
+            if total >= campaign.post_frequency:
+                campaign.complete = time.perf_counter() - started
+                break
+        elif response.status_code != 304:
+            campaign.error = f"/state returned {response.status_code}"
+            break
+        await asyncio.sleep(args.poll_interval)
+    else:
+        campaign.error = "timed out"
+    return campaign
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    from Backend.api import register_local_agent
+    from Backend.launcher import build_bureau, load_agents
+    from Backend.main import app
+    from Backend.utils import get_metrics, set_backend, traces
+    from benchmarks.fake_llm import create_fake_gemini
+
+    fake_gemini = create_fake_gemini(args.llm_latency, args.tokens_per_second, args.post_words)
+    set_backend(fake_gemini)
+
+    cold_start: Dict[str, Any] = {}
+    agents = load_agents(cold_start)
+    bureau = build_bureau(agents, cold_start, time.perf_counter())
+    app.state.agents_in_process = True
+    for agent in agents.values():
+        register_local_agent(agent)
+
+    bureau_task = asyncio.create_task(bureau.run_async())
+    while len([timings for timings in cold_start.values() if "ready_ms" in timings]) < len(agents):
+        await asyncio.sleep(0.05)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    counters: Dict[str, int] = defaultdict(int)
+    campaigns = [Campaign(index) for index in range(args.campaigns)]
+    slots = asyncio.Semaphore(args.concurrency)
+
+    gc.collect()
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = rss_mb()
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://createmate.bench", timeout=60) as client:
+                async def drive(campaign: Campaign):
+                    async with slots:
+                        try:
+                            await run_campaign(client, campaign, latencies, counters, args)
+                        except Exception as e:
+                            campaign.error = f"{type(e).__name__}: {e}"
+
+                started = time.perf_counter()
+                await asyncio.gather(*(drive(campaign) for campaign in campaigns))
+                elapsed = time.perf_counter() - started
+    finally:
+        bureau_task.cancel()
+
+    gc.collect()
+    memory = {"rss_before_mb": rss_before, "rss_after_mb": rss_mb()}
+    memory["rss_growth_mb"] = memory["rss_after_mb"] - rss_before
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory.update({"heap_growth_mb": current / 2 ** 20, "heap_peak_mb": peak / 2 ** 20})
+
+    completed = [campaign for campaign in campaigns if campaign.complete is not None]
+    milestones: Dict[str, List[float]] = defaultdict(list)
+    for campaign in campaigns:
+        if campaign.started is None:
+            continue
+        for stage, offset in stage_milestones(traces.get(campaign.trace_id), campaign.started).items():
+            milestones[stage].append(offset)
+    snapshot = get_metrics().snapshot()
+    requests = sum(len(samples) for samples in latencies.values())
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "elapsed_s": elapsed,
+        "throughput": {
+            "campaigns_per_second": len(completed) / elapsed,
+            "requests_per_second": requests / elapsed
+        },
+        "campaigns": {
+            "total": len(campaigns),
+            "completed": len(completed),
+            "errors": sorted({campaign.error for campaign in campaigns if campaign.error})
+        },
+        "latency": {kind: summarize(samples) for kind, samples in latencies.items()},
+        "responses": dict(counters),
+        "campaign": {
+            "first_post": summarize([campaign.first_post for campaign in campaigns if campaign.first_post is not None]),
+            "complete": summarize([campaign.complete for campaign in completed])
+        },
+        "stages": {stage: summarize(offsets) for stage, offsets in milestones.items()},
+        "breakdown": {
+            "handlers": histogram_summary(snapshot["agent_handler_seconds"], "handler"),
+            "llm": histogram_summary(snapshot["llm_call_seconds"], "agent"),
+            "mongo": histogram_summary(snapshot["mongo_operation_seconds"], "operation")
+        },
+        "llm_calls": fake_gemini.calls,
+        "memory": memory
+    }
+
+
+def lookup(result: Dict[str, Any], path) -> Optional[float]:
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result if isinstance(result, (int, float)) else None
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for path in KEY_RESULTS:
+        before, after = lookup(baseline, path), lookup(result, path)
+        change = (after - before) / before * 100 if before and after is not None else None
+        rows.append({"metric": ".".join(path), "baseline": before, "current": after, "change_pct": change})
+    return rows
+
+
+def main():
+    args = parse_args()
+    configure(args)
+    result = asyncio.run(run(args))
+    campaigns = result["campaigns"]
+    if campaigns["completed"] < campaigns["total"]:
+        # A broken pipeline must not leave a result file to compare against
+        print(json.dumps({key: result[key] for key in ("campaigns", "responses", "stages")}, indent=2), file=sys.stderr)
+        sys.exit(f"Only {campaigns['completed']} of {campaigns['total']} campaigns completed; no results written")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{result['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps({key: result[key] for key in ("throughput", "campaigns", "latency", "stages", "memory")}, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline.get('commit')}:")
+        print(json.dumps(compare(result, baseline), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_llm_resilience.py
+#
+# Drives LLMClient against a FaultInjectingBackend to check how retries,
+# deadlines and the circuit breaker behave as the injected fault rate grows:
+# how many calls still succeed, how they fail and what retries cost in latency.
+#
+# Usage: python -m benchmarks.bench_llm_resilience [--fault-rates 0 0.1 0.3 0.6] [--calls 500]
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from Backend.utils.llm_client import FakeBackend, FaultInjectingBackend, LLMClient
+from Backend.utils.resilience import CircuitBreaker, RetryPolicy
+from benchmarks.common import summarize
+
+
+async def run(fault_rate: float, calls: int, concurrency: int, latency: float, attempt_timeout: float, deadline: float):
+    backend = FaultInjectingBackend(
+        FakeBackend(latency=latency),
+        failure_rate=fault_rate / 2,
+        hang_rate=fault_rate / 2,
+        hang_seconds=attempt_timeout * 10,
+        seed=1
+    )
+    policy = RetryPolicy(max_retries=3, base_delay=latency, max_delay=latency * 8, attempt_timeout=attempt_timeout)
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=latency * 20)
+    client = LLMClient(backend, max_concurrency=concurrency, retry_policy=policy, deadline=deadline, circuit_breaker=breaker)
+
+    latencies = []
+    outcomes = Counter()
+
+    async def one_call():
+        started = time.perf_counter()
+        try:
+            await client.generate("prompt")
+            outcomes["ok"] += 1
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            outcomes[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    result = {"fault_rate": fault_rate, "success_rate": outcomes["ok"] / calls, "outcomes": dict(outcomes)}
+    result.update({f"ok_{key}": value for key, value in summarize(latencies).items()})
+    result.update({
+        "backend_calls": backend.calls,
+        "injected_faults": backend.faults,
+        "breaker_state": breaker.state,
+        "elapsed_s": elapsed
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM retry and circuit breaker benchmark")
+    parser.add_argument("--fault-rates", type=float, nargs="+", default=[0.0, 0.1, 0.3, 0.6])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated seconds per LLM call")
+    parser.add_argument("--attempt-timeout", type=float, default=0.1)
+    parser.add_argument("--deadline", type=float, default=1.0)
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(run(rate, args.calls, args.concurrency, args.latency, args.attempt_timeout, args.deadline))
+        for rate in args.fault_rates
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_llm_scheduler.py
+#
+# Simulates campaigns competing for a rate-limited model through the LLM
+# admission scheduler, on a fake clock so minutes of traffic take a moment
+# to replay. Each campaign asks for its schedule and topics, then its first
+# post once the schedule is in and the rest of its posts once the topics
+# are; one "bulk" campaign asks for many posts at the start.
+#
+# Runs the same traffic twice: first-come first-served (every call in one
+# flow at one priority) and fair (per-session flows, first posts and
+# schedules interactive). Reports how long users wait for their first post
+# and for the whole campaign, and how long calls queued by priority.
+#
+# Usage: python -m benchmarks.bench_llm_scheduler [--campaigns 40] [--rpm 60] [--tpm 60000]
+
+import argparse
+import heapq
+import itertools
+import json
+
+from Backend.utils.llm_scheduler import BACKGROUND, INTERACTIVE, LLMScheduler
+from benchmarks.common import summarize
+
+PROMPT_TOKENS = 300
+POST_TOKENS = 700
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(args, fair: bool) -> dict:
+    clock = FakeClock()
+    scheduler = LLMScheduler(args.rpm, args.tpm, args.burst_seconds, clock=clock)
+    events = []  # (time, sequence, callback)
+    sequence = itertools.count()
+    waiting = []  # (ticket, on_granted)
+    waits = {INTERACTIVE: [], BACKGROUND: []}
+    first_post, complete = [], []
+
+    def at(when: float, callback):
+        heapq.heappush(events, (when, next(sequence), callback))
+
+    def call(session: str, tokens: int, priority: str, on_done):
+        ticket = scheduler.submit(session if fair else "all", tokens, priority if fair else BACKGROUND)
+        waiting.append((ticket, priority, on_done))
+
+    def start_campaign(index: int, posts: int, arrived: float):
+        session = f"campaign-{index}"
+        state = {"left": posts}
+
+        def post_done():
+            state["left"] -= 1
+            if state["left"] == posts - 1:
+                first_post.append(clock.now - arrived)
+            if state["left"] == 0:
+                complete.append(clock.now - arrived)
+
+        def schedule_done():
+            call(session, PROMPT_TOKENS + POST_TOKENS, INTERACTIVE, post_done)
+
+        def topics_done():
+            for _ in range(posts - 1):
+                call(session, PROMPT_TOKENS + POST_TOKENS, BACKGROUND, post_done)
+
+        call(session, PROMPT_TOKENS + 50, INTERACTIVE, schedule_done)
+        call(session, PROMPT_TOKENS + 100 * posts, BACKGROUND, topics_done)
+
+    # The bulk campaign asks for all of its posts at once, as a large batch of single posts would
+    for _ in range(args.bulk_posts):
+        call("bulk", PROMPT_TOKENS + POST_TOKENS, BACKGROUND, lambda: None)
+    for index in range(args.campaigns):
+        arrived = index * args.arrival_interval
+        at(arrived, lambda index=index, arrived=arrived: start_campaign(index, 3 + index % 5, arrived))
+
+    while True:
+        wait = scheduler.dispatch()
+        for entry in [entry for entry in waiting if entry[0].granted]:
+            waiting.remove(entry)
+            ticket, priority, on_done = entry
+            waits[priority].append(ticket.granted_at - ticket.submitted_at)
+            at(ticket.granted_at + args.service_seconds, on_done)
+        next_times = [events[0][0]] if events else []
+        if wait is not None:
+            next_times.append(clock.now + wait)
+        if not next_times:
+            break
+        clock.now = max(clock.now, min(next_times))
+        while events and events[0][0] <= clock.now:
+            heapq.heappop(events)[2]()
+
+    return {
+        "first_post": summarize(first_post),
+        "campaign_complete": summarize(complete),
+        "queue_wait": {priority: summarize(samples) for priority, samples in waits.items()},
+        "simulated_seconds": clock.now
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM admission scheduler simulation")
+    parser.add_argument("--campaigns", type=int, default=40)
+    parser.add_argument("--arrival-interval", type=float, default=3.0, help="Seconds between campaign arrivals")
+    parser.add_argument("--bulk-posts", type=int, default=30, help="Posts the bulk campaign asks for at the start")
+    parser.add_argument("--rpm", type=float, default=60)
+    parser.add_argument("--tpm", type=float, default=60000)
+    parser.add_argument("--burst-seconds", type=float, default=10)
+    parser.add_argument("--service-seconds", type=float, default=2.0, help="How long an admitted call takes")
+    args = parser.parse_args()
+
+    # Times are simulated seconds, reported in milliseconds by summarize()
+    print(json.dumps({"fifo": simulate(args, fair=False), "fair": simulate(args, fair=True)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
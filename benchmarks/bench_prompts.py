@@ -0,0 +1,65 @@
+# benchmarks/bench_prompts.py
+#
+# Reports, for every registered prompt, the estimated prompt size (and the
+# share taken by the shared preamble) and the cost of rendering it, for
+# typical inputs and for oversized user input that the budgets have to trim.
+# Run it before and after a prompt change to see what the change costs.
+#
+# Usage: python -m benchmarks.bench_prompts [--renders 10000]
+
+import argparse
+import json
+import time
+
+from Backend.utils.prompts import estimate_tokens, prompts
+
+TYPICAL = {
+    "area_of_interest": "sustainable fashion",
+    "content_type": "blog",
+    "keywords": ["recycling", "thrift", "capsule wardrobe", "ethical brands"],
+    "topic": "How to build a capsule wardrobe from thrifted pieces",
+    "day": "Tuesday",
+    "post_frequency": 3,
+    "num_topics": 3,
+    "missing": 2,
+    "existing": json.dumps(["Thrift flipping basics"]),
+    "count": 3,
+    "posts": "1. Day: Tuesday - Topic: Thrift flipping\n2. Day: Thursday - Topic: Ethical brands\n3. Day: Saturday - Topic: Repairs"
+}
+
+OVERSIZED = {
+    **TYPICAL,
+    "area_of_interest": "sustainable fashion " * 200,
+    "keywords": [f"keyword number {index}" for index in range(200)],
+    "topic": "capsule wardrobe " * 300
+}
+
+
+def measure(template, values: dict, renders: int) -> dict:
+    text = template.render(**values)
+    started = time.perf_counter()
+    for _ in range(renders):
+        template.render(**values)
+    elapsed = time.perf_counter() - started
+    return {"tokens": estimate_tokens(text), "render_us": elapsed / renders * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and render cost benchmark")
+    parser.add_argument("--renders", type=int, default=10000)
+    args = parser.parse_args()
+
+    results = {}
+    for name in prompts.names():
+        template = prompts.get(name)
+        results[name] = {
+            "version": template.version,
+            "preamble_tokens": template.preamble_tokens,
+            "typical": measure(template, TYPICAL, args.renders),
+            "oversized": measure(template, OVERSIZED, args.renders)
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/bench_resume.py
+#
+# How long a restarted coordinator takes to pick its campaigns back up, and
+# how much LLM work that costs. Campaigns are driven through the session store
+# and workflow checkpoints the way the coordinator's handlers drive them, each
+# stopped at a random point of its lifecycle (some finished); then the store
+# is reopened as at startup.
+#
+# Reports, per storage backend and number of campaigns, the restart-to-resume
+# time split into restoring the sessions and working out what to send again,
+# and the requests sent again compared with starting every unfinished
+# campaign over, which is what losing the coordinator state used to cost.
+#
+# Usage: python -m benchmarks.bench_resume [--campaigns 100 1000 5000] [--post-bytes 2000]
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+
+from Backend.utils.coordinator_storage import SegmentLogStorage, SQLiteStorage
+from Backend.utils.session_store import SessionStore
+from Backend.utils.workflow import COMPLETE, DONE, ISSUED, SCHEDULE_STEP, TOPICS_STEP, CampaignWorkflow, post_step, step_day
+from Backend.utils.work_queue import InProcessWorkQueue
+
+BACKENDS = {
+    "segment-log": lambda directory: SegmentLogStorage(os.path.join(directory, "log")),
+    "sqlite-wal": lambda directory: SQLiteStorage(os.path.join(directory, "state.db"))
+}
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def campaign_events(sessions: SessionStore, workflow: CampaignWorkflow, posts: int, post_bytes: int) -> list:
+    """The coordinator's state changes for one campaign, in order, as callables."""
+    session_id = str(uuid.uuid4())
+    days = DAYS[:posts]
+    state = {}
+
+    def start():
+        state["session"] = session = sessions.create(session_id)
+        sessions.set_field(session, "user_input", {
+            "area_of_interest": "fitness", "content_type": "blog post", "keywords": ["running"],
+            "post_frequency": posts, "session_id": session_id
+        })
+        workflow.advance(session, [SCHEDULE_STEP], ISSUED)
+        sessions.set_field(session, "topics_requested_at", time.time())
+        workflow.advance(session, [TOPICS_STEP], ISSUED)
+
+    def schedule():
+        session = state["session"]
+        sessions.set_field(session, "schedule", {"posting_days": days, "session_id": session_id})
+        sessions.set_field(session, "current_batch_id", str(uuid.uuid4()))
+        sessions.set_field(session, "remaining_days", days[1:])
+        workflow.advance(session, [SCHEDULE_STEP], DONE)
+        workflow.advance(session, [post_step(days[0])], ISSUED, request_id=str(uuid.uuid4()), priority="interactive")
+
+    def topics():
+        session = state["session"]
+        workflow.advance(session, [TOPICS_STEP], DONE)
+        sessions.set_field(session, "suggested_topics", [f"Topic {index}" for index in range(posts - 1)])
+        for day in days[1:]:
+            workflow.advance(session, [post_step(day)], ISSUED, request_id=str(uuid.uuid4()), priority="background")
+        sessions.set_field(session, "dispatched_days", days[1:])
+
+    def post(day):
+        session = state["session"]
+        sessions.append_item(session, "generated_content", {
+            "topic": "Topic", "content": "x" * post_bytes, "day": day, "session_id": session_id
+        })
+        workflow.advance(session, [post_step(day)], DONE)
+
+    return [start, schedule, topics] + [lambda day=day: post(day) for day in days]
+
+
+def plan_resume(sessions: SessionStore, workflow: CampaignWorkflow, queue: InProcessWorkQueue) -> dict:
+    """What resume_campaigns() would send again, without sending it."""
+    requests = {"schedule": 0, "topics": 0, "post": 0}
+    unfinished = 0
+    for session in sessions:
+        if workflow.state(session) == COMPLETE:
+            continue
+        unfinished += 1
+        lost = set()
+        for step, entry in workflow.outstanding(session).items():
+            if step_day(step) is None:
+                requests[step] += 1
+            elif not queue.contains(entry["request_id"]):
+                lost.add(entry["request_id"])
+        requests["post"] += len(lost)
+    return {"unfinished": unfinished, "requests": requests}
+
+
+def run(campaign_counts, post_bytes: int, seed: int):
+    rng = random.Random(seed)
+    results = []
+    for name, factory in BACKENDS.items():
+        for count in campaign_counts:
+            directory = tempfile.mkdtemp(prefix=f"bench-resume-{name}-")
+            try:
+                sessions = SessionStore(max_sessions=count, storage=factory(directory))
+                workflow = CampaignWorkflow(sessions)
+                rerun_calls = 0
+                for _ in range(count):
+                    posts = rng.randint(3, 7)
+                    events = campaign_events(sessions, workflow, posts, post_bytes)
+                    # Stopped anywhere from just after the input to after the last post
+                    stopped_after = rng.randint(1, len(events))
+                    for event in events[:stopped_after]:
+                        event()
+                    if stopped_after < len(events):
+                        rerun_calls += 2 + posts  # Schedule, topics and every post, as a fresh start would
+                sessions.storage.close()
+
+                started = time.perf_counter()
+                restored = SessionStore(max_sessions=count, storage=factory(directory))
+                restored.restore()
+                restore_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                plan = plan_resume(restored, CampaignWorkflow(restored), InProcessWorkQueue())
+                plan_seconds = time.perf_counter() - started
+                restored.storage.close()
+
+                results.append({
+                    "backend": name,
+                    "campaigns": count,
+                    "unfinished": plan["unfinished"],
+                    "restore_ms": restore_seconds * 1e3,
+                    "plan_ms": plan_seconds * 1e3,
+                    "restart_to_resume_ms": (restore_seconds + plan_seconds) * 1e3,
+                    "requests_resent": plan["requests"],
+                    "llm_calls_resent": sum(plan["requests"].values()),
+                    "llm_calls_full_rerun": rerun_calls
+                })
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator restart-to-resume benchmark")
+    parser.add_argument("--campaigns", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--post-bytes", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.campaigns, args.post_bytes, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_similarity.py
+#
+# Fills the near-duplicate index with synthetic post topics, then reports
+# insert and lookup latency, how much memory the index holds, and whether
+# reworded topics are still found (recall) while unrelated ones are not.
+# Use --items 1000000 for the size the index is meant to handle.
+#
+# Usage: python -m benchmarks.bench_similarity [--items 100000] [--lookups 2000]
+
+import argparse
+import json
+import random
+import time
+
+from Backend.utils.similarity import SimilarityIndex
+from benchmarks.common import rss_mb, summarize
+
+AREAS = ["marketing", "fitness", "travel", "personal finance", "cooking", "productivity", "fashion", "gaming"]
+WORDS = [
+    "guide", "tips", "mistakes", "trends", "tools", "beginners", "budget", "habits", "strategy", "secrets",
+    "morning", "weekly", "checklist", "myths", "ideas", "lessons", "routine", "hacks", "data", "stories",
+    "growth", "brand", "local", "remote", "healthy", "quick", "simple", "smart", "modern", "classic"
+]
+
+
+def make_topic(rng: random.Random, serial: int) -> str:
+    return f"{rng.randint(3, 15)} {' '.join(rng.sample(WORDS, 4))} for {rng.choice(AREAS)} {serial}"
+
+
+def reword(topic: str) -> str:
+    # What a model typically changes between two suggestions of the same idea
+    return topic.replace(" for ", " for your ").title() + " in 2025"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate index benchmark")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rss_before = rss_mb()
+    index = SimilarityIndex(max_items=args.items)
+    topics = []
+    started = time.perf_counter()
+    for serial in range(args.items):
+        topic = make_topic(rng, serial)
+        namespace = (topic.rsplit(" for ", 1)[1].rsplit(" ", 1)[0], "blog", "Monday")
+        index.add(namespace, topic, ref=serial)
+        topics.append((namespace, topic))
+    insert_seconds = time.perf_counter() - started
+    # Includes the benchmark's own copy of the topics, which the index shares
+    memory = (rss_mb() - rss_before) * 2 ** 20
+
+    hits, misses, found = [], [], 0
+    for serial in rng.sample(range(args.items), min(args.lookups, args.items)):
+        namespace, topic = topics[serial]
+        started = time.perf_counter()
+        match = index.find(namespace, reword(topic))
+        hits.append(time.perf_counter() - started)
+        found += match is not None and match.ref == serial
+    false_matches = 0
+    for serial in range(args.lookups):
+        namespace = (rng.choice(AREAS), "blog", "Monday")
+        started = time.perf_counter()
+        false_matches += index.find(namespace, f"an unrelated question number {serial}") is not None
+        misses.append(time.perf_counter() - started)
+
+    print(json.dumps({
+        "items": args.items,
+        "insert_us": insert_seconds / args.items * 1e6,
+        "rss_growth_mb": memory / 2 ** 20,
+        "rss_bytes_per_item": memory / args.items,
+        "lookup_reworded": summarize(hits),
+        "lookup_unrelated": summarize(misses),
+        "recall": found / len(hits),
+        "false_matches": false_matches,
+        "stats": index.stats()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/fake_llm.py
+#
+# A deterministic stand-in for Gemini that answers each CreateMate prompt in
+# the shape the agents ask for: a JSON list of days for the schedule, a JSON
+# list of topics, a post, or a JSON list of posts for a batch. The same prompt
+# always gets the same answer, so runs are comparable across commits.
+
+import hashlib
+import json
+import re
+
+from Backend.utils.llm_client import FakeBackend
+from Backend.utils.scheduler import WEEKDAYS
+
+POST_FREQUENCY = re.compile(r"Post frequency: (\d+) times per week")
+TOPIC_COUNT = re.compile(r"(?:Provide exactly|Generate) (\d+) (?:more )?(?:engaging )?topic")
+BATCH_POST = re.compile(r"^\s*\d+\. Day: (\w+) - Topic: (.+)$", re.M)
+SINGLE_POST = re.compile(r"post about (.+) in the area of .*\n.*\n.*suitable for posting on (\w+)\.")
+
+
+def _seed(prompt: str) -> int:
+    return int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _post(topic: str, day: str, words: int) -> str:
+    body = " ".join(f"word{index % 50}" for index in range(words))
+    return f"{topic}\n\nA post for {day}. {body}\n\nThanks for reading!"
+
+
+def scripted_responder(post_words: int = 300):
+    """
+    Build a responder for FakeBackend.
+
+    Args:
+    post_words (int): Length of each generated post, which with a token rate sets how long a post takes.
+    """
+    def respond(prompt: str) -> str:
+        seed = _seed(prompt)
+        match = POST_FREQUENCY.search(prompt)
+        if match:
+            count = int(match.group(1))
+            start = seed % len(WEEKDAYS)
+            return json.dumps([WEEKDAYS[(start + index * 2) % len(WEEKDAYS)] for index in range(count)])
+        posts = BATCH_POST.findall(prompt)
+        if posts:
+            return json.dumps([{"day": day, "topic": topic, "content": _post(topic, day, post_words)} for day, topic in posts])
+        match = SINGLE_POST.search(prompt)
+        if match:
+            return _post(match.group(1), match.group(2), post_words)
+        match = TOPIC_COUNT.search(prompt)
+        if match:
+            return json.dumps([f"Topic {seed % 997}-{index}: a trending angle" for index in range(int(match.group(1)))])
+        return f"Fake response for a prompt of {len(prompt)} characters."
+
+    return respond
+
+
+def create_fake_gemini(latency: float, tokens_per_second: float, post_words: int = 300) -> FakeBackend:
+    return FakeBackend(scripted_responder(post_words), latency=latency, model_name="fake-gemini", tokens_per_second=tokens_per_second)
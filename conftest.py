@@ -0,0 +1,18 @@
+# conftest.py
+#
+# Lets `pytest` run from the repository root import the Backend and benchmarks packages,
+# and points Backend.config at offline stand-ins before anything imports it: agents
+# started by the tests use a fake LLM, mongomock and in-memory coordinator state.
+
+import os
+
+for name, value in {
+    "GATEWAY_MODE": "local",
+    "FUND_AGENTS": "false",
+    "LLM_BACKEND": "fake",
+    "MONGO_BACKEND": "mongomock",
+    "COORDINATOR_STORAGE": "memory",
+    "LLM_CACHE_ENABLED": "false",
+    "LOG_SAMPLE_RATE": "0"
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,74 @@
+# tests/test_agents.py
+#
+# Drives a campaign through every agent running in one Bureau, as Backend.launcher
+# runs them, with the scripted fake Gemini from the benchmarks.
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from Backend.config import Config
+from Backend.launcher import build_bureau, load_agents
+from Backend.models import Feedback, UserInput
+from Backend.api.gateway import LocalGateway
+from Backend.utils import peer_codecs, set_backend
+from benchmarks.fake_llm import create_fake_gemini
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_for(condition, timeout: float = 20.0, interval: float = 0.05):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("Timed out waiting for the agents")
+        await asyncio.sleep(interval)
+
+
+def test_campaign_runs_through_the_bureau():
+    from Backend.Agents.main_coordinator_agent import sessions
+    from Backend.Agents.storage_agent import store
+
+    async def scenario():
+        Config.BUREAU_PORT = free_port()
+        set_backend(create_fake_gemini(latency=0.0, tokens_per_second=0, post_words=20))
+        cold_start = {}
+        agents = load_agents(cold_start)
+        bureau = build_bureau(agents, cold_start, time.perf_counter())
+        gateway = LocalGateway(list(agents.values()))
+        running = asyncio.create_task(bureau.run_async())
+        try:
+            await wait_for(lambda: all("ready_ms" in timings for timings in cold_start.values()))
+
+            reply = await gateway.query(Config.MAIN_COORDINATOR_ADDRESS, UserInput(
+                area_of_interest="sustainable fashion", content_type="blog post", keywords=["thrift", "repair"],
+                post_frequency=3
+            ), timeout=10)
+            assert reply["success"]
+            session_id = reply["data"]["session_id"]
+
+            # UserInput -> Schedule -> the first post, then the topics and the rest of the week
+            session = sessions.get(session_id)
+            await wait_for(lambda: session["schedule"] is not None)
+            assert len(session["schedule"]["posting_days"]) == 3
+            await wait_for(lambda: len(session["generated_content"]) >= 1)
+            reply = await gateway.query(Config.MAIN_COORDINATOR_ADDRESS, Feedback(liked=True, session_id=session_id), timeout=10)
+            assert reply["success"]
+            await wait_for(lambda: len(session["generated_content"]) == 3)
+            assert {post["day"] for post in session["generated_content"]} == set(session["schedule"]["posting_days"])
+            assert not session["errors"]
+
+            # The storage agent answered the coordinator's CodecHello and got every post
+            await wait_for(lambda: store.db["generated_content"].count_documents({"session_id": session_id}) == 3)
+            assert peer_codecs.same_process(Config.STORAGE_AGENT_ADDRESS)
+        finally:
+            running.cancel()
+            await asyncio.gather(running, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+# tests/test_codec.py
+
+import json
+
+import pytest
+
+from Backend.config import Config
+from Backend.utils import codec
+from Backend.utils.codec import BlobStore, PeerCodecs, incoming_payload, outgoing_payload
+from Backend.utils.metrics import PROCESS_ID
+
+
+@pytest.fixture
+def peer_codecs(monkeypatch):
+    """Fresh peer and blob registries, so these tests neither see nor leave behind the agents' own."""
+    peers = PeerCodecs()
+    monkeypatch.setattr(codec, "peer_codecs", peers)
+    monkeypatch.setattr(codec, "blob_store", BlobStore())
+    return peers
+
+
+def deliver(data: dict, address: str) -> dict:
+    """A StoreData message's payload fields as the receiving agent sees them."""
+    return json.loads(json.dumps(outgoing_payload(data, address)))
+
+
+def test_document_with_blob_like_values_round_trips(peer_codecs):
+    peer_codecs.learn("peer-same-process", PROCESS_ID, ["json"])
+    document = {
+        "content": "x" * Config.BLOB_THRESHOLD,
+        "metadata": {"$blob": "not a blob id"},
+        "topic": "$blob"
+    }
+
+    message = deliver(document, "peer-same-process")
+    assert message["blobs"] == ["content"]
+    assert incoming_payload(message["data"], message.get("packed"), message["blobs"]) == document
+
+
+def test_second_delivery_takes_the_blob_again(peer_codecs):
+    peer_codecs.learn("peer-same-process", PROCESS_ID, ["json"])
+    document = {"content": "y" * Config.BLOB_THRESHOLD, "day": "Monday"}
+
+    message = deliver(document, "peer-same-process")
+    first = incoming_payload(message["data"], None, message["blobs"])
+    redelivered = incoming_payload(message["data"], None, message["blobs"])
+    assert first == redelivered == document
+
+
+def test_small_documents_carry_no_blobs(peer_codecs):
+    peer_codecs.learn("peer-same-process", PROCESS_ID, ["json"])
+    message = deliver({"day": "Monday"}, "peer-same-process")
+    assert "blobs" not in message
+    assert incoming_payload(message["data"], None, message.get("blobs")) == {"day": "Monday"}
+
+
+def test_collected_blobs_are_evicted_before_uncollected_ones():
+    store = BlobStore(max_bytes=30)
+    collected = store.put("a" * 10)
+    store.take(collected)
+    pending = store.put("b" * 10)
+    store.put("c" * 15)  # 35 characters held: the collected blob goes first
+
+    assert store.take(pending) == "b" * 10
+    with pytest.raises(KeyError):
+        store.take(collected)
+    assert store.evicted == 0
+
+
+def test_blob_put_twice_is_kept_until_taken_twice():
+    store = BlobStore(max_bytes=15)
+    blob_id = store.put("a" * 10)
+    assert store.put("a" * 10) == blob_id
+    store.take(blob_id)
+    assert len(store) == 1
+    store.take(blob_id)
+    assert len(store) == 0
+
+    # Collected, so room for a new blob evicts it rather than counting as an eviction
+    store.put("b" * 10)
+    assert store.evicted == 0
+    with pytest.raises(KeyError):
+        store.take(blob_id)
+
+
+def test_unknown_peer_gets_plain_json(peer_codecs):
+    document = {"content": "z" * Config.BLOB_THRESHOLD}
+    assert deliver(document, "peer-never-heard-from") == {"data": document}
@@ -0,0 +1,62 @@
+# tests/test_coordinator_storage.py
+
+import os
+
+import pytest
+
+from Backend.utils.coordinator_storage import SegmentLogStorage
+
+
+def test_replays_segments_after_restart(tmp_path):
+    storage = SegmentLogStorage(str(tmp_path))
+    storage.set("s1", "user_input", {"area_of_interest": "fitness"})
+    storage.append("s1", "generated_content", {"day": "Mon"})
+    storage.close()
+
+    assert SegmentLogStorage(str(tmp_path)).load() == {
+        "s1": {"user_input": {"area_of_interest": "fitness"}, "generated_content": [{"day": "Mon"}]}
+    }
+
+
+def test_crash_between_snapshot_and_segment_removal_does_not_replay_twice(tmp_path, monkeypatch):
+    storage = SegmentLogStorage(str(tmp_path))
+    storage.append("s1", "generated_content", {"day": "Mon"})
+
+    def crash(path):
+        raise SystemExit("killed after the snapshot was written")
+
+    monkeypatch.setattr(os, "remove", crash)
+    with pytest.raises(SystemExit):
+        storage.compact(storage.load())
+    monkeypatch.undo()
+
+    restarted = SegmentLogStorage(str(tmp_path))
+    assert restarted.load() == {"s1": {"generated_content": [{"day": "Mon"}]}}
+
+    # Writes after the restart go to new segments, which are replayed
+    restarted.append("s1", "generated_content", {"day": "Tue"})
+    restarted.close()
+    assert SegmentLogStorage(str(tmp_path)).load() == {"s1": {"generated_content": [{"day": "Mon"}, {"day": "Tue"}]}}
+
+
+def test_segments_written_after_compaction_and_restart_are_replayed(tmp_path):
+    storage = SegmentLogStorage(str(tmp_path))
+    storage.append("s1", "generated_content", {"day": "Mon"})
+    storage.compact(storage.load())
+    storage.close()
+
+    restarted = SegmentLogStorage(str(tmp_path))
+    restarted.append("s1", "generated_content", {"day": "Tue"})
+    restarted.close()
+    assert SegmentLogStorage(str(tmp_path)).load() == {"s1": {"generated_content": [{"day": "Mon"}, {"day": "Tue"}]}}
+
+
+def test_reads_snapshot_without_header(tmp_path):
+    (tmp_path / SegmentLogStorage.SNAPSHOT).write_text('{"s1": {"schedule": {"posting_days": ["Monday"]}}}')
+    storage = SegmentLogStorage(str(tmp_path))
+    storage.set("s1", "current_batch_id", "b1")
+    storage.close()
+
+    assert SegmentLogStorage(str(tmp_path)).load() == {
+        "s1": {"schedule": {"posting_days": ["Monday"]}, "current_batch_id": "b1"}
+    }
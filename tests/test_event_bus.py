@@ -0,0 +1,37 @@
+# tests/test_event_bus.py
+
+from Backend.utils.event_bus import EventBus
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_new_subscriber_gets_whole_history():
+    bus = EventBus()
+    bus.publish("s1", "schedule", {"posting_days": ["Monday"]})
+    bus.publish("s1", "content", {"day": "Monday"})
+    bus.publish("s2", "content", {"day": "Friday"})
+
+    assert [record["event"] for record in drain(bus.subscribe("s1"))] == ["schedule", "content"]
+
+
+def test_reconnect_replays_only_after_last_event_id():
+    bus = EventBus()
+    bus.publish("s1", "schedule", {"posting_days": ["Monday", "Friday"]})
+    bus.publish("s1", "content", {"day": "Monday"})
+    seen = drain(bus.subscribe("s1"))
+    bus.publish("s1", "content", {"day": "Friday"})
+
+    replayed = drain(bus.subscribe("s1", after=seen[-1]["id"]))
+    assert [record["data"] for record in replayed] == [{"day": "Friday"}]
+
+
+def test_last_event_id_from_before_a_restart_replays_everything():
+    bus = EventBus()
+    bus.publish("s1", "content", {"day": "Monday"})
+
+    assert len(drain(bus.subscribe("s1", after=500))) == 1
@@ -0,0 +1,145 @@
+# tests/test_idempotency.py
+
+import asyncio
+import json
+
+import pytest
+from starlette.requests import Request
+
+from Backend.api.routes import run_idempotent
+from Backend.utils import idempotency
+from Backend.utils.idempotency import IdempotencyCache, IdempotencyConflict, request_fingerprint
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(idempotency, "time", clock)
+    return clock
+
+
+def counting_call(result="session-1", delay: float = 0.0):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return f"{result}-{len(calls)}"
+
+    return call, calls
+
+
+def test_completed_result_is_replayed(clock):
+    cache = IdempotencyCache(ttl=60)
+    call, calls = counting_call()
+    fingerprint = request_fingerprint("/user-input", {"post_frequency": 3})
+
+    async def scenario():
+        return await cache.run("key-1", fingerprint, call), await cache.run("key-1", fingerprint, call)
+
+    first, second = asyncio.run(scenario())
+    assert first == ("session-1-1", False)
+    assert second == ("session-1-1", True)
+    assert len(calls) == 1
+
+
+def test_concurrent_requests_share_one_run(clock):
+    cache = IdempotencyCache(ttl=60)
+    call, calls = counting_call(delay=0.01)
+    fingerprint = request_fingerprint("/user-input", {"post_frequency": 3})
+
+    async def scenario():
+        return await asyncio.gather(*(cache.run("key-1", fingerprint, call) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [result for result, _ in results] == ["session-1-1"] * 3
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert len(calls) == 1
+
+
+def test_result_expires_after_the_ttl(clock):
+    cache = IdempotencyCache(ttl=60)
+    call, calls = counting_call()
+    fingerprint = request_fingerprint("/user-input", {"post_frequency": 3})
+
+    async def scenario():
+        first = await cache.run("key-1", fingerprint, call)
+        clock.now += 59
+        within = await cache.run("key-1", fingerprint, call)
+        clock.now += 2
+        after = await cache.run("key-1", fingerprint, call)
+        return first, within, after
+
+    first, within, after = asyncio.run(scenario())
+    assert within == (first[0], True)
+    assert after == ("session-1-2", False)
+    assert len(calls) == 2
+
+
+def test_key_reused_with_another_body_is_refused(clock):
+    cache = IdempotencyCache(ttl=60)
+    call, calls = counting_call(delay=0.01)
+
+    async def scenario():
+        in_flight = asyncio.ensure_future(cache.run("key-1", request_fingerprint("/user-input", {"post_frequency": 3}), call))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyConflict):
+            await cache.run("key-1", request_fingerprint("/user-input", {"post_frequency": 5}), call)
+        await in_flight
+        # And once the first run is remembered
+        with pytest.raises(IdempotencyConflict):
+            await cache.run("key-1", request_fingerprint("/user-input", {"post_frequency": 5}), call)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_failed_run_is_not_remembered(clock):
+    cache = IdempotencyCache(ttl=60)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("coordinator unreachable")
+        return "session-1"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.run("key-1", "fingerprint", flaky)
+        return await cache.run("key-1", "fingerprint", flaky)
+
+    assert asyncio.run(scenario()) == ("session-1", False)
+    assert cache.stats() == {"in_flight": 0, "completed": 1}
+
+
+def post_request(headers=()) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/user-input", "query_string": b"", "headers": list(headers)})
+
+
+def test_identical_requests_without_a_key_run_separately():
+    calls = []
+
+    async def submit():
+        calls.append(1)
+        session_id = f"session-{len(calls)}"
+        await asyncio.sleep(0.01)
+        return {"session_id": session_id}, {}
+
+    async def scenario():
+        payload = {"area_of_interest": "fitness", "post_frequency": 3}
+        return await asyncio.gather(*(run_idempotent(post_request(), None, payload, submit) for _ in range(2)))
+
+    responses = asyncio.run(scenario())
+    sessions = {json.loads(response.body)["session_id"] for response in responses}
+    # Two users submitting the same form must not share a campaign
+    assert sessions == {"session-1", "session-2"}
+    assert all("idempotent-replayed" not in response.headers for response in responses)
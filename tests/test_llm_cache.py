@@ -0,0 +1,39 @@
+# tests/test_llm_cache.py
+
+import time
+
+from Backend.utils.llm_cache import SQLiteCacheTier
+
+
+def test_expired_rows_are_purged_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    tier = SQLiteCacheTier(path, max_entries=0, purge_interval=3600)
+    tier.set("fresh", "post", time.time() + 3600)
+    tier.set("stale", "post", time.time() - 1)
+    assert len(tier) == 2
+
+    reopened = SQLiteCacheTier(path, max_entries=0, purge_interval=3600)
+    assert len(reopened) == 1
+    assert reopened.get("fresh") is not None
+
+
+def test_writes_purge_once_the_interval_has_passed(tmp_path):
+    tier = SQLiteCacheTier(str(tmp_path / "cache.db"), max_entries=0, purge_interval=3600)
+    tier.set("stale", "post", time.time() - 1)
+    tier.set("fresh", "post", time.time() + 3600)
+    assert len(tier) == 2  # Not purged again within the interval
+
+    tier.purge_interval = 0
+    tier.set("another", "post", time.time() + 3600)
+    assert len(tier) == 2
+    assert tier.get("stale") is None
+
+
+def test_purge_caps_rows_keeping_the_newest(tmp_path):
+    tier = SQLiteCacheTier(str(tmp_path / "cache.db"), max_entries=3, purge_interval=0)
+    now = time.time()
+    for index in range(10):
+        tier.set(f"post-{index}", index, now + 3600 + index)
+
+    assert len(tier) == 3
+    assert [tier.get(f"post-{index}") is not None for index in range(10)] == [False] * 7 + [True] * 3
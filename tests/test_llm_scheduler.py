@@ -0,0 +1,147 @@
+# tests/test_llm_scheduler.py
+
+import asyncio
+
+import pytest
+
+from Backend.utils.llm_scheduler import BACKGROUND, INTERACTIVE, LLMScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def admitted_in_order(scheduler: LLMScheduler, clock: FakeClock, tickets: list, step: float) -> list:
+    """Move the clock `step` at a time, dispatching, until every ticket is granted; returns them by grant order."""
+    for _ in range(1000):
+        scheduler.dispatch()
+        if all(ticket.granted for ticket in tickets):
+            break
+        clock.now += step
+    return sorted(tickets, key=lambda ticket: (ticket.granted_at, tickets.index(ticket)))
+
+
+def test_interactive_goes_before_earlier_background():
+    clock = FakeClock()
+    # One request per second, no bursting beyond one
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=0, burst_seconds=1, clock=clock)
+    background = [scheduler.submit("campaign-a", 100, BACKGROUND) for _ in range(3)]
+    scheduler.dispatch()  # The first background call takes the only request left
+    interactive = scheduler.submit("campaign-b", 100, INTERACTIVE)
+
+    order = admitted_in_order(scheduler, clock, background + [interactive], step=1.0)
+    # Queued last, but admitted ahead of every background call still waiting
+    assert order == [background[0], interactive, background[1], background[2]]
+
+
+def test_flows_take_turns_within_a_priority():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=0, burst_seconds=1, clock=clock)
+    scheduler.requests.take(1)  # Nothing admitted until everything is queued
+    week = [scheduler.submit("campaign-a", 500) for _ in range(7)]
+    single = scheduler.submit("campaign-b", 500)
+
+    order = admitted_in_order(scheduler, clock, week + [single], step=1.0)
+    # The single post goes second, not after all seven of the other campaign's
+    assert order.index(single) == 1
+    assert [ticket for ticket in order if ticket is not single] == week
+
+
+def test_weight_gives_a_flow_a_larger_share():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=0, burst_seconds=1, clock=clock)
+    scheduler.requests.take(1)
+    heavy = [scheduler.submit("campaign-a", 100, weight=2.0) for _ in range(4)]
+    light = [scheduler.submit("campaign-b", 100) for _ in range(4)]
+
+    order = admitted_in_order(scheduler, clock, heavy + light, step=1.0)
+    first_six = order[:6]
+    assert sum(ticket in heavy for ticket in first_six) == 4
+    assert sum(ticket in light for ticket in first_six) == 2
+
+
+def test_settle_charges_tokens_beyond_the_estimate():
+    clock = FakeClock()
+    # 100 tokens a second, at most 100 at once
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1, clock=clock)
+    first = scheduler.submit("campaign-a", 100)
+    scheduler.dispatch()
+    assert first.granted
+
+    # It used 1000 tokens, not 100: the next call waits out the 900 of debt plus its own 100
+    scheduler.settle(first, 1000)
+    second = scheduler.submit("campaign-b", 100)
+    assert scheduler.dispatch() == pytest.approx(10.0)
+    clock.now = 9.9
+    scheduler.dispatch()
+    assert not second.granted
+    clock.now = 10.01
+    scheduler.dispatch()
+    assert second.granted
+
+
+def test_settle_refunds_unused_tokens_and_charges_retries():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=6000, burst_seconds=5, clock=clock)
+    ticket = scheduler.submit("campaign-a", 400)
+    scheduler.dispatch()
+    assert scheduler.tokens.tokens == pytest.approx(100)
+    assert scheduler.requests.tokens == pytest.approx(4)
+
+    # Used 150 tokens over three attempts
+    scheduler.settle(ticket, 150, requests=3)
+    assert scheduler.tokens.tokens == pytest.approx(350)
+    assert scheduler.requests.tokens == pytest.approx(2)
+
+
+def test_cancelled_queued_call_gives_its_turn_away():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=0, burst_seconds=1, clock=clock)
+
+    async def scenario():
+        scheduler.requests.take(1)
+        waiting = asyncio.ensure_future(scheduler.acquire("campaign-a", 100))
+        behind = asyncio.ensure_future(scheduler.acquire("campaign-b", 100))
+        await asyncio.sleep(0)
+        assert scheduler.queued() == {INTERACTIVE: 0, BACKGROUND: 2}
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.queued() == {INTERACTIVE: 0, BACKGROUND: 1}
+
+        clock.now = 1.0
+        scheduler.dispatch()
+        ticket = await behind
+        assert ticket.flow == "campaign-b"
+        assert scheduler.admitted == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_granted_call_returns_its_budget():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=6000, burst_seconds=1, clock=clock)
+
+    async def scenario():
+        scheduler.requests.take(1)
+        waiting = asyncio.ensure_future(scheduler.acquire("campaign-a", 100))
+        await asyncio.sleep(0)
+
+        # Granted, then cancelled before the caller resumed to use it
+        clock.now = 1.0
+        scheduler.dispatch()
+        assert scheduler.requests.tokens == pytest.approx(0)
+        assert scheduler.tokens.tokens == pytest.approx(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert scheduler.requests.tokens == pytest.approx(1)
+        assert scheduler.tokens.tokens == pytest.approx(100)
+
+    asyncio.run(scenario())
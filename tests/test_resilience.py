@@ -0,0 +1,217 @@
+# tests/test_resilience.py
+
+import asyncio
+import time
+
+import pytest
+
+from Backend.utils.llm_client import FakeBackend, FaultInjectingBackend, LLMBackend, LLMClient
+from Backend.utils.llm_scheduler import LLMScheduler
+from Backend.utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, TransientLLMError, call_with_retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedBackend(LLMBackend):
+    """Raises the scripted errors in turn, then answers."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def client(backend: LLMBackend, max_retries: int = 3, deadline: float = 5.0, attempt_timeout: float = 1.0,
+           breaker: CircuitBreaker = None, chunk_timeout: float = 1.0) -> LLMClient:
+    return LLMClient(
+        backend,
+        retry_policy=RetryPolicy(max_retries=max_retries, base_delay=0.001, max_delay=0.001, attempt_timeout=attempt_timeout),
+        deadline=deadline,
+        circuit_breaker=breaker or CircuitBreaker(failure_threshold=100),
+        scheduler=LLMScheduler(0, 0),
+        chunk_timeout=chunk_timeout
+    )
+
+
+def test_transient_errors_are_retried_until_success():
+    backend = ScriptedBackend([TransientLLMError("overloaded"), TransientLLMError("overloaded")])
+
+    assert asyncio.run(client(backend).generate("prompt")) == "ok"
+    assert backend.calls == 3
+
+
+def test_transient_errors_give_up_after_max_retries():
+    backend = FaultInjectingBackend(FakeBackend(), failure_rate=1.0)
+
+    with pytest.raises(TransientLLMError):
+        asyncio.run(client(backend, max_retries=2).generate("prompt"))
+    assert backend.calls == 3
+
+
+def test_fatal_errors_are_not_retried():
+    backend = FaultInjectingBackend(FakeBackend(), failure_rate=1.0, error_factory=lambda: ValueError("prompt rejected"))
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    with pytest.raises(ValueError):
+        asyncio.run(client(backend, breaker=breaker).generate("prompt"))
+    assert backend.calls == 1
+    # The backend answered, so the breaker stays closed
+    assert breaker.state == "closed"
+
+
+def test_hanging_calls_stop_at_the_deadline():
+    backend = FaultInjectingBackend(FakeBackend(), hang_rate=1.0, hang_seconds=60)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client(backend, max_retries=100, deadline=0.3, attempt_timeout=0.05).generate("prompt"))
+    assert time.monotonic() - started < 1.0
+    assert backend.calls > 1
+
+
+class StallingBackend(LLMBackend):
+    """Streams `chunks`, then stalls; records whether its stream was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def stream(self, prompt: str):
+        try:
+            for chunk in self.chunks:
+                yield chunk
+            await asyncio.sleep(60)
+        finally:
+            self.closed = True
+
+
+def test_stalled_stream_times_out_and_gives_its_slot_back():
+    backend = StallingBackend(["one ", "two "])
+    llm = client(backend, chunk_timeout=0.05)
+    received = []
+
+    async def consume():
+        async for chunk in llm.stream("prompt"):
+            received.append(chunk)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(consume())
+    assert time.monotonic() - started < 1.0
+    assert received == ["one ", "two "]
+    assert backend.closed
+    assert llm._semaphore._value == llm.max_concurrency
+
+
+def test_stream_stops_at_the_deadline_however_often_chunks_arrive():
+    class Trickle(LLMBackend):
+        async def stream(self, prompt: str):
+            while True:
+                await asyncio.sleep(0.01)
+                yield "."
+
+    async def consume():
+        async for _ in client(Trickle(), deadline=0.2, chunk_timeout=1.0).stream("prompt"):
+            pass
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(consume())
+    assert time.monotonic() - started < 1.0
+
+
+def test_consumer_that_stops_reading_closes_the_upstream_stream():
+    backend = StallingBackend(["one ", "two ", "three "])
+    llm = client(backend, max_retries=0)
+
+    async def first_chunk():
+        chunks = llm.stream("prompt")
+        async for chunk in chunks:
+            assert not backend.closed
+            await chunks.aclose()
+            return chunk
+
+    assert asyncio.run(first_chunk()) == "one "
+    assert backend.closed
+    assert llm._semaphore._value == llm.max_concurrency
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    policy = RetryPolicy(max_retries=0, attempt_timeout=1)
+
+    async def fail(timeout):
+        raise TransientLLMError("overloaded")
+
+    async def succeed(timeout):
+        return "ok"
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(TransientLLMError):
+                await call_with_retries(fail, policy, breaker)
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await call_with_retries(succeed, policy, breaker)
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        # A failed trial opens the circuit again for another reset_timeout
+        with pytest.raises(TransientLLMError):
+            await call_with_retries(fail, policy, breaker)
+        assert breaker.state == "open"
+
+        clock.now = 20
+        assert await call_with_retries(succeed, policy, breaker) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_half_open_lets_one_trial_through_at_a_time():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_cancelled_trial_does_not_leave_the_breaker_stuck():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    policy = RetryPolicy(max_retries=0, attempt_timeout=60)
+
+    async def hang(timeout):
+        await asyncio.sleep(timeout)
+
+    async def succeed(timeout):
+        return "ok"
+
+    async def scenario():
+        trial = asyncio.ensure_future(call_with_retries(hang, policy, breaker))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert breaker.state == "half_open"
+        assert await call_with_retries(succeed, policy, breaker) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
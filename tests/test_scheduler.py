@@ -0,0 +1,67 @@
+# tests/test_scheduler.py
+
+import pytest
+
+from Backend.utils import scheduler
+from Backend.utils.scheduler import WEEKDAYS, build_schedule, parse_weekday
+
+
+def circular_gaps(days):
+    indexes = sorted(WEEKDAYS.index(day) for day in days)
+    return [(indexes[(position + 1) % len(indexes)] - index) % 7 or 7 for position, index in enumerate(indexes)]
+
+
+@pytest.mark.parametrize("post_frequency", range(1, 8))
+def test_one_distinct_day_per_post(post_frequency):
+    days = build_schedule(post_frequency)
+    assert len(days) == post_frequency
+    assert len(set(days)) == post_frequency
+    assert set(days) <= set(WEEKDAYS)
+
+
+@pytest.mark.parametrize("post_frequency", range(1, 8))
+@pytest.mark.parametrize("content_type", [None, "blog", "twitter", "video"])
+def test_days_are_spread_evenly_around_the_week(post_frequency, content_type):
+    gaps = circular_gaps(build_schedule(post_frequency, content_type=content_type))
+    assert sum(gaps) == 7
+    assert max(gaps) - min(gaps) <= 1
+
+
+def test_single_post_goes_on_the_most_preferred_day():
+    assert build_schedule(1) == ["Monday"]
+    assert build_schedule(1, content_type="blog") == ["Tuesday"]
+    assert build_schedule(1, preferred_days=["sat"]) == ["Saturday"]
+
+
+def test_preferred_days_are_covered_when_spacing_allows():
+    assert build_schedule(3, preferred_days=["Monday", "Wednesday", "Friday"]) == ["Monday", "Wednesday", "Friday"]
+    # Tuesday and Wednesday are too close for two posts a week; the earlier preference wins
+    days = build_schedule(2, preferred_days=["Tuesday", "Wednesday"])
+    assert "Tuesday" in days and "Wednesday" not in days
+    # Explicit days override the content type's defaults; unknown names are ignored
+    assert build_schedule(1, content_type="blog", preferred_days=["someday", "Fri"]) == ["Friday"]
+
+
+def test_every_day_when_posting_daily():
+    assert build_schedule(7) == WEEKDAYS
+
+
+@pytest.mark.parametrize("post_frequency", [0, -1, 8, 14])
+def test_frequency_outside_one_week_is_refused(post_frequency):
+    # More posts than days in the week cannot be placed one per day
+    with pytest.raises(ValueError):
+        build_schedule(post_frequency)
+
+
+def test_order_starts_from_today_in_the_audience_timezone(monkeypatch):
+    monkeypatch.setattr(scheduler, "_current_weekday", lambda timezone: 3 if timezone else 0)
+    days = build_schedule(3, preferred_days=["Monday", "Wednesday", "Friday"], timezone="Europe/Berlin")
+    assert days == ["Friday", "Monday", "Wednesday"]
+
+
+def test_parse_weekday():
+    assert parse_weekday("mon") == "Monday"
+    assert parse_weekday(" THURSDAY ") == "Thursday"
+    assert parse_weekday("Mo") is None
+    assert parse_weekday("Someday") is None
+    assert parse_weekday(3) is None
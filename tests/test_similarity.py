@@ -0,0 +1,99 @@
+# tests/test_similarity.py
+
+import asyncio
+
+import pytest
+
+from Backend.config import Config
+from Backend.models import ContentRequest
+from Backend.utils.similarity import SimilarityIndex, is_near_duplicate, jaccard, shingles
+from Backend.Agents import content_generation_agent
+from Backend.Agents.topic_suggestion_agent import add_new_topics
+
+
+def test_shingles_ignore_case_stopwords_and_plurals():
+    assert shingles("Home Workouts for Beginners") == shingles("home workout beginner")
+    assert jaccard(shingles("Best running shoes for marathon training"),
+                   shingles("Best running shoes for your marathon training")) == 1.0
+
+
+def test_near_duplicate_against_threshold():
+    topics = ["Home workouts for beginners", "Meal prep on a budget"]
+    assert is_near_duplicate("Home workout for beginners", topics)
+    assert not is_near_duplicate("Marathon training plans", topics)
+    # Sharing half the words is not enough at the default threshold, but is at a looser one
+    assert not is_near_duplicate("The beginners guide to home workouts", topics)
+    assert is_near_duplicate("The beginners guide to home workouts", topics, threshold=0.5)
+
+
+def test_reworded_topics_are_dropped_from_a_batch():
+    topics = ["Home workouts for beginners"]
+    added = add_new_topics(topics, ["Home workout for beginners", "Meal prep on a budget", "Meal prep on a budget"], limit=5)
+    assert added == ["Meal prep on a budget"]
+    assert topics == ["Home workouts for beginners", "Meal prep on a budget"]
+
+
+def test_index_finds_near_duplicates_within_a_namespace():
+    index = SimilarityIndex(max_items=8)
+    index.add("fitness", "Home workouts for beginners", ref="post-1", owner="s1")
+    index.add("fitness", "Meal prep on a budget", ref="post-2", owner="s1")
+    index.add("cooking", "Home workouts for beginners", ref="post-3", owner="s2")
+
+    match = index.find("fitness", "home workout for beginners")
+    assert (match.ref, match.similarity) == ("post-1", 1.0)
+    assert index.find("fitness", "Marathon training plans") is None
+    assert index.find("travel", "Home workouts for beginners") is None
+    assert index.find("fitness", "Home workouts for beginners", exclude_owner="s1") is None
+
+
+def test_index_forgets_the_oldest_entry_when_full():
+    index = SimilarityIndex(max_items=2)
+    index.add("fitness", "Home workouts for beginners", ref="post-1")
+    index.add("fitness", "Meal prep on a budget", ref="post-2")
+    index.add("fitness", "Marathon training plans", ref="post-3")
+    assert len(index) == 2
+    assert index.find("fitness", "Home workouts for beginners") is None
+    assert index.find("fitness", "Marathon training plans").ref == "post-3"
+
+
+class FakeCache:
+    def __init__(self, posts):
+        self.posts = posts
+
+    async def get(self, key):
+        return self.posts.get(key)
+
+
+def request(topic, session_id, area_of_interest="fitness"):
+    return ContentRequest(topic=topic, day="Monday", area_of_interest=area_of_interest, content_type="Blog",
+                          keywords=["fitness"], session_id=session_id)
+
+
+@pytest.fixture
+def reuse(monkeypatch):
+    """The content agent with a fresh index holding one post another campaign got."""
+    index = SimilarityIndex(max_items=8)
+    monkeypatch.setattr(content_generation_agent, "similarity_index", index)
+    monkeypatch.setattr(content_generation_agent, "response_cache", FakeCache({"post-1": "A post about home workouts"}))
+    earlier = request("Home workouts for beginners", session_id="s1")
+    content_generation_agent.remember_post(earlier, earlier.topic, earlier.day, "post-1")
+
+    def find(topic, session_id="s2", area_of_interest="fitness"):
+        return asyncio.run(content_generation_agent.find_similar_post(
+            request(topic, session_id, area_of_interest), topic, "Monday"))
+
+    return find
+
+
+def test_posts_are_not_reused_unless_enabled(reuse, monkeypatch):
+    monkeypatch.setattr(Config, "SIMILARITY_REUSE_CONTENT", False)
+    assert reuse("Home workout for beginners") is None
+
+
+def test_enabled_reuse_serves_near_duplicates_from_other_campaigns(reuse, monkeypatch):
+    monkeypatch.setattr(Config, "SIMILARITY_REUSE_CONTENT", True)
+    assert reuse("Home workout for beginners") == "A post about home workouts"
+    assert reuse("Marathon training plans") is None
+    # Never within the same campaign, nor across areas of interest
+    assert reuse("Home workout for beginners", session_id="s1") is None
+    assert reuse("Home workout for beginners", area_of_interest="cooking") is None
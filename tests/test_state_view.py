@@ -0,0 +1,111 @@
+# tests/test_state_view.py
+
+import pytest
+
+from Backend.utils import SessionStore, project_state, state_etag, etag_matches, STATE_FIELDS
+from Backend.utils.state_view import SUMMARY_CHARS
+
+
+@pytest.fixture
+def store():
+    return SessionStore()
+
+
+def campaign(store, posts=5):
+    session = store.create("s1")
+    store.set_field(session, "user_input", {"area_of_interest": "fitness", "post_frequency": posts})
+    store.set_field(session, "schedule", {"days": ["Monday"]})
+    for day in range(posts):
+        store.append_item(session, "generated_content", {"day": f"day {day}", "content": f"post {day} " + "word " * 100})
+    return session
+
+
+def test_all_fields_by_default(store):
+    state = project_state(campaign(store))
+    assert set(STATE_FIELDS) <= set(state)
+    assert state["content_total"] == 5
+    assert len(state["generated_content"]) == 5
+    assert state["next_cursor"] is None
+
+
+def test_only_the_requested_fields(store):
+    state = project_state(campaign(store), fields=["schedule"])
+    assert state == {"session_id": "s1", "content_total": 5, "schedule": {"days": ["Monday"]}}
+
+
+def test_unknown_field_or_view_is_refused(store):
+    session = campaign(store)
+    with pytest.raises(ValueError):
+        project_state(session, fields=["schedule", "password"])
+    with pytest.raises(ValueError):
+        project_state(session, content_view="html")
+
+
+def test_content_views(store):
+    session = campaign(store)
+    none = project_state(session, fields=["generated_content"], content_view="none")["generated_content"]
+    assert none[0] == {"day": "day 0"}
+
+    summary = project_state(session, fields=["generated_content"], content_view="summary")["generated_content"]
+    assert "content" not in summary[0]
+    assert summary[0]["summary"].startswith("post 0 word")
+    assert summary[0]["summary"].endswith("…")
+    assert len(summary[0]["summary"]) <= SUMMARY_CHARS + 1
+
+    full = project_state(session, fields=["generated_content"])["generated_content"]
+    assert full[0]["content"] == session["generated_content"][0]["content"]
+
+
+def test_cursor_pages_through_every_post_once(store):
+    session = campaign(store)
+    days, cursor = [], None
+    while True:
+        page = project_state(session, fields=["generated_content"], content_view="none", limit=2, cursor=cursor)
+        days += [item["day"] for item in page["generated_content"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert days == [f"day {day}" for day in range(5)]
+
+    with pytest.raises(ValueError):
+        project_state(session, limit=2, cursor="not-a-cursor")
+
+
+def test_cursor_stays_valid_while_posts_are_appended(store):
+    session = campaign(store, posts=2)
+    page = project_state(session, content_view="none", limit=2)
+    assert page["next_cursor"] is None
+    store.append_item(session, "generated_content", {"day": "day 2", "content": "late"})
+    page = project_state(session, content_view="none", limit=2, cursor="2")
+    assert [item["day"] for item in page["generated_content"]] == ["day 2"]
+
+
+def test_etag_is_stable_until_the_session_changes(store):
+    session = campaign(store)
+    view = (["generated_content"], "summary", 2, None)
+    etag = state_etag(store.epoch, session, *view)
+    assert state_etag(store.epoch, session, *view) == etag
+    # Reading the session does not change it
+    project_state(store.get("s1"), *view)
+    assert state_etag(store.epoch, session, *view) == etag
+
+    store.append_item(session, "generated_content", {"day": "day 5", "content": "more"})
+    changed = state_etag(store.epoch, session, *view)
+    assert changed != etag
+    store.set_field(session, "errors", [{"stage": "content", "error": "boom"}])
+    assert state_etag(store.epoch, session, *view) != changed
+
+
+def test_etag_differs_per_view_and_per_process(store):
+    session = campaign(store)
+    assert state_etag(store.epoch, session, None, "full") != state_etag(store.epoch, session, None, "none")
+    assert state_etag(store.epoch, session) != state_etag(SessionStore().epoch, session)
+
+
+def test_if_none_match(store):
+    etag = state_etag(store.epoch, campaign(store))
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag, f'"other", W/{etag}')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, None)
+    assert not etag_matches(etag, '"other"')
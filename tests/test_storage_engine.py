@@ -0,0 +1,164 @@
+# tests/test_storage_engine.py
+
+import asyncio
+import threading
+
+import mongomock
+import pytest
+
+from Backend.utils.storage_engine import AsyncMongoStore
+
+
+class RecordingCollection(mongomock.collection.Collection):
+    """mongomock collection that records the thread and batch size of every driver call."""
+
+    calls = []
+
+    def insert_many(self, documents, *args, **kwargs):
+        documents = list(documents)
+        self.calls.append(("insert_many", threading.current_thread().name, len(documents)))
+        return super().insert_many(documents, *args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        self.calls.append(("find_one", threading.current_thread().name, None))
+        return super().find_one(*args, **kwargs)
+
+    def update_one(self, *args, **kwargs):
+        self.calls.append(("update_one", threading.current_thread().name, None))
+        return super().update_one(*args, **kwargs)
+
+    def delete_one(self, *args, **kwargs):
+        self.calls.append(("delete_one", threading.current_thread().name, None))
+        return super().delete_one(*args, **kwargs)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    RecordingCollection.calls = []
+    monkeypatch.setattr(mongomock.database, "Collection", RecordingCollection)
+    return RecordingCollection.calls
+
+
+def make_store(batch_size: int = 3, flush_interval: float = 0.05) -> AsyncMongoStore:
+    return AsyncMongoStore(mongomock.MongoClient(), database_name="test", workers=2,
+                           batch_size=batch_size, flush_interval=flush_interval)
+
+
+def test_full_batch_is_written_in_one_call(calls):
+    async def scenario():
+        store = make_store(batch_size=3, flush_interval=60)
+        ids = await asyncio.gather(*(store.insert("posts", {"day": day}) for day in ("Monday", "Tuesday", "Wednesday")))
+        documents = {document["day"]: str(document["_id"]) for document in store.db["posts"].find()}
+        await store.close()
+        return ids, documents
+
+    ids, documents = asyncio.run(scenario())
+    # Every caller gets the id of its own document
+    assert ids == [documents["Monday"], documents["Tuesday"], documents["Wednesday"]]
+    assert [call for call in calls if call[0] == "insert_many"] == [("insert_many", calls[0][1], 3)]
+
+
+def test_partial_batch_is_written_after_the_flush_interval(calls):
+    async def scenario():
+        store = make_store(batch_size=10, flush_interval=0.05)
+        first = await asyncio.gather(*(store.insert("posts", {"n": n}) for n in range(4)))
+        second = await store.insert("posts", {"n": 4})
+        count = store.db["posts"].count_documents({})
+        await store.close()
+        return first, second, count
+
+    first, second, count = asyncio.run(scenario())
+    assert len(set(first + [second])) == 5 and count == 5
+    assert [size for name, _, size in calls if name == "insert_many"] == [4, 1]
+
+
+def test_reads_and_writes_run_on_the_worker_pool(calls):
+    async def scenario():
+        store = make_store()
+        document_id = await store.insert("posts", {"day": "Monday", "topic": "Old"})
+        await store.flush()
+        await store.update_one("posts", {"day": "Monday"}, {"$set": {"topic": "New"}})
+        found = await store.find_one("posts", {"day": "Monday"})
+        await store.delete_one("posts", {"day": "Monday"})
+        gone = await store.find_one("posts", {"day": "Monday"})
+        await store.close()
+        return document_id, found, gone
+
+    document_id, found, gone = asyncio.run(scenario())
+    assert str(found["_id"]) == document_id and found["topic"] == "New"
+    assert gone is None
+    assert [name for name, _, _ in calls] == ["insert_many", "update_one", "find_one", "delete_one", "find_one"]
+    assert all(thread.startswith("mongo") for _, thread, _ in calls)
+
+
+def test_duplicate_key_fails_only_its_own_insert(calls):
+    async def scenario():
+        store = make_store(batch_size=3, flush_interval=60)
+        store.db["posts"].insert_one({"_id": "taken"})
+        results = await asyncio.gather(
+            store.insert("posts", {"_id": "first"}),
+            store.insert("posts", {"_id": "taken"}),
+            store.insert("posts", {"_id": "last"}),
+            return_exceptions=True
+        )
+        await store.close()
+        return results
+
+    first, taken, last = asyncio.run(scenario())
+    assert (first, last) == ("first", "last")
+    assert isinstance(taken, Exception) and "Duplicate" in str(taken)
+
+
+def test_failed_batch_fails_every_caller(calls, monkeypatch):
+    def unreachable(self, documents, *args, **kwargs):
+        raise ConnectionError("server unreachable")
+
+    monkeypatch.setattr(RecordingCollection, "insert_many", unreachable)
+
+    async def scenario():
+        store = make_store(batch_size=2, flush_interval=60)
+        results = await asyncio.gather(store.insert("posts", {"n": 1}), store.insert("posts", {"n": 2}),
+                                       return_exceptions=True)
+        await store.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_driver_errors_reach_the_caller(calls):
+    async def scenario():
+        store = make_store()
+        try:
+            with pytest.raises(mongomock.OperationFailure):
+                await store.find_one("posts", {"day": {"$bogus": "Monday"}})
+        finally:
+            await store.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_cursor_pages_through_documents_missing_the_sort_field(direction):
+    async def scenario():
+        store = make_store()
+        collection = store.db["generated_content"]
+        # String ids: mongomock can only order ObjectIds when bson is installed
+        collection.insert_many([{"_id": f"post-{n:02d}", "day": f"day-{n}", "created_at": float(n % 4)} for n in range(8)])
+        # Written before created_at was set on insert, or by an upsert
+        collection.insert_many([{"_id": f"legacy-{n:02d}", "day": f"legacy-{n}"} for n in range(3)])
+        collection.insert_one({"_id": "null-00", "day": "explicit-null", "created_at": None})
+        expected = [document["day"] for document in collection.find().sort([("created_at", direction), ("_id", direction)])]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await store.find_page("generated_content", {}, sort={"created_at": direction}, limit=2, cursor=cursor)
+            seen += [document["day"] for document in page]
+            if cursor is None:
+                break
+        await store.close()
+        return expected, seen
+
+    expected, seen = asyncio.run(scenario())
+    assert len(expected) == 12
+    assert seen == expected
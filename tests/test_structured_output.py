@@ -0,0 +1,114 @@
+# tests/test_structured_output.py
+
+import asyncio
+
+import pytest
+
+from Backend.models import TopicRequest
+from Backend.Agents import topic_suggestion_agent
+from Backend.utils.structured_output import JsonArrayStreamParser, extract_json, find_json_span, parse_json_list, text_item
+
+
+def test_fenced_block_wins_over_brackets_in_prose():
+    response = 'Here are the days [as requested]:\n```json\n["Monday", "Thursday"]\n```\nLet me know {if} that works.'
+    assert extract_json(response) == ["Monday", "Thursday"]
+
+
+def test_last_complete_value_wins_over_an_earlier_aside():
+    response = 'Sure [happy to help]! Every item is an object like {"topic": "..."}.\n[{"topic": "Capsule wardrobes"}]'
+    assert extract_json(response) == [{"topic": "Capsule wardrobes"}]
+
+
+def test_next_candidate_is_tried_when_one_does_not_parse():
+    response = '["Monday", "Friday"]\n\nNote: {days are in UTC}'
+    assert extract_json(response) == ["Monday", "Friday"]
+
+
+def test_truncated_response_is_repaired():
+    response = 'Topics: [{"topic": "Thrift hauls"}, {"topic": "Repair cafes"}, {"topic": "Capsu'
+    assert parse_json_list(response, text_item("topic")) == ["Thrift hauls", "Repair cafes"]
+
+
+def test_value_after_a_stray_opening_bracket_is_found():
+    response = 'Note [draft, not final:\n["Tuesday", "Saturday"]'
+    assert extract_json(response) == ["Tuesday", "Saturday"]
+
+
+def test_find_json_span_returns_the_preferred_candidate():
+    assert find_json_span('e.g. [1] then {"a": [2]}') == '{"a": [2]}'
+    assert find_json_span("no json here") is None
+
+
+def stream(response, size=7):
+    """Feed `response` to a parser in chunks; returns what feed() gave, what close() gave, and the parser."""
+    parser = JsonArrayStreamParser(text_item("topic"))
+    fed = [item for start in range(0, len(response), size) for item in parser.feed(response[start:start + size])]
+    return fed, parser.close(), parser
+
+
+@pytest.mark.parametrize("response", [
+    '[{"topic": "Thrift hauls"}, {"topic": "Repair cafes"}]',
+    '```json\n["Thrift hauls", "Repair cafes"]\n```',
+    'Here you go:\n```json\n["Thrift hauls", "Repair cafes"]\n```\nEnjoy [and share]!',
+    'Topics: [{"topic": "Thrift hauls"}, {"topic": "Repair cafes"}, {"topic": "Capsu',
+    'Sure [happy to help]! Format: ["..."]\n["Thrift hauls", "Repair cafes"]',
+    '["Example topic"]\n```json\n["Thrift hauls", "Repair cafes"]\n```',
+    '["Example topic"] is the format; the topics: ["Thrift hauls", "Repair cafes"]',
+    '1. Thrift hauls\n2. Repair cafes',
+])
+def test_streamed_and_whole_responses_pick_the_same_array(response):
+    fed, closed, parser = stream(response)
+    answer = parse_json_list(response, text_item("topic"))
+    assert answer == ["Thrift hauls", "Repair cafes"]
+    assert (closed if parser.diverged else fed + closed) == answer
+
+
+def test_array_opening_the_response_or_a_fence_streams_before_it_closes():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('["Thrift hauls", "Repair') == ["Thrift hauls"]
+    parser = JsonArrayStreamParser()
+    assert parser.feed('Sure!\n```json\n["Thrift hauls", "Repair') == ["Thrift hauls"]
+
+
+def test_array_after_prose_waits_for_the_whole_response():
+    fed, closed, parser = stream('For example ["Thrift hauls", "Repair cafes"]')
+    assert fed == []
+    assert closed == ["Thrift hauls", "Repair cafes"]
+    assert not parser.diverged
+
+
+def test_streamed_array_that_is_not_the_answer_is_flagged():
+    fed, closed, parser = stream('["Example topic", "Another"]\nActually: ["Thrift hauls", "Repair cafes"]')
+    assert fed == ["Example topic", "Another"]
+    assert parser.diverged
+    assert closed == ["Thrift hauls", "Repair cafes"]
+
+
+class ScriptedLLM:
+    model_name = "scripted"
+
+    def __init__(self, response):
+        self.response = response
+
+    async def generate(self, prompt, session=None):
+        return self.response
+
+    async def stream(self, prompt, session=None):
+        for start in range(0, len(self.response), 7):
+            yield self.response[start:start + 7]
+
+
+def test_topic_agent_keeps_the_answer_when_the_streamed_array_was_an_example(monkeypatch):
+    response = '["Example topic"]\nThe topics:\n```json\n["Thrift hauls", "Repair cafes"]\n```'
+    monkeypatch.setattr(topic_suggestion_agent, "llm_client", ScriptedLLM(response))
+    request = TopicRequest(area_of_interest="fashion", content_type="Blog", keywords=["thrift"], num_topics=2)
+    parts = []
+
+    async def on_topics(topics):
+        parts.append(topics)
+
+    streamed = asyncio.run(topic_suggestion_agent.generate_topics_with_gemini(request, on_topics))
+    assert streamed == asyncio.run(topic_suggestion_agent.generate_topics_with_gemini(request))
+    assert streamed == ["Thrift hauls", "Repair cafes"]
+    # Only the example went out early; the final TopicSuggestion carries the answer
+    assert parts == [["Example topic"]]
@@ -0,0 +1,47 @@
+# tests/test_work_queue.py
+
+import pytest
+
+from Backend.utils.work_queue import InProcessWorkQueue, LocalRedis, RedisWorkQueue, WorkDispatcher
+
+
+@pytest.fixture(params=["memory", "redis"])
+def dispatcher(request):
+    queue = InProcessWorkQueue() if request.param == "memory" else RedisWorkQueue(LocalRedis())
+    dispatcher = WorkDispatcher(queue, capacity=1, lease_timeout=60, max_attempts=3)
+    dispatcher.set_workers(["worker-a", "worker-b"])
+    return dispatcher
+
+
+def test_renewed_lease_outlives_the_lease_timeout(dispatcher):
+    dispatcher.submit("request-1", {"day": "Monday"})
+    dispatcher.assign(now=1000)
+
+    # A slow generation renewing every 20 seconds is never redelivered
+    for now in range(1020, 1200, 20):
+        assert dispatcher.renew("request-1", now=now)
+        assert dispatcher.reap_expired(now=now + 1) == ([], [])
+
+    assert dispatcher.ack("request-1", now=1200)
+    assert dispatcher.queue.inflight_count() == 0
+
+
+def test_lease_expires_without_renewal(dispatcher):
+    dispatcher.submit("request-1", {"day": "Monday"})
+    dispatcher.assign(now=1000)
+
+    redelivered, abandoned = dispatcher.reap_expired(now=1061)
+    assert [item["id"] for item in redelivered] == ["request-1"]
+    assert abandoned == []
+    # Renewing after the lease ran out does not resurrect it
+    assert not dispatcher.renew("request-1", now=1062)
+
+
+def test_renew_of_acknowledged_item_is_refused(dispatcher):
+    dispatcher.submit("request-1", {"day": "Monday"})
+    dispatcher.assign(now=1000)
+    assert dispatcher.ack("request-1", now=1010)
+
+    assert not dispatcher.renew("request-1", now=1020)
+    assert dispatcher.queue.inflight_count() == 0
+    assert dispatcher.reap_expired(now=2000) == ([], [])
@@ -0,0 +1,233 @@
+# tests/test_workflow.py
+
+import asyncio
+import logging
+
+import pytest
+
+from Backend.Agents import main_coordinator_agent as coordinator
+from Backend.config import Config
+from Backend.models import ContentBatchRequest, ContentRequest, TopicRequest, UserInput
+from Backend.utils.coordinator_storage import SegmentLogStorage
+from Backend.utils.session_store import SessionStore
+from Backend.utils.work_queue import InProcessWorkQueue, WorkDispatcher
+from Backend.utils.workflow import (COMPLETE, DONE, FAILED, GENERATING, ISSUED, PENDING, SCHEDULE_STEP, SCHEDULING,
+                                    TOPICS_STEP, CampaignWorkflow, post_step)
+
+DAYS = ["Monday", "Wednesday", "Friday"]
+
+
+def test_steps_move_forward_only():
+    sessions = SessionStore()
+    workflow = CampaignWorkflow(sessions)
+    session = sessions.create("session-1")
+
+    assert workflow.status(session, SCHEDULE_STEP) == PENDING
+    assert workflow.advance(session, [SCHEDULE_STEP], ISSUED) == [SCHEDULE_STEP]
+    # Issued again, e.g. re-sent after a restart, counts another attempt
+    assert workflow.advance(session, [SCHEDULE_STEP], ISSUED) == [SCHEDULE_STEP]
+    assert session["workflow"][SCHEDULE_STEP]["attempts"] == 2
+    assert workflow.advance(session, [SCHEDULE_STEP], DONE) == [SCHEDULE_STEP]
+
+    # Done and failed are final: late or duplicate replies change nothing
+    assert workflow.advance(session, [SCHEDULE_STEP], ISSUED) == []
+    assert workflow.advance(session, [SCHEDULE_STEP], FAILED) == []
+    assert workflow.status(session, SCHEDULE_STEP) == DONE
+    workflow.advance(session, [TOPICS_STEP], FAILED)
+    assert workflow.advance(session, [TOPICS_STEP], DONE) == []
+    assert workflow.status(session, TOPICS_STEP) == FAILED
+
+
+def test_details_are_recorded_and_outstanding_lists_issued_steps():
+    sessions = SessionStore()
+    workflow = CampaignWorkflow(sessions)
+    session = sessions.create("session-1")
+
+    moved = workflow.advance(session, [post_step(day) for day in DAYS], ISSUED, request_id="batch-1", priority="background")
+    assert moved == [post_step(day) for day in DAYS]
+    workflow.advance(session, [post_step("Monday")], DONE)
+
+    outstanding = workflow.outstanding(session)
+    assert sorted(outstanding) == [post_step("Friday"), post_step("Wednesday")]
+    assert {entry["request_id"] for entry in outstanding.values()} == {"batch-1"}
+
+
+def test_campaign_state_follows_its_steps():
+    sessions = SessionStore()
+    workflow = CampaignWorkflow(sessions)
+    session = sessions.create("session-1")
+
+    workflow.advance(session, [SCHEDULE_STEP, TOPICS_STEP], ISSUED)
+    assert workflow.state(session) == SCHEDULING
+    sessions.set_field(session, "schedule", {"posting_days": DAYS})
+    workflow.advance(session, [SCHEDULE_STEP, TOPICS_STEP], DONE)
+    # Scheduled, but no post requested yet
+    assert workflow.state(session) == GENERATING
+    workflow.advance(session, [post_step(day) for day in DAYS], ISSUED, request_id="batch-1")
+    workflow.advance(session, [post_step("Monday"), post_step("Wednesday")], DONE)
+    assert workflow.state(session) == GENERATING
+    workflow.advance(session, [post_step("Friday")], FAILED)
+    assert workflow.state(session) == COMPLETE
+
+
+def test_checkpoints_survive_a_restart(tmp_path):
+    path = str(tmp_path / "log")
+    sessions = SessionStore(storage=SegmentLogStorage(path))
+    workflow = CampaignWorkflow(sessions)
+    session = sessions.create("session-1")
+    workflow.advance(session, [SCHEDULE_STEP], DONE)
+    workflow.advance(session, [post_step("Monday")], ISSUED, request_id="request-1")
+    sessions.storage.close()
+
+    restored = SessionStore(storage=SegmentLogStorage(path))
+    restored.restore()
+    session = restored.get("session-1")
+    assert CampaignWorkflow.status(session, SCHEDULE_STEP) == DONE
+    assert CampaignWorkflow.outstanding(session) == {post_step("Monday"): session["workflow"][post_step("Monday")]}
+    assert session["workflow"][post_step("Monday")]["request_id"] == "request-1"
+    restored.storage.close()
+
+
+class RecordingContext:
+    """Stands in for the coordinator's uagents Context, keeping what it sends."""
+
+    def __init__(self):
+        self.sent = []
+        self.logger = logging.getLogger("test_workflow")
+
+    async def send(self, destination, message):
+        self.sent.append((destination, message))
+
+    def of_type(self, model):
+        return [message for _, message in self.sent if isinstance(message, model)]
+
+
+@pytest.fixture
+def restarted(monkeypatch):
+    """A coordinator with fresh state, as after a restart, and where its requests go."""
+    sessions = SessionStore()
+    dispatcher = WorkDispatcher(InProcessWorkQueue(), capacity=10)
+    dispatcher.set_workers(["content-worker"])
+    monkeypatch.setattr(coordinator, "sessions", sessions)
+    monkeypatch.setattr(coordinator, "workflow", CampaignWorkflow(sessions))
+    monkeypatch.setattr(coordinator, "content_dispatcher", dispatcher)
+    monkeypatch.setattr(Config, "SCHEDULING_AGENT_ADDRESS", "scheduler")
+    monkeypatch.setattr(Config, "TOPIC_SUGGESTION_AGENT_ADDRESS", "topic-suggester")
+    monkeypatch.setattr(Config, "STORAGE_AGENT_ADDRESS", "storage")
+    return coordinator
+
+
+def new_campaign(coordinator, session_id: str) -> dict:
+    session = coordinator.sessions.create(session_id)
+    coordinator.sessions.set_field(session, "user_input", {
+        "area_of_interest": "fitness", "content_type": "blog post", "keywords": ["running"],
+        "post_frequency": len(DAYS), "session_id": session_id
+    })
+    return session
+
+
+def scheduled(coordinator, session: dict, first_request: str):
+    """The schedule arrived and the first post was requested."""
+    coordinator.sessions.set_field(session, "schedule", {"posting_days": DAYS, "session_id": session["session_id"]})
+    coordinator.sessions.set_field(session, "current_batch_id", "batch-1")
+    coordinator.sessions.set_field(session, "remaining_days", DAYS[1:])
+    coordinator.workflow.advance(session, [SCHEDULE_STEP], DONE)
+    coordinator.workflow.advance(session, [post_step(DAYS[0])], ISSUED, request_id=first_request, priority="interactive")
+
+
+def topics_arrived(coordinator, session: dict, batch_request: str):
+    """The topics arrived and the rest of the week was requested in one batch."""
+    coordinator.workflow.advance(session, [TOPICS_STEP], DONE)
+    coordinator.sessions.set_field(session, "suggested_topics", ["Topic 1", "Topic 2"])
+    coordinator.workflow.advance(session, [post_step(day) for day in DAYS[1:]], ISSUED, request_id=batch_request)
+    coordinator.sessions.set_field(session, "dispatched_days", DAYS[1:])
+
+
+def test_resume_resends_schedule_and_topics_still_issued(restarted):
+    session = new_campaign(restarted, "session-1")
+    restarted.workflow.advance(session, [SCHEDULE_STEP], ISSUED)
+    restarted.sessions.set_field(session, "topics_requested_at", 1.0)
+    restarted.workflow.advance(session, [TOPICS_STEP], ISSUED)
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 2
+    assert [(destination, type(message)) for destination, message in ctx.sent] == [
+        ("scheduler", UserInput), ("topic-suggester", TopicRequest)
+    ]
+    assert ctx.of_type(TopicRequest)[0].num_topics == len(DAYS) - 1
+    assert session["workflow"][SCHEDULE_STEP]["attempts"] == 2
+
+
+def test_resume_resends_lost_posts_under_their_ids(restarted):
+    session = new_campaign(restarted, "session-1")
+    restarted.workflow.advance(session, [SCHEDULE_STEP, TOPICS_STEP], ISSUED)
+    scheduled(restarted, session, first_request="first-post")
+    topics_arrived(restarted, session, batch_request="rest-of-week")
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 2
+
+    [first] = ctx.of_type(ContentRequest)
+    assert (first.request_id, first.day, first.priority) == ("first-post", "Monday", "interactive")
+    [rest] = ctx.of_type(ContentBatchRequest)
+    assert (rest.request_id, rest.days, rest.topics) == ("rest-of-week", DAYS[1:], ["Topic 1", "Topic 2"])
+    # Nothing else is asked for again: the schedule and topics are done
+    assert not ctx.of_type(UserInput) and not ctx.of_type(TopicRequest)
+
+
+def test_resume_resends_only_the_days_a_batch_still_owes(restarted):
+    session = new_campaign(restarted, "session-1")
+    scheduled(restarted, session, first_request="first-post")
+    topics_arrived(restarted, session, batch_request="rest-of-week")
+    restarted.workflow.advance(session, [post_step("Monday"), post_step("Wednesday")], DONE)
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 1
+    [rest] = ctx.of_type(ContentRequest)
+    assert (rest.request_id, rest.day, rest.topic) == ("rest-of-week", "Friday", "Topic 2")
+    assert not ctx.of_type(ContentBatchRequest)
+
+
+def test_resume_leaves_requests_the_work_queue_still_holds(restarted):
+    session = new_campaign(restarted, "session-1")
+    scheduled(restarted, session, first_request="first-post")
+    restarted.workflow.advance(session, [TOPICS_STEP], ISSUED)
+    # A durable queue kept the first post's request across the restart
+    restarted.content_dispatcher.submit("first-post", {"kind": "single", "message": ContentRequest(
+        topic="fitness - blog post Update", day="Monday", area_of_interest="fitness", content_type="blog post",
+        keywords=["running"], batch_id="batch-1", session_id="session-1", request_id="first-post"
+    ).dict()})
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 1  # Only the topics
+    assert len(ctx.of_type(TopicRequest)) == 1
+    # The queued request is left for the dispatcher to deliver, not queued a second time
+    assert not ctx.of_type(ContentRequest)
+    assert restarted.content_dispatcher.queue.pending_count() == 1
+
+
+def test_resume_requests_a_first_post_never_sent(restarted):
+    session = new_campaign(restarted, "session-1")
+    scheduled(restarted, session, first_request="first-post")
+    topics_arrived(restarted, session, batch_request="rest-of-week")
+    # Stopped after the schedule was recorded, before the first post was requested
+    session["workflow"].pop(post_step("Monday"))
+    restarted.workflow.advance(session, [post_step(day) for day in DAYS[1:]], DONE)
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 1
+    [first] = ctx.of_type(ContentRequest)
+    assert (first.day, first.priority) == ("Monday", "interactive")
+    assert first.request_id != "first-post"
+
+
+def test_resume_skips_finished_campaigns(restarted):
+    session = new_campaign(restarted, "session-1")
+    restarted.workflow.advance(session, [SCHEDULE_STEP, TOPICS_STEP], ISSUED)
+    scheduled(restarted, session, first_request="first-post")
+    topics_arrived(restarted, session, batch_request="rest-of-week")
+    restarted.workflow.advance(session, [post_step(day) for day in DAYS], DONE)
+
+    ctx = RecordingContext()
+    assert asyncio.run(restarted.resume_campaigns(ctx)) == 0
+    assert ctx.sent == []